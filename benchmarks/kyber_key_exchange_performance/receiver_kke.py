@@ -2,7 +2,14 @@ import socket
 import json
 import threading
 import time
-from kyber_wrapper1024 import encapsulate
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(1024)
+
 
 class KyberReceiverBenchmark:
     def __init__(self):
@@ -33,7 +40,7 @@ class KyberReceiverBenchmark:
         self.sender_public_key = bytes.fromhex(public_key_hex)
         
         start_time = time.time()
-        self.encapsulated_key, self.shared_secret = encapsulate(self.sender_public_key)
+        self.encapsulated_key, self.shared_secret = KEM.encaps(self.sender_public_key)
         end_time = time.time()
         
         encapsulation_time = (end_time - start_time) * 1_000_000  
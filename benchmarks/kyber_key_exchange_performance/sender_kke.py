@@ -2,7 +2,13 @@ import socket
 import json
 import time
 import sys
-from kyber_wrapper1024 import generate_keypair, decapsulate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(1024)
+
 
 class KyberSenderBenchmark:
     def __init__(self):
@@ -19,7 +25,7 @@ class KyberSenderBenchmark:
 
     def generate_kyber_keys(self):
         start_time = time.time()
-        self.public_key, self.private_key = generate_keypair()
+        self.public_key, self.private_key = KEM.keypair()
         end_time = time.time()
         return (end_time - start_time) * 1_000_000
 
@@ -27,7 +33,7 @@ class KyberSenderBenchmark:
         encapsulated_key_bytes = bytes.fromhex(encapsulated_key_hex)
         
         start_time = time.time()
-        self.shared_secret = decapsulate(encapsulated_key_bytes, self.private_key)
+        self.shared_secret = KEM.decaps(encapsulated_key_bytes, self.private_key)
         end_time = time.time()
         
         return (end_time - start_time) * 1_000_000  
@@ -0,0 +1,226 @@
+import argparse
+import csv
+import ctypes
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+from quantum.pqc.loader import LEVELS, LIB_DIR_ENV, VARIANTS, library_path
+
+OPERATIONS = ['keypair', 'encaps', 'decaps']
+DEFAULT_ITERATIONS = 2000
+DEFAULT_WARMUP = 200
+# Operations per native batch call when measuring C time on its own
+DEFAULT_BATCH_SIZE = 256
+# Timed batch calls; the median of a handful is still at the mercy of one scheduler hiccup
+BATCH_REPEATS = 50
+
+FIELDS = [
+    'label', 'variant', 'level', 'operation', 'iterations', 'ops_per_s',
+    'latency_mean_us', 'latency_p50_us', 'latency_p95_us', 'latency_p99_us',
+    'native_call_p50_us', 'c_time_us', 'marshalling_us', 'batch_workers', 'batch_ops_per_s', 'batch_speedup',
+    'library',
+]
+
+
+def operation_calls(kem, operation, batch_size, workers=1):
+    """(api, native, batch, batch_api) zero-argument callables for one operation on fixed inputs.
+
+    api goes through Kyber as applications do; native calls the C function
+    directly on preallocated buffers, so it costs one ctypes call plus C;
+    batch runs batch_size operations in one call and is None when the
+    library was built without batch.c; batch_api runs batch_size operations
+    through Kyber's *_batch_into split across `workers` threads.
+    """
+    public_key, secret_key = kem.keypair()
+    ciphertext, _ = kem.encaps(public_key)
+    index = OPERATIONS.index(operation)
+    native, batch = kem.functions[index], kem.functions[index + 3]
+    public_keys = ctypes.create_string_buffer(kem.public_key_bytes * batch_size)
+    secret_keys = ctypes.create_string_buffer(kem.secret_key_bytes * batch_size)
+    ciphertexts = ctypes.create_string_buffer(kem.ciphertext_bytes * batch_size)
+    shared_secrets = ctypes.create_string_buffer(kem.shared_secret_bytes * batch_size)
+
+    if operation == 'keypair':
+        native_args = (public_keys, secret_keys)
+        batch_args = (public_keys, secret_keys, batch_size)
+        api = kem.keypair
+
+        def batch_api():
+            return kem.keypair_batch_into(public_keys, secret_keys, batch_size, workers)
+    elif operation == 'encaps':
+        native_args = (ciphertexts, shared_secrets, public_key)
+        batch_args = (ciphertexts, shared_secrets, public_key * batch_size, batch_size)
+
+        def api():
+            return kem.encaps(public_key)
+
+        def batch_api():
+            return kem.encaps_batch_into(batch_args[2], ciphertexts, shared_secrets, workers)
+    else:
+        native_args = (shared_secrets, ciphertext, secret_key)
+        batch_args = (shared_secrets, ciphertext * batch_size, secret_key, batch_size)
+
+        def api():
+            return kem.decaps(ciphertext, secret_key)
+
+        def batch_api():
+            return kem.decaps_batch_into(batch_args[1], secret_key, shared_secrets, workers)
+
+    def call_native():
+        return native(*native_args)
+
+    def call_batch():
+        return batch(*batch_args)
+
+    return api, call_native, call_batch if batch is not None else None, batch_api
+
+
+def timings(call, iterations):
+    """Seconds each of `iterations` calls takes, with the garbage collector off."""
+    latencies = np.empty(iterations)
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(iterations):
+            start = time.perf_counter()
+            call()
+            latencies[i] = time.perf_counter() - start
+    finally:
+        gc.enable()
+    return latencies
+
+
+def measure_operation(kem, operation, iterations, warmup, batch_size, workers=1):
+    api, native, batch, batch_api = operation_calls(kem, operation, batch_size, workers)
+    for _ in range(warmup):
+        api()
+        native()
+
+    latencies = timings(api, iterations) * 1e6
+    native_p50 = float(np.median(timings(native, iterations)) * 1e6)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    # Per-operation C time: the ctypes call is amortized over the whole batch
+    c_time = None
+    if batch is not None:
+        batch()
+        c_time = float(np.median(timings(batch, BATCH_REPEATS)) * 1e6 / batch_size)
+    # Throughput of the batch API with its worker threads, against the per-call API above
+    batch_api()
+    batch_ops_per_s = batch_size / float(np.median(timings(batch_api, BATCH_REPEATS)))
+    ops_per_s = iterations / latencies.sum() * 1e6
+    return {
+        'variant': kem.variant,
+        'level': kem.level,
+        'operation': operation,
+        'iterations': iterations,
+        'ops_per_s': ops_per_s,
+        'latency_mean_us': float(latencies.mean()),
+        'latency_p50_us': float(p50),
+        'latency_p95_us': float(p95),
+        'latency_p99_us': float(p99),
+        'native_call_p50_us': native_p50,
+        'c_time_us': c_time,
+        # Kyber wrapper cost on top of one bare ctypes call on the same inputs
+        'marshalling_us': float(p50) - native_p50,
+        'batch_workers': workers,
+        'batch_ops_per_s': batch_ops_per_s,
+        'batch_speedup': batch_ops_per_s / ops_per_s,
+        'library': str(library_path(kem.level, kem.variant)),
+    }
+
+
+def run_benchmark(levels, operations, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+                  batch_size=DEFAULT_BATCH_SIZE, label='', variant=None, workers=1, progress=print):
+    """variant=None measures the build the loader picks for this CPU, as applications get it."""
+    results = []
+    for level in levels:
+        kem = Kyber(level, variant)
+        for operation in operations:
+            row = measure_operation(kem, operation, iterations, warmup, batch_size, workers)
+            row['label'] = label
+            results.append(row)
+            if progress:
+                c_time = f"{row['c_time_us']:8.2f}" if row['c_time_us'] is not None else '       -'
+                progress(f"{kem.name:>9} {kem.variant:<9} {operation:<8} {row['ops_per_s']:9.0f} ops/s  "
+                         f"p50 {row['latency_p50_us']:8.2f} us  p99 {row['latency_p99_us']:8.2f} us  "
+                         f"C {c_time} us  marshalling {row['marshalling_us']:6.2f} us  "
+                         f"batch x{workers} {row['batch_ops_per_s']:9.0f} ops/s ({row['batch_speedup']:.2f}x)")
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def write_results(path, results, config):
+    """CSV gets one row per level and operation; anything else is written as JSON with the run metadata."""
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with path.open('w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with path.open('w') as f:
+            json.dump({'environment': environment(), 'config': config, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='In-process Kyber keypair/encaps/decaps latency. To compare builds, run once per '
+                    '--variant, or per library directory with its own --label, e.g. after '
+                    'python -m quantum.pqc.build --optimized --output-dir build/opt')
+    parser.add_argument('--levels', type=int, nargs='+', choices=sorted(LEVELS), default=sorted(LEVELS),
+                        help='Kyber variants to measure (default: all)')
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS,
+                        help='Operations to measure (default: all)')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help=f'Timed calls per operation (default: {DEFAULT_ITERATIONS})')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP,
+                        help=f'Untimed calls per operation first (default: {DEFAULT_WARMUP})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Operations per batch call for the C time (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Threads for the batch API throughput (default: one per CPU)')
+    parser.add_argument('--lib-dir', default=None,
+                        help=f'Load the libraries from this directory (sets {LIB_DIR_ENV})')
+    parser.add_argument('--variant', choices=VARIANTS, default=None,
+                        help='Build variant to load (default: the one picked for this CPU)')
+    parser.add_argument('--label', default='', help='Build name recorded with each result, e.g. ref or optimized')
+    parser.add_argument('--output', default='kyber_microbench.json',
+                        help='Results file; .csv for CSV, JSON otherwise (default: kyber_microbench.json)')
+    args = parser.parse_args()
+
+    if args.lib_dir:
+        os.environ[LIB_DIR_ENV] = str(Path(args.lib_dir).resolve())
+    config = {
+        'levels': args.levels,
+        'operations': args.operations,
+        'iterations': args.iterations,
+        'warmup': args.warmup,
+        'batch_size': args.batch_size,
+        'workers': args.workers,
+        'lib_dir': args.lib_dir,
+        'variant': args.variant,
+        'label': args.label,
+    }
+    results = run_benchmark(args.levels, args.operations, args.iterations, args.warmup, args.batch_size,
+                            args.label, args.variant, args.workers)
+    write_results(args.output, results, config)
+    print(f"\nWrote {len(results)} results to {args.output}")
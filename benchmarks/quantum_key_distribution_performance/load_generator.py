@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.protocol import SenderSession
+from quantum.quantum_key_distribution.receiver_service import ReceiverService
+from quantum.quantum_key_distribution.wire_format import (
+    JSON_FORMAT, PACKED_FORMAT, recv_message_async, send_message_async)
+
+
+async def run_session(host, port, n_qubits, wire_format, rng):
+    """One complete BB84 exchange, through privacy amplification, over a single connection.
+
+    Returns (latency, session); the session has no secure_key if the QBER
+    sample aborted the run.
+    """
+    session = SenderSession(rng=rng)
+    session.prepare(n_qubits)
+    start_time = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await send_message_async(writer, session.quantum_state(wire_format))
+        await send_message_async(writer, session.receive_measurements(await recv_reply(reader)))
+        session.receive_basis_reply(await recv_reply(reader))
+        await send_message_async(writer, session.qber_sample())
+        if not session.receive_qber_reply(await recv_reply(reader)).abort:
+            message = session.reconcile()
+            while message is not None:
+                await send_message_async(writer, message)
+                reply = await recv_reply(reader)
+                message = session.receive_reconciliation(reply) if 'status' not in reply else None
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return time.perf_counter() - start_time, session
+
+
+async def recv_reply(reader):
+    reply = await recv_message_async(reader)
+    if reply.get('status') in ('busy', 'error'):
+        raise ConnectionError(reply.get('message', reply['status']))
+    return reply
+
+
+async def sender_worker(host, port, n_qubits, sessions_per_sender, wire_format, rng, results):
+    for _ in range(sessions_per_sender):
+        try:
+            latency, session = await run_session(host, port, n_qubits, wire_format, rng)
+            results['latencies'].append(latency)
+            results['sifted_bits'] += session.sifted.n_sifted
+            results['secure_bits'] += session.secure_length or 0
+        except (OSError, EOFError, ValueError) as e:
+            # EOFError covers asyncio.IncompleteReadError when the service hangs up mid-exchange
+            results['failures'] += 1
+            results['last_error'] = str(e)
+
+
+async def run_load(host, port, concurrency, sessions_per_sender, n_qubits, wire_format, seed=None):
+    seeds = np.random.SeedSequence(seed).spawn(concurrency)
+    results = {'latencies': [], 'sifted_bits': 0, 'secure_bits': 0, 'failures': 0, 'last_error': None}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        sender_worker(host, port, n_qubits, sessions_per_sender, wire_format,
+                      np.random.default_rng(s), results)
+        for s in seeds))
+    results['elapsed'] = time.perf_counter() - start
+    return results
+
+
+def report(results, concurrency, n_qubits):
+    latencies = np.asarray(results['latencies'])
+    completed = latencies.size
+    elapsed = results['elapsed']
+    print("\n======= LOAD GENERATOR RESULTS =======")
+    print(f"Concurrent senders: {concurrency}")
+    print(f"Qubits per session: {n_qubits}")
+    print(f"Completed sessions: {completed}")
+    print(f"Failed sessions: {results['failures']}")
+    if results['last_error']:
+        print(f"Last error: {results['last_error']}")
+    print(f"Elapsed: {elapsed:.3f} seconds")
+    if completed:
+        print(f"Sessions/second: {completed / elapsed:.1f}")
+        print(f"Sessions/hour: {completed / elapsed * 3600:.0f}")
+        print(f"Sifted key throughput: {results['sifted_bits'] / elapsed / 1e6:.3f} Mbit/s")
+        print(f"Secure key throughput: {results['secure_bits'] / elapsed / 1e6:.3f} Mbit/s")
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+        print(f"Latency p50/p95/p99: {p50:.2f} / {p95:.2f} / {p99:.2f} ms")
+
+
+async def main_async(args):
+    service = None
+    host, port = args.host, args.port
+    if args.spawn_server:
+        service = ReceiverService('127.0.0.1', 0, max_sessions=max(args.concurrency, 1024),
+                                  max_qubits=max(args.qubits, 1 << 20))
+        host, port = await service.start()
+        print(f"Started in-process receiver service on {host}:{port}")
+    try:
+        results = await run_load(host, port, args.concurrency, args.sessions, args.qubits,
+                                 args.wire_format, args.seed)
+    finally:
+        if service is not None:
+            print(f"Service stats: {service.stats}")
+            await service.close()
+    report(results, args.concurrency, args.qubits)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Drive N concurrent BB84 senders against a receiver service')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Receiver service address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=12345, help='Port number (default: 12345)')
+    parser.add_argument('--concurrency', type=int, default=100, help='Number of concurrent senders (default: 100)')
+    parser.add_argument('--sessions', type=int, default=10, help='Sessions run by each sender (default: 10)')
+    parser.add_argument('--qubits', type=int, default=4096, help='Qubits per session (default: 4096)')
+    parser.add_argument('--wire-format', choices=[PACKED_FORMAT, JSON_FORMAT], default=PACKED_FORMAT,
+                        help=f'Quantum state encoding (default: {PACKED_FORMAT})')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the senders\' bits and bases')
+    parser.add_argument('--spawn-server', action='store_true',
+                        help='Run the receiver service in this process instead of connecting to one')
+
+    asyncio.run(main_async(parser.parse_args()))
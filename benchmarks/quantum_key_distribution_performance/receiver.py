@@ -1,14 +1,23 @@
 import socket
-import json
-import random
+import sys
 import threading
 import time
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
 import gc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.bb84_simulation import array_to_bases, make_rng
+from quantum.quantum_key_distribution.protocol import (
+    BASIS_COMPARISON, QUANTUM_STATE, ReceiverSession, message_kind)
+from quantum.quantum_key_distribution.protocol.receiver import AWAITING_BASIS_COMPARISON
+from quantum.quantum_key_distribution.sifting import preview_rows, sift
+from quantum.quantum_key_distribution.wire_format import recv_message, send_message
 
 class BB84Receiver:
-    def __init__(self):
+    def __init__(self, backend='numpy', seed=None):
+        self.backend = backend
+        self.rng = make_rng(seed)
+        self.session = ReceiverSession(backend=backend, rng=self.rng)
         self.bob_bases = None
         self.bob_measurements = None
         self.final_key = None
@@ -74,44 +83,41 @@ class BB84Receiver:
                     gc.collect()
 
                     receiving_start_time = time.perf_counter()
-                    data = client.recv(16384).decode()
+                    msg = recv_message(client)
                     receiving_end_time = time.perf_counter()
 
-                    msg = json.loads(data)
-                    if msg.get('is_quantum_state'):
+                    kind = message_kind(msg)
+                    if kind == QUANTUM_STATE:
                         self.protocol_start_time = receiving_start_time
                         self.state_receiving_time = (receiving_end_time - receiving_start_time) * 1_000_000
-                        client.sendall(json.dumps({'received': True}).encode())
+                        send_message(client, {'received': True})
 
-                    if 'sender_bases' in msg and self.bob_bases and self.bob_measurements:
+                    if kind == BASIS_COMPARISON and self.session.state == AWAITING_BASIS_COMPARISON:
                         sb = msg['sender_bases']
 
                         gc.collect()
                         basis_start_time = time.perf_counter()
-                        kept_indices = [i for i, b in enumerate(sb) if b == self.bob_bases[i]]
+                        response = self.session.receive_basis_comparison(msg)
                         basis_end_time = time.perf_counter()
                         self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000  
+                        sifted = self.session.sifted
 
                         if self.basis_comparison_time > 0:
-                            self.key_throughput = (len(kept_indices) / self.basis_comparison_time)
+                            self.key_throughput = (sifted.n_sifted / self.basis_comparison_time)
 
                         final_key_gen_start = time.perf_counter()
-                        final_key = ''.join(str(self.bob_measurements[i]) for i in kept_indices)
-                        self.final_key = final_key
+                        self.final_key = sifted.key_string()
                         final_key_gen_end = time.perf_counter()
 
                         self.state_measuring_time += (final_key_gen_end - final_key_gen_start) * 1_000_000
                         
-                        client.sendall(json.dumps({
-                            'bob_bases': self.bob_bases,
-                            'bob_measurements': self.bob_measurements
-                        }).encode())
+                        send_message(client, response)
 
                         protocol_end_time = time.perf_counter()
                         if self.protocol_start_time is not None:
                             self.total_protocol_time = (protocol_end_time - self.protocol_start_time) * 1_000_000  
 
-                        self.display_results(None, sb, self.bob_bases, self.bob_measurements, kept_indices)
+                        self.display_results(None, sb, self.bob_bases, self.bob_measurements, sifted)
                         client.close()
                         self.client_socket = None
                         self.stop_listening()
@@ -140,41 +146,10 @@ class BB84Receiver:
             gc.collect()
             measure_start_time = time.perf_counter()
             
-            qs = self.received_data
-            ops = qs.get('circuit_operations')
-            n = qs.get('n_bits')
-            if not ops or not n:
-                raise ValueError("Invalid quantum state data")
-
-            bb = ['+' if random.getrandbits(1) == 0 else 'x' for _ in range(n)]
-
-            measurements = []
-            chunk = 16
-            for start in range(0, n, chunk):
-                end = min(n, start + chunk)
-                size = end - start
-                qc = QuantumCircuit(size, size)
-
-                for op in ops:
-                    qi = op.get('qubits', [None])[0]
-                    if qi is None or not (start <= qi < end):
-                        continue
-                    idx = qi - start
-                    if op.get('gate') == 'x':
-                        qc.x(idx)
-                    elif op.get('gate') == 'h':
-                        qc.h(idx)
-
-                for i in range(size):
-                    if bb[start + i] == 'x':
-                        qc.h(i)
-
-                qc.measure(range(size), range(size))
-                backend = AerSimulator()
-                tc = transpile(qc, backend)
-                res = backend.run(tc, shots=1).result()
-                bits = list(res.get_counts().keys())[0][::-1]
-                measurements.extend(int(b) for b in bits)
+            self.session.accept_quantum_state(self.received_data)
+            response = self.session.measure()
+            bb = array_to_bases(self.session.bases)
+            measurements = self.session.measurements
 
             print(f"\nBob's Bases: {''.join(bb)}")
             print(f"Bob's Measurements: {''.join(str(m) for m in measurements)}")
@@ -182,10 +157,7 @@ class BB84Receiver:
             measure_end_time = time.perf_counter()
             self.state_measuring_time = (measure_end_time - measure_start_time) * 1_000_000
 
-            self.client_socket.sendall(json.dumps({
-                'bob_bases': bb,
-                'bob_measurements': measurements
-            }).encode())
+            send_message(self.client_socket, response)
 
             self.bob_bases = bb
             self.bob_measurements = measurements
@@ -197,20 +169,18 @@ class BB84Receiver:
                 self.client_socket.close()
                 self.client_socket = None
 
-    def display_results(self, sender_bits, sender_bases, bob_bases, bob_measurements, kept_indices=None):
+    def display_results(self, sender_bits, sender_bases, bob_bases, bob_measurements, sifted=None):
         show_alice = sender_bits is not None
         gc.collect()
-        if kept_indices is None and sender_bases:
+        if sifted is None:
+            basis_start_time = time.perf_counter()
+            sifted = sift(sender_bases, bob_bases, sender_bits, bob_measurements)
+            basis_end_time = time.perf_counter()
             if self.basis_comparison_time == 0:
-                basis_start_time = time.perf_counter()
-                kept_indices = [i for i, b in enumerate(sender_bases) if b == bob_bases[i]]
-                basis_end_time = time.perf_counter()
                 self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000
 
-                if self.basis_comparison_time > 0 and kept_indices:
-                    self.key_throughput = (len(kept_indices) / self.basis_comparison_time)
-            else:
-                kept_indices = [i for i, b in enumerate(sender_bases) if b == bob_bases[i]]
+                if self.basis_comparison_time > 0 and sifted.n_sifted:
+                    self.key_throughput = (sifted.n_sifted / self.basis_comparison_time)
 
         print("\nBB84 Protocol Results")
         print("-" * 60)
@@ -219,21 +189,19 @@ class BB84Receiver:
         else:
             print("No.\tA.Base\tB.Base\tB.Measure\tKept?")
 
-        for i in range(len(sender_bases)):
-            kept = "Yes" if i in kept_indices else "No"
-            if show_alice:
-                print(f"{i}\t{sender_bits[i]}\t{sender_bases[i]}\t{bob_bases[i]}\t{bob_measurements[i]}\t{kept}")
-            else:
-                print(f"{i}\t{sender_bases[i]}\t{bob_bases[i]}\t{bob_measurements[i]}\t{kept}")
+        columns = (sender_bases, bob_bases, bob_measurements)
+        if show_alice:
+            columns = (sender_bits,) + columns
+        print(preview_rows(sifted.mask, columns), end='')
 
-        final = ''.join(str(bob_measurements[i]) for i in kept_indices)
+        final = sifted.key_string()
         self.final_key = final
         print("-" * 60)
         print(f"Final Shared key: {final}")
 
-        total = len(sender_bases)
-        match = len(kept_indices)
-        rate = (match / total * 100) if total else 0
+        total = sifted.n_total
+        match = sifted.n_sifted
+        rate = sifted.match_rate * 100
         print(f"\nTotal qubits: {total}")
         print(f"Matching Bases: {match}")
         print(f"Key Generation Rate: {rate:.2f}%")
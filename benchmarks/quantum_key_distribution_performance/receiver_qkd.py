@@ -1,15 +1,23 @@
 import socket
-import json
-import random
+import sys
 import threading
 import time
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
 import gc
 import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.bb84_simulation import array_to_bases, make_rng
+from quantum.quantum_key_distribution.protocol import (
+    BASIS_COMPARISON, QUANTUM_STATE, ReceiverSession, message_kind)
+from quantum.quantum_key_distribution.protocol.receiver import AWAITING_BASIS_COMPARISON
+from quantum.quantum_key_distribution.wire_format import recv_message, send_message
 
 class BB84Receiver:
-    def __init__(self):
+    def __init__(self, backend='numpy', seed=None):
+        self.backend = backend
+        self.rng = make_rng(seed)
+        self.session = ReceiverSession(backend=backend, rng=self.rng)
         self.bob_bases = None
         self.bob_measurements = None
         self.final_key = None
@@ -29,6 +37,7 @@ class BB84Receiver:
         # For benchmarking
         self.iteration_complete = threading.Event()
         self.reset_needed = False
+        self.completed_benchmark_data = None
 
     def get_ip(self):
         try:
@@ -80,6 +89,7 @@ class BB84Receiver:
         self.bob_measurements = None
         self.final_key = None
         self.received_data = None
+        self.session.reset()
         if self.client_socket:
             try:
                 self.client_socket.close()
@@ -114,48 +124,41 @@ class BB84Receiver:
                     
                     # Receive data - start timing when we actually receive data
                     receiving_start_time = time.perf_counter()
-                    data = client.recv(16384).decode()
+                    msg = recv_message(client)
                     receiving_end_time = time.perf_counter()
-                    
-                    # Parse the data
-                    msg = json.loads(data)
+                    kind = message_kind(msg)
                     
                     # Check if this is quantum state data
-                    if msg.get('is_quantum_state'):
+                    if kind == QUANTUM_STATE:
                         self.protocol_start_time = receiving_start_time
                         self.state_receiving_time = (receiving_end_time - receiving_start_time) * 1_000_000  # Convert to microseconds
                         # Send acknowledgment of receipt before processing
-                        client.sendall(json.dumps({'received': True}).encode())
+                        send_message(client, {'received': True})
 
                     # Check if we're receiving basis comparison data
-                    if 'sender_bases' in msg and self.bob_bases and self.bob_measurements:
-                        sb = msg['sender_bases']
-                        
+                    if kind == BASIS_COMPARISON and self.session.state == AWAITING_BASIS_COMPARISON:
                         # Measure basis comparison time
                         gc.collect()
                         basis_start_time = time.perf_counter()
-                        kept_indices = [i for i, b in enumerate(sb) if b == self.bob_bases[i]]
+                        response = self.session.receive_basis_comparison(msg)
                         basis_end_time = time.perf_counter()
                         self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000  # Convert to microseconds
+                        sifted = self.session.sifted
                         
                         # Calculate key throughput
                         if self.basis_comparison_time > 0:
-                            self.key_throughput = (len(kept_indices) / self.basis_comparison_time)
+                            self.key_throughput = (sifted.n_sifted / self.basis_comparison_time)
                         
                         # Generate final key (but don't display it)
                         final_key_gen_start = time.perf_counter()
-                        final_key = ''.join(str(self.bob_measurements[i]) for i in kept_indices)
-                        self.final_key = final_key
+                        self.final_key = sifted.key_string()
                         final_key_gen_end = time.perf_counter()
                         
                         # Include the key generation time in the measurement time
                         self.state_measuring_time += (final_key_gen_end - final_key_gen_start) * 1_000_000
                         
                         # Send the response with measurement data
-                        client.sendall(json.dumps({
-                            'bob_bases': self.bob_bases,
-                            'bob_measurements': self.bob_measurements
-                        }).encode())
+                        send_message(client, response)
 
                         # Calculate total protocol time
                         protocol_end_time = time.perf_counter()
@@ -165,6 +168,8 @@ class BB84Receiver:
                         print("Protocol iteration completed.")
                         
                         # Mark this iteration as complete and ready for reset
+                        # Snapshot before the listener resets for the next iteration
+                        self.completed_benchmark_data = self.get_benchmark_data()
                         self.reset_needed = True
                         self.iteration_complete.set()
                         
@@ -200,53 +205,17 @@ class BB84Receiver:
             gc.collect()
             measure_start_time = time.perf_counter()
             
-            qs = self.received_data
-            ops = qs.get('circuit_operations')
-            n = qs.get('n_bits')
-            if not ops or not n:
-                raise ValueError("Invalid quantum state data")
-
-            bb = ['+' if random.getrandbits(1) == 0 else 'x' for _ in range(n)]
-
-            measurements = []
-            chunk = 16
-            for start in range(0, n, chunk):
-                end = min(n, start + chunk)
-                size = end - start
-                qc = QuantumCircuit(size, size)
-
-                for op in ops:
-                    qi = op.get('qubits', [None])[0]
-                    if qi is None or not (start <= qi < end):
-                        continue
-                    idx = qi - start
-                    if op.get('gate') == 'x':
-                        qc.x(idx)
-                    elif op.get('gate') == 'h':
-                        qc.h(idx)
-
-                for i in range(size):
-                    if bb[start + i] == 'x':
-                        qc.h(i)
-
-                qc.measure(range(size), range(size))
-                backend = AerSimulator()
-                tc = transpile(qc, backend)
-                res = backend.run(tc, shots=1).result()
-                bits = list(res.get_counts().keys())[0][::-1]
-                measurements.extend(int(b) for b in bits)
+            self.session.accept_quantum_state(self.received_data)
+            response = self.session.measure()
             
             # End timing the quantum state measurement
             measure_end_time = time.perf_counter()
             self.state_measuring_time = (measure_end_time - measure_start_time) * 1_000_000  # Convert to microseconds
 
-            self.client_socket.sendall(json.dumps({
-                'bob_bases': bb,
-                'bob_measurements': measurements
-            }).encode())
+            send_message(self.client_socket, response)
 
-            self.bob_bases = bb
-            self.bob_measurements = measurements
+            self.bob_bases = array_to_bases(self.session.bases)
+            self.bob_measurements = self.session.measurements
             self.received_data = None
 
         except Exception as e:
@@ -264,13 +233,13 @@ class BB84Receiver:
             "total_protocol_time": self.total_protocol_time
         }
 
-def run_receiver_benchmark(port=12345, iterations=10):
+def run_receiver_benchmark(port=12345, iterations=10, backend='numpy'):
     print("BB84 Quantum Key Distribution - Receiver (Bob)")
     print("==============================================")
     print(f"Preparing to run {iterations} benchmark iterations...")
     
     # Initialize receiver
-    receiver = BB84Receiver()
+    receiver = BB84Receiver(backend=backend)
     
     # Start listening
     if not receiver.start_listening(port):
@@ -296,7 +265,7 @@ def run_receiver_benchmark(port=12345, iterations=10):
             
             if receiver.iteration_complete.is_set():
                 # Get benchmark data for this iteration
-                benchmark_data = receiver.get_benchmark_data()
+                benchmark_data = receiver.completed_benchmark_data
                 
                 # Accumulate data
                 total_state_receiving_time += benchmark_data["state_receiving_time"]
@@ -309,7 +278,6 @@ def run_receiver_benchmark(port=12345, iterations=10):
                 
                 # Reset for next iteration
                 receiver.iteration_complete.clear()
-                receiver.reset_for_next_iteration()
                 
                 print(f"Completed iteration {i+1}")
             else:
@@ -344,9 +312,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='BB84 Quantum Key Distribution - Receiver (Bob)')
     parser.add_argument('--port', type=int, default=12345, help='Port number (default: 12345)')
     parser.add_argument('--iterations', type=int, default=10, help='Number of iterations for benchmarking (default: 10)')
+    parser.add_argument('--backend', choices=['numpy', 'aer'], default='numpy',
+                        help='Measurement simulator: numpy engine or Qiskit Aer reference (default: numpy)')
     
     # Parse arguments
     args = parser.parse_args()
     
     # Run benchmark with specified parameters
-    run_receiver_benchmark(args.port, args.iterations)
\ No newline at end of file
+    run_receiver_benchmark(args.port, args.iterations, args.backend)
\ No newline at end of file
@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution import channel as channel_models
+from quantum.quantum_key_distribution.bb84_simulation import make_rng
+from quantum.quantum_key_distribution.parallel import ShardedEngine
+from quantum.quantum_key_distribution.protocol import (
+    QBER_RESULT, EavesdropperSession, ReceiverSession, SenderSession)
+from quantum.quantum_key_distribution.protocol.messages import (
+    basis_comparison_message, measurements_message, qber_sample_message, sifted_message)
+from quantum.quantum_key_distribution.sifting import sift
+from quantum.quantum_key_distribution.transcript import (
+    EAVESDROPPER, RECEIVER, SENDER, capture, load_transcript, save_transcript, unpack_bits, unpack_bytes)
+from quantum.quantum_key_distribution.wire_format import JSON_FORMAT, PACKED_FORMAT, decode_message
+from sweep import run_session
+
+
+def record(n_qubits, noise, eve_rate, backend, wire_format, seed, output_dir):
+    """Run one seeded in-process session and write a transcript per party; returns the paths."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    params = {'seed': seed, 'noise': noise, 'eve_rate': eve_rate, 'wire_format': wire_format}
+    paths = []
+    for session in run_session(n_qubits, noise, eve_rate, backend, wire_format, make_rng(seed)):
+        if session is None:
+            continue
+        path = output_dir / f"{session.role}.json"
+        save_transcript(path, capture(session, **params))
+        paths.append(path)
+    return paths
+
+
+def _build_channel(specs):
+    models = []
+    for spec in specs:
+        spec = dict(spec)
+        models.append(getattr(channel_models, spec.pop('model'))(**spec))
+    return models
+
+
+def _sender_steps(transcript, workers):
+    data = {name: unpack_bits(record) for name, record in transcript['data'].items()}
+    session = SenderSession(rng=make_rng())
+
+    def call(step):
+        name, args = step['step'], step['args']
+        if name == 'prepare':
+            # Bits may have come from an entropy pool, so they are always fed back in
+            return session.prepare(bits=data['bits'], bases=data['bases'])
+        if name == 'quantum_state':
+            return session.quantum_state(**args)
+        if name == 'receive_measurements':
+            return session.receive_measurements(measurements_message(data['bob_bases'], data['bob_detected']))
+        if name == 'receive_basis_reply':
+            # The receiver only confirms the count the sender sifts to on its own
+            detected = None if data['bob_detected'] is None else data['bob_detected'].astype(bool)
+            return session.receive_basis_reply(
+                sifted_message(sift(data['bases'], data['bob_bases'], detected=detected).n_sifted))
+        if name == 'qber_sample':
+            return session.qber_sample(**args)
+        if name == 'receive_qber_reply':
+            return session.receive_qber_reply({'phase': QBER_RESULT,
+                                               'sample_bits': data['bob_sample_bits'].tolist()})
+        raise ValueError(f"Unknown sender step: {name}")
+    return session, call
+
+
+def _receiver_steps(transcript, workers):
+    params, records = transcript['params'], transcript['data']
+    data = {name: unpack_bits(record) for name, record in records.items() if name != 'state'}
+    engine = None
+    if params.get('engine'):
+        # Sharded output depends on the shard size only, not on the worker count
+        engine = ShardedEngine(workers, params['engine']['shard_size'])
+    session = ReceiverSession(backend=params['backend'], rng=make_rng(),
+                              channel=_build_channel(params.get('channel', [])), engine=engine)
+    estimate = transcript['result']['qber_estimate']
+
+    def call(step):
+        name = step['step']
+        if name == 'accept_quantum_state':
+            return session.accept_quantum_state(decode_message(unpack_bytes(records['state'])))
+        if name == 'measure':
+            return session.measure(data['bases'] if 'bases' in step['given'] else None)
+        if name == 'receive_basis_comparison':
+            return session.receive_basis_comparison(basis_comparison_message(data['sender_bases']))
+        if name == 'receive_qber_sample':
+            return session.receive_qber_sample(qber_sample_message(
+                np.flatnonzero(data['sample_mask']), data['sender_sample_bits'],
+                estimate['confidence'], estimate['threshold']))
+        raise ValueError(f"Unknown receiver step: {name}")
+    return session, call
+
+
+def _eavesdropper_steps(transcript, workers):
+    params, records = transcript['params'], transcript['data']
+    session = EavesdropperSession(backend=params['backend'], rng=make_rng(), rate=params['rate'])
+
+    def call(step):
+        name = step['step']
+        if name == 'accept_quantum_state':
+            return session.accept_quantum_state(decode_message(unpack_bytes(records['state'])))
+        if name == 'intercept':
+            return session.intercept(unpack_bits(records['bases']) if 'bases' in step['given'] else None)
+        raise ValueError(f"Unknown eavesdropper step: {name}")
+    return session, call
+
+
+_REPLAYERS = {
+    SENDER: _sender_steps,
+    RECEIVER: _receiver_steps,
+    EAVESDROPPER: _eavesdropper_steps,
+}
+
+
+def replay(transcript, repeats=1, workers=1):
+    """Re-execute one party's recorded run offline and compare it with the transcript.
+
+    Every step starts from the RNG state recorded for it, so the replayed
+    bases, measurements, sample positions and key must match the originals
+    bit for bit; `mismatches` lists whatever does not. Step timings are the
+    median over `repeats` replays next to the recorded ones.
+    """
+    if repeats < 1:
+        raise ValueError("Repeats must be positive")
+    steps = transcript['steps']
+    timings = np.empty((repeats, len(steps)))
+    mismatches = []
+    for i in range(repeats):
+        session, call = _REPLAYERS[transcript['role']](transcript, workers)
+        try:
+            for j, step in enumerate(steps):
+                session.rng.bit_generator.state = step['rng_state']
+                start = time.perf_counter()
+                call(step)
+                timings[i, j] = time.perf_counter() - start
+        finally:
+            if getattr(session, 'engine', None) is not None:
+                session.engine.close()
+        if i == 0:
+            replayed = capture(session)
+            mismatches = [name for name, value in transcript['data'].items()
+                          if replayed['data'].get(name) != value]
+            for name in ('state', 'qber_estimate', 'key_digest'):
+                if replayed['result'][name] != transcript['result'][name]:
+                    mismatches.append(name)
+
+    medians = np.median(timings, axis=0)
+    return {
+        'role': transcript['role'],
+        'n_bits': transcript['result']['n_bits'],
+        'repeats': repeats,
+        'mismatches': mismatches,
+        'steps': [{'step': step['step'], 'recorded_ms': step['elapsed'] * 1000, 'replay_ms': float(ms * 1000)}
+                  for step, ms in zip(steps, medians)],
+        'recorded_total_ms': sum(step['elapsed'] for step in steps) * 1000,
+        'replay_total_ms': float(medians.sum() * 1000),
+    }
+
+
+def print_report(report):
+    verdict = 'identical' if not report['mismatches'] else 'MISMATCH in ' + ', '.join(report['mismatches'])
+    print(f"{report['role']} ({report['n_bits']} qubits, {report['repeats']} replays): {verdict}")
+    for step in report['steps']:
+        print(f"  {step['step']:<26} recorded {step['recorded_ms']:10.3f} ms   replay {step['replay_ms']:10.3f} ms")
+    print(f"  {'total':<26} recorded {report['recorded_total_ms']:10.3f} ms   "
+          f"replay {report['replay_total_ms']:10.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Record BB84 session transcripts and replay them offline')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Run a seeded in-process session and save transcripts')
+    record_parser.add_argument('--qubits', type=int, default=100_000, help='Qubits to send (default: 100000)')
+    record_parser.add_argument('--noise', type=float, default=0.0, help='Depolarizing probability (default: 0)')
+    record_parser.add_argument('--eve-rate', type=float, default=0.0, help='Intercept-resend rate (default: 0)')
+    record_parser.add_argument('--backend', default='numpy', help='Measurement backend (default: numpy)')
+    record_parser.add_argument('--wire-format', choices=[PACKED_FORMAT, JSON_FORMAT], default=PACKED_FORMAT,
+                               help=f'Quantum state encoding (default: {PACKED_FORMAT})')
+    record_parser.add_argument('--seed', type=int, default=0, help='Seed for every random draw (default: 0)')
+    record_parser.add_argument('--output-dir', default='qkd_transcripts',
+                               help='Directory for <role>.json transcripts (default: qkd_transcripts)')
+
+    replay_parser = commands.add_parser('replay', help='Re-execute transcripts and compare results and timings')
+    replay_parser.add_argument('transcripts', nargs='+', help='Transcript files from any of the parties')
+    replay_parser.add_argument('--repeats', type=int, default=5, help='Replays per transcript (default: 5)')
+    replay_parser.add_argument('--workers', type=int, default=1,
+                               help='Processes for sharded measurement where the run used them (default: 1)')
+    replay_parser.add_argument('--output', default=None, help='Write the replay reports to this JSON file')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        for path in record(args.qubits, args.noise, args.eve_rate, args.backend, args.wire_format,
+                           args.seed, args.output_dir):
+            print(f"Wrote {path}")
+    else:
+        reports = [replay(load_transcript(path), args.repeats, args.workers) for path in args.transcripts]
+        for report in reports:
+            print_report(report)
+        if args.output:
+            from sweep import environment
+            with open(args.output, 'w') as f:
+                json.dump({'environment': environment(), 'reports': reports}, f, indent=2)
+        sys.exit(1 if any(report['mismatches'] for report in reports) else 0)
@@ -1,15 +1,20 @@
 import socket
-import json
-import random
 import time
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile
-from qiskit_aer import AerSimulator
 import gc
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.bb84_simulation import array_to_bases
+from quantum.quantum_key_distribution.entropy_pool import QuantumEntropyPool
+from quantum.quantum_key_distribution.protocol import QUANTUM_STATE, SIFTED, SenderSession, message_kind
+from quantum.quantum_key_distribution.sifting import bits_to_string, preview_rows
+from quantum.quantum_key_distribution.wire_format import recv_message, send_message
 
 class BB84Sender:
-    def __init__(self):
-        self.bob_measurements = None
+    def __init__(self, entropy_pool=None):
+        self.entropy_pool = entropy_pool or QuantumEntropyPool()
+        self.session = SenderSession(random_source=self.entropy_pool.take_bits)
         self.bob_bases = None
         self.sender_bits = None
         self.sender_bases = None
@@ -25,29 +30,12 @@ class BB84Sender:
     def generate_quantum_random_bits(self, num_bits):
         gc.collect()
         start_time = time.perf_counter()
-        
-        num_qubits_per_chunk = 16
-        total_key_length = num_bits
-        key_binary = ''
-
-        while len(key_binary) < total_key_length:
-            qc = QuantumCircuit(num_qubits_per_chunk)
-            for qubit in range(num_qubits_per_chunk):
-                qc.h(qubit)
-            qc.measure_all()
-
-            backend = AerSimulator()
-            compiled_circuit = transpile(qc, backend)
-            job = backend.run(compiled_circuit, shots=1)
-            result = job.result()
-            counts = result.get_counts()
-            random_chunk = list(counts.keys())[0][::-1]
-            key_binary += random_chunk
-
-        key_binary = key_binary[:total_key_length]
+
+        bits = self.entropy_pool.take_bits(num_bits).tolist()
+
         end_time = time.perf_counter()
         self.bits_basis_gen_time = (end_time - start_time) * 1_000_000  
-        return [int(bit) for bit in key_binary]
+        return bits
 
     def send_data(self, host, port, data):
         try:
@@ -58,23 +46,22 @@ class BB84Sender:
 
                 gc.collect()
 
-                if 'circuit_operations' in data:
-                    data['is_quantum_state'] = True
+                if message_kind(data) == QUANTUM_STATE:
                     tx_start_time = time.perf_counter()
-                    s.sendall(json.dumps(data).encode())
+                    send_message(s, data)
 
-                    ack = s.recv(1024).decode()
+                    ack = recv_message(s)
                     tx_end_time = time.perf_counter()
                     
-                    if json.loads(ack).get('received'):
+                    if ack.get('received'):
                         self.quantum_state_tx_time = (tx_end_time - tx_start_time) * 1_000_000
 
-                    response = s.recv(16384).decode()
+                    response = recv_message(s)
                 else:
-                    s.sendall(json.dumps(data).encode())
-                    response = s.recv(16384).decode()
+                    send_message(s, data)
+                    response = recv_message(s)
                 
-                return json.loads(response), True
+                return response, True
         except Exception as e:
             print(f"Connection failed: {e}")
             return None, False
@@ -85,38 +72,18 @@ class BB84Sender:
             
             n_bits = self.n_qubits
             sender_bits = self.generate_quantum_random_bits(n_bits)
-            sender_bases = ['+' if b == 0 else 'x' for b in self.generate_quantum_random_bits(n_bits)]
+            sender_bases = array_to_bases(self.generate_quantum_random_bits(n_bits))
 
             self.sender_bits = sender_bits
             self.sender_bases = sender_bases
+            self.session.reset()
+            self.session.prepare(bits=sender_bits, bases=sender_bases)
 
             print("Starting quantum transmission...")
             print("Alice's Bits: " + ''.join(str(b) for b in sender_bits))
             print("Alice's Bases: " + ''.join(sender_bases))
 
-            qr = QuantumRegister(n_bits, name='qr')
-            cr = ClassicalRegister(n_bits, name='cr')
-            qc = QuantumCircuit(qr, cr)
-
-            for i in range(n_bits):
-                if sender_bits[i] == 1:
-                    qc.x(qr[i])
-                if sender_bases[i] == 'x':
-                    qc.h(qr[i])
-
-            circuit_ops = []
-            for instruction in qc.data:
-                gate_name = instruction.operation.name
-                qubits = [qr.index(q) for q in instruction.qubits]
-                circuit_ops.append({
-                    'gate': gate_name,
-                    'qubits': qubits
-                })
-
-            quantum_state = {
-                'circuit_operations': circuit_ops,
-                'n_bits': n_bits
-            }
+            quantum_state = self.session.quantum_state()
 
             response_data, success = self.send_data(receiver_ip, port, quantum_state)
             if not success:
@@ -124,30 +91,25 @@ class BB84Sender:
 
             if response_data and 'bob_bases' in response_data:
                 self.bob_bases = response_data['bob_bases']
-                self.bob_measurements = response_data['bob_measurements']
-
-                basis_comparison = {
-                    'sender_bases': sender_bases
-                }
 
-                gc.collect()
-                basis_start_time = time.perf_counter()
-                kept_indices = [i for i in range(len(self.sender_bits)) if self.sender_bases[i] == self.bob_bases[i]]
-                basis_end_time = time.perf_counter()
-                self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000  
-
-                if self.basis_comparison_time > 0:
-                    self.key_throughput = (len(kept_indices) / self.basis_comparison_time)  
+                basis_comparison = self.session.receive_measurements(response_data)
                 
                 basis_result, _ = self.send_data(receiver_ip, port, basis_comparison)
 
-                if basis_result and 'bob_measurements' in basis_result:
+                if basis_result and message_kind(basis_result) == SIFTED:
+                    gc.collect()
+                    basis_start_time = time.perf_counter()
+                    sifted = self.session.receive_basis_reply(basis_result)
+                    basis_end_time = time.perf_counter()
+                    self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000  
+
+                    if self.basis_comparison_time > 0:
+                        self.key_throughput = (sifted.n_sifted / self.basis_comparison_time)  
+
                     protocol_end_time = time.perf_counter()
                     self.total_protocol_time = (protocol_end_time - protocol_start_time) * 1_000_000
                     
-                    self.display_results(sender_bits, sender_bases,
-                                         basis_result['bob_bases'],
-                                         basis_result['bob_measurements'])
+                    self.display_results(sender_bits, sender_bases, self.bob_bases)
                     print("\nProtocol completed successfully. Exiting...")
                 else:
                     print("Invalid basis comparison result")
@@ -156,29 +118,25 @@ class BB84Sender:
         except ValueError as e:
             print(f"Error: {e}")
 
-    def display_results(self, sender_bits, sender_bases, bob_bases, bob_measurements):
-        kept_indices = [i for i, b in enumerate(sender_bases) if b == bob_bases[i]]
+    def display_results(self, sender_bits, sender_bases, bob_bases):
+        sifted = self.session.sifted
 
         print("\nBB84 Protocol Results")
         print("-" * 70)
-        print("Bit\tAlice's\tAlice's\tBob's\tBob's\tBit")
-        print("No.\tBit\tBasis\tBasis\tMeasure\tKept?")
+        print("Bit\tAlice's\tAlice's\tBob's\tBit")
+        print("No.\tBit\tBasis\tBasis\tKept?")
         print("-" * 70)
 
-        for i in range(len(sender_bits)):
-            kept = "Yes" if i in kept_indices else "No"
-            print(f"{i}\t{sender_bits[i]}\t{sender_bases[i]}\t"
-                  f"{bob_bases[i]}\t{bob_measurements[i]}\t{kept}")
+        print(preview_rows(sifted.mask, (sender_bits, sender_bases, bob_bases)), end='')
 
-        sender_key = [sender_bits[i] for i in kept_indices]
-        final_key = ''.join(str(bit) for bit in sender_key)
+        final_key = bits_to_string(self.session.key_bits)
         self.final_key = final_key
 
         print("-" * 70)
         print(f"\nFinal shared key: {final_key}")
         print(f"Total qubits: {len(sender_bits)}")
-        print(f"Matching Bases: {len(kept_indices)}")
-        print(f"Key Generation Rate: {(len(kept_indices) / len(sender_bits)) * 100:.2f}%")
+        print(f"Matching Bases: {sifted.n_sifted}")
+        print(f"Key Generation Rate: {sifted.match_rate * 100:.2f}%")
 
         print("\n======= SENDER BENCHMARKS =======")
         print(f"Bits & Basis Generation Time: {self.bits_basis_gen_time:.2f} microseconds")
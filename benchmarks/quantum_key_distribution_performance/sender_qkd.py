@@ -1,16 +1,20 @@
 import socket
-import json
-import random
 import time
 import sys
 import argparse
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile
-from qiskit_aer import AerSimulator
+from pathlib import Path
 import gc
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.bb84_simulation import array_to_bases
+from quantum.quantum_key_distribution.entropy_pool import QuantumEntropyPool
+from quantum.quantum_key_distribution.protocol import QUANTUM_STATE, SIFTED, SenderSession, message_kind
+from quantum.quantum_key_distribution.wire_format import recv_message, send_message
+
 class BB84Sender:
-    def __init__(self):
-        self.bob_measurements = None
+    def __init__(self, entropy_pool=None):
+        self.entropy_pool = entropy_pool or QuantumEntropyPool()
+        self.session = SenderSession(random_source=self.entropy_pool.take_bits)
         self.bob_bases = None
         self.sender_bits = None
         self.sender_bases = None
@@ -26,59 +30,41 @@ class BB84Sender:
     def generate_quantum_random_bits(self, num_bits):
         gc.collect()
         start_time = time.perf_counter()
-        
-        num_qubits_per_chunk = 16
-        total_key_length = num_bits
-        key_binary = ''
-
-        while len(key_binary) < total_key_length:
-            qc = QuantumCircuit(num_qubits_per_chunk)
-            for qubit in range(num_qubits_per_chunk):
-                qc.h(qubit)
-            qc.measure_all()
-
-            backend = AerSimulator()
-            compiled_circuit = transpile(qc, backend)
-            job = backend.run(compiled_circuit, shots=1)
-            result = job.result()
-            counts = result.get_counts()
-            random_chunk = list(counts.keys())[0][::-1]
-            key_binary += random_chunk
-
-        key_binary = key_binary[:total_key_length]
+
+        bits = self.entropy_pool.take_bits(num_bits).tolist()
+
         end_time = time.perf_counter()
         self.bits_basis_gen_time = (end_time - start_time) * 1_000_000  
-        return [int(bit) for bit in key_binary]
+        return bits
 
     def send_data(self, host, port, data):
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                if 'circuit_operations' in data:
+                is_quantum_state = message_kind(data) == QUANTUM_STATE
+                if is_quantum_state:
                     print(f"Connecting to receiver at {host}:{port}")
                 s.connect((host, port))
-                if 'circuit_operations' in data:
+                if is_quantum_state:
                     print(f"Connected to receiver")
 
                 gc.collect()
 
-                if 'circuit_operations' in data:
-
-                    data['is_quantum_state'] = True
+                if is_quantum_state:
                     tx_start_time = time.perf_counter()
-                    s.sendall(json.dumps(data).encode())
+                    send_message(s, data)
 
-                    ack = s.recv(1024).decode()
+                    ack = recv_message(s)
                     tx_end_time = time.perf_counter()
                     
-                    if json.loads(ack).get('received'):
+                    if ack.get('received'):
                         self.quantum_state_tx_time = (tx_end_time - tx_start_time) * 1_000_000  
 
-                    response = s.recv(16384).decode()
+                    response = recv_message(s)
                 else:
-                    s.sendall(json.dumps(data).encode())
-                    response = s.recv(16384).decode()
+                    send_message(s, data)
+                    response = recv_message(s)
                 
-                return json.loads(response), True
+                return response, True
         except Exception as e:
             print(f"Connection failed: {e}")
             return None, False
@@ -89,36 +75,16 @@ class BB84Sender:
             
             n_bits = self.n_qubits
             sender_bits = self.generate_quantum_random_bits(n_bits)
-            sender_bases = ['+' if b == 0 else 'x' for b in self.generate_quantum_random_bits(n_bits)]
+            sender_bases = array_to_bases(self.generate_quantum_random_bits(n_bits))
 
             self.sender_bits = sender_bits
             self.sender_bases = sender_bases
+            self.session.reset()
+            self.session.prepare(bits=sender_bits, bases=sender_bases)
 
             print("Starting quantum transmission...")
 
-            qr = QuantumRegister(n_bits, name='qr')
-            cr = ClassicalRegister(n_bits, name='cr')
-            qc = QuantumCircuit(qr, cr)
-
-            for i in range(n_bits):
-                if sender_bits[i] == 1:
-                    qc.x(qr[i])
-                if sender_bases[i] == 'x':
-                    qc.h(qr[i])
-
-            circuit_ops = []
-            for instruction in qc.data:
-                gate_name = instruction.operation.name
-                qubits = [qr.index(q) for q in instruction.qubits]
-                circuit_ops.append({
-                    'gate': gate_name,
-                    'qubits': qubits
-                })
-
-            quantum_state = {
-                'circuit_operations': circuit_ops,
-                'n_bits': n_bits
-            }
+            quantum_state = self.session.quantum_state()
 
             response_data, success = self.send_data(receiver_ip, port, quantum_state)
             if not success:
@@ -126,26 +92,23 @@ class BB84Sender:
 
             if response_data and 'bob_bases' in response_data:
                 self.bob_bases = response_data['bob_bases']
-                self.bob_measurements = response_data['bob_measurements']
-
-                basis_comparison = {
-                    'sender_bases': sender_bases
-                }
 
-                gc.collect()
-                basis_start_time = time.perf_counter()
-                kept_indices = [i for i in range(len(self.sender_bits)) if self.sender_bases[i] == self.bob_bases[i]]
-                basis_end_time = time.perf_counter()
-                self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000  
-
-                if self.basis_comparison_time > 0:
-                    self.key_throughput = (len(kept_indices) / self.basis_comparison_time)
+                basis_comparison = self.session.receive_measurements(response_data)
                 
                 basis_result, success = self.send_data(receiver_ip, port, basis_comparison)
                 if not success:
                     return False
 
-                if basis_result and 'bob_measurements' in basis_result:
+                if basis_result and message_kind(basis_result) == SIFTED:
+                    gc.collect()
+                    basis_start_time = time.perf_counter()
+                    sifted = self.session.receive_basis_reply(basis_result)
+                    basis_end_time = time.perf_counter()
+                    self.basis_comparison_time = (basis_end_time - basis_start_time) * 1_000_000
+
+                    if self.basis_comparison_time > 0:
+                        self.key_throughput = (sifted.n_sifted / self.basis_comparison_time)
+
                     protocol_end_time = time.perf_counter()
                     self.total_protocol_time = (protocol_end_time - protocol_start_time) * 1_000_000  
                     print("Protocol iteration completed successfully.")
@@ -181,10 +144,12 @@ def run_sender_benchmark(receiver_ip, port=12345, iterations=10):
     total_protocol_time = 0
 
     successful_iterations = 0
+
+    entropy_pool = QuantumEntropyPool()
     
     for i in range(iterations):
         print(f"\nIteration {i+1}/{iterations}")
-        sender = BB84Sender()
+        sender = BB84Sender(entropy_pool)
         success = sender.start_transmission(receiver_ip, port)
         
         if success:
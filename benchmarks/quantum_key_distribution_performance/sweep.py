@@ -0,0 +1,262 @@
+import argparse
+import csv
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.channel import DepolarizingChannel
+from quantum.quantum_key_distribution.parallel import DEFAULT_SHARD_SIZE, ShardedEngine
+from quantum.quantum_key_distribution.protocol import EavesdropperSession, ReceiverSession, SenderSession
+from quantum.quantum_key_distribution.wire_format import (
+    JSON_FORMAT, PACKED_FORMAT, decode_message, encode_message)
+
+DEFAULT_QUBITS = [100, 1000, 10_000, 100_000, 1_000_000, 10_000_000]
+# Aer builds one circuit per 16 qubits; larger runs take minutes per repeat
+DEFAULT_AER_MAX_QUBITS = 10_000
+# Size of the untimed session that loads lazily imported backends before measuring
+WARMUP_QUBITS = 64
+
+FIELDS = [
+    'n_qubits', 'noise', 'eve_rate', 'backend', 'wire_format', 'workers', 'repeats',
+    'n_sifted', 'qber', 'qber_estimate', 'abort',
+    'throughput_sifted_bits_per_s', 'latency_mean_ms', 'latency_p50_ms', 'latency_p95_ms',
+    'latency_p99_ms', 'peak_memory_mb',
+]
+
+
+def _wire(message, serialize):
+    """Hand a message to the peer the way the socket layer would, minus the socket."""
+    if serialize or isinstance(message, (bytes, bytearray, memoryview)):
+        return decode_message(encode_message(message))
+    return message
+
+
+def run_session(n_qubits, noise, eve_rate, backend, wire_format, rng, serialize=True, engine=None):
+    """One complete BB84 exchange in-process, including the QBER sample.
+
+    Returns the (sender, receiver, eavesdropper) sessions; eavesdropper is
+    None without an intercept rate.
+    """
+    channel = [DepolarizingChannel(noise)] if noise else []
+    sender = SenderSession(rng=rng, engine=engine)
+    receiver = ReceiverSession(backend=backend, rng=rng, channel=channel, engine=engine)
+    sender.prepare(n_qubits)
+
+    state = _wire(sender.quantum_state(wire_format), serialize)
+    eve = None
+    if eve_rate:
+        eve = EavesdropperSession(backend=backend, rng=rng, rate=eve_rate)
+        eve.accept_quantum_state(state)
+        state = _wire(eve.intercept(), serialize)
+    receiver.accept_quantum_state(state)
+    reply = _wire(receiver.measure(), serialize)
+    comparison = _wire(sender.receive_measurements(reply), serialize)
+    sender.receive_basis_reply(_wire(receiver.receive_basis_comparison(comparison), serialize))
+    sample = _wire(sender.qber_sample(), serialize)
+    sender.receive_qber_reply(_wire(receiver.receive_qber_sample(sample), serialize))
+    return sender, receiver, eve
+
+
+def _child_peak(conn, fn, args, warmup_args):
+    if warmup_args is not None:
+        fn(*warmup_args)
+    start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn(*args)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    conn.send((peak - start) * (1 if sys.platform == 'darwin' else 1024))
+
+
+def peak_memory(fn, args, warmup_args=None):
+    """Bytes of memory fn(*args) needs at its peak, measured in one extra, untimed run.
+
+    fn(*warmup_args) runs first so lazy imports (Qiskit for the Aer backend)
+    are not counted.
+
+    Where possible the run happens in a child of a forkserver and the growth
+    of its peak RSS is reported, which sees NumPy buffers and Python objects
+    alike at full speed. Forking this process would reuse its free heap and
+    under-report, and a spawned child inherits its peak RSS across exec.
+    Elsewhere tracemalloc is used, which can slow message-heavy runs down by
+    an order of magnitude.
+    """
+    gc.collect()
+    if resource is not None and 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(target=_child_peak, args=(sender, fn, args, warmup_args))
+        child.start()
+        sender.close()
+        try:
+            return receiver.recv()
+        except EOFError:
+            return None
+        finally:
+            child.join()
+    if warmup_args is not None:
+        fn(*warmup_args)
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_point(n_qubits, noise, eve_rate, backend, wire_format, repeats, rng, serialize=True,
+                  engine=None):
+    run_session(WARMUP_QUBITS, noise, eve_rate, backend, wire_format, rng, serialize)
+    latencies = np.empty(repeats)
+    n_sifted = n_errors = 0
+    estimates = []
+    for i in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        session, receiver, _ = run_session(n_qubits, noise, eve_rate, backend, wire_format, rng, serialize,
+                                           engine)
+        latencies[i] = time.perf_counter() - start
+        # Neither party sees both keys; the in-process run can count the true errors
+        n_sifted += session.sifted.n_sifted
+        n_errors += np.count_nonzero(session.sifted.key_bits != receiver.sifted.key_bits)
+        estimates.append(session.qber_estimate)
+
+    child_rng = np.random.default_rng(rng.integers(2**63))
+    peak = peak_memory(run_session, (n_qubits, noise, eve_rate, backend, wire_format, child_rng, serialize),
+                       (WARMUP_QUBITS, noise, eve_rate, backend, wire_format, child_rng, serialize))
+    if peak is None:
+        peak = 0
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    return {
+        'n_qubits': n_qubits,
+        'noise': noise,
+        'eve_rate': eve_rate,
+        'backend': backend,
+        'wire_format': wire_format,
+        'repeats': repeats,
+        'n_sifted': n_sifted / repeats,
+        'qber': n_errors / n_sifted if n_sifted else 0.0,
+        'qber_estimate': float(np.mean([e.qber for e in estimates])),
+        'abort': sum(e.abort for e in estimates) / repeats,
+        'throughput_sifted_bits_per_s': n_sifted / latencies.sum(),
+        'latency_mean_ms': float(latencies.mean() * 1000),
+        'latency_p50_ms': float(p50),
+        'latency_p95_ms': float(p95),
+        'latency_p99_ms': float(p99),
+        'peak_memory_mb': peak / 2**20,
+    }
+
+
+def run_sweep(qubits, noises, eve_rates, backends, wire_format=PACKED_FORMAT, repeats=5, seed=None,
+              aer_max_qubits=DEFAULT_AER_MAX_QUBITS, serialize=True, progress=print,
+              workers=1, shard_size=DEFAULT_SHARD_SIZE):
+    """Measure every combination of the parameters.
+
+    Bits, bases and measurements are generated shard by shard, so for a
+    given seed and shard size the results do not depend on `workers`.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    engine = ShardedEngine(workers, shard_size)
+    try:
+        for backend, n_qubits, noise, eve_rate in itertools.product(backends, qubits, noises, eve_rates):
+            if backend == 'aer' and n_qubits > aer_max_qubits:
+                continue
+            row = measure_point(n_qubits, noise, eve_rate, backend, wire_format, repeats, rng, serialize,
+                                engine)
+            row['workers'] = engine.workers
+            results.append(row)
+            if progress:
+                progress(f"{backend:>5} n={n_qubits:<9} noise={noise:<5} eve={eve_rate:<5} "
+                         f"QBER {row['qber']*100:6.2f}%  {row['throughput_sifted_bits_per_s']/1e6:8.3f} Mbit/s  "
+                         f"p50 {row['latency_p50_ms']:9.2f} ms  peak {row['peak_memory_mb']:8.1f} MB")
+    finally:
+        engine.close()
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def write_results(path, results, config):
+    """CSV gets one row per sweep point; anything else is written as JSON with the run metadata."""
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with path.open('w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with path.open('w') as f:
+            json.dump({'environment': environment(), 'config': config, 'results': results}, f, indent=2)
+
+
+def _numbers(text, kind=float):
+    return [kind(float(value)) for value in text.split(',') if value]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='In-process BB84 parameter sweep (no networking)')
+    parser.add_argument('--qubits', default=','.join(map(str, DEFAULT_QUBITS)),
+                        help='Comma-separated qubit counts (default: 1e2 to 1e7)')
+    parser.add_argument('--noise', default='0,0.02',
+                        help='Comma-separated depolarizing probabilities (default: 0,0.02)')
+    parser.add_argument('--eve-rate', default='0,0.5',
+                        help='Comma-separated intercept-resend rates (default: 0,0.5)')
+    parser.add_argument('--backend', default='numpy,aer', help='Comma-separated backends (default: numpy,aer)')
+    parser.add_argument('--aer-max-qubits', type=int, default=DEFAULT_AER_MAX_QUBITS,
+                        help=f'Skip Aer points above this many qubits (default: {DEFAULT_AER_MAX_QUBITS})')
+    parser.add_argument('--wire-format', choices=[PACKED_FORMAT, JSON_FORMAT], default=PACKED_FORMAT,
+                        help=f'Quantum state encoding (default: {PACKED_FORMAT})')
+    parser.add_argument('--in-memory', action='store_true',
+                        help='Pass classical messages as dicts instead of encoding them for the wire')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for sharded bit generation and measurement; 0 = all cores (default: 1)')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'Qubits per shard (default: {DEFAULT_SHARD_SIZE})')
+    parser.add_argument('--repeats', type=int, default=5, help='Sessions per sweep point (default: 5)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for bits, bases and channel noise')
+    parser.add_argument('--output', default='qkd_sweep.json',
+                        help='Results file; .csv for CSV, JSON otherwise (default: qkd_sweep.json)')
+    args = parser.parse_args()
+
+    config = {
+        'qubits': _numbers(args.qubits, int),
+        'noise': _numbers(args.noise),
+        'eve_rate': _numbers(args.eve_rate),
+        'backend': [b for b in args.backend.split(',') if b],
+        'wire_format': args.wire_format,
+        'serialize': not args.in_memory,
+        'workers': args.workers,
+        'shard_size': args.shard_size,
+        'repeats': args.repeats,
+        'seed': args.seed,
+        'aer_max_qubits': args.aer_max_qubits,
+    }
+    results = run_sweep(config['qubits'], config['noise'], config['eve_rate'], config['backend'],
+                        args.wire_format, args.repeats, args.seed, args.aer_max_qubits,
+                        config['serialize'], workers=args.workers, shard_size=args.shard_size)
+    write_results(args.output, results, config)
+    print(f"\nWrote {len(results)} sweep points to {args.output}")
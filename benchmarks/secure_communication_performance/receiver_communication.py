@@ -13,7 +13,14 @@ import time
 from datetime import datetime
 import pandas as pd
 from argon2.low_level import hash_secret_raw, Type
-from kyber_wrapper768 import generate_keypair, decapsulate
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(768)
+
 
 class QuantumSecureReceiver:
     def __init__(self):
@@ -253,7 +260,7 @@ class QuantumSecureReceiver:
             return True
         try:
             start_time = time.perf_counter()
-            public_key, secret_key = generate_keypair()
+            public_key, secret_key = KEM.keypair()
             public_key_b64 = base64.b64encode(public_key).decode('utf-8')
             msg = "KYBER_EPHEMERAL:" + public_key_b64 + "\n"
             self.client_socket.sendall(msg.encode('utf-8'))
@@ -266,7 +273,7 @@ class QuantumSecureReceiver:
             
             ciphertext_b64 = ciphertext_msg[len("KYBER_CIPHERTEXT:"):]
             ciphertext = base64.b64decode(ciphertext_b64)
-            shared_secret = decapsulate(ciphertext, secret_key)
+            shared_secret = KEM.decaps(ciphertext, secret_key)
 
             self.symmetric_key = hash_secret_raw(
                 secret=shared_secret,                
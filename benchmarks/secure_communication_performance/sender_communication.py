@@ -13,7 +13,14 @@ import time
 from datetime import datetime
 import pandas as pd
 from argon2.low_level import hash_secret_raw, Type
-from kyber_wrapper768 import encapsulate
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(768)
+
 
 class QuantumSecureSender:
     def __init__(self):
@@ -267,7 +274,7 @@ class QuantumSecureSender:
             
             public_key_b64 = msg[len("KYBER_EPHEMERAL:"):]
             public_key = base64.b64decode(public_key_b64)
-            ciphertext, shared_secret = encapsulate(public_key)
+            ciphertext, shared_secret = KEM.encaps(public_key)
             ciphertext_b64 = base64.b64encode(ciphertext).decode('utf-8')
             response_msg = "KYBER_CIPHERTEXT:" + ciphertext_b64 + "\n"
             self.socket.sendall(response_msg.encode('utf-8'))
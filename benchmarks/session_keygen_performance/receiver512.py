@@ -9,9 +9,15 @@ from Crypto.Cipher import AES
 import hashlib
 import hmac
 from argon2.low_level import hash_secret_raw, Type
-from kyber_wrapper512 import generate_keypair, decapsulate
+from pathlib import Path
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(512)
+
+
 class QuantumSecureReceiver:
     def __init__(self, port=5000, iterations=100):
         self.hybrid_key = "a7e3f8c2d15b94e6d0c7a5b9e8f1c2d3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9a0b1c2d3e4f5a6b7c8d9a0b1c2d3e4f5"
@@ -194,7 +200,7 @@ class QuantumSecureReceiver:
         try:
             self.key_exchange_start_time = time.perf_counter()
 
-            public_key, secret_key = generate_keypair()
+            public_key, secret_key = KEM.keypair()
             public_key_b64 = base64.b64encode(public_key).decode('utf-8')
 
             msg = "KYBER_EPHEMERAL:" + public_key_b64 + "\n"
@@ -208,7 +214,7 @@ class QuantumSecureReceiver:
             ciphertext_b64 = ciphertext_msg[len("KYBER_CIPHERTEXT:"):]
             ciphertext = base64.b64decode(ciphertext_b64)
 
-            shared_secret = decapsulate(ciphertext, secret_key)
+            shared_secret = KEM.decaps(ciphertext, secret_key)
             
             self.key_exchange_end_time = time.perf_counter()
 
@@ -9,7 +9,13 @@ from Crypto.Cipher import AES
 import hashlib
 import hmac
 from argon2.low_level import hash_secret_raw, Type
-from kyber_wrapper768 import generate_keypair, decapsulate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(768)
+
 
 class QuantumSecureReceiver:
     def __init__(self, port=5000):
@@ -166,7 +172,7 @@ class QuantumSecureReceiver:
             self.log("Starting ephemeral key exchange using Kyber768...")
             self.key_exchange_start_time = time.perf_counter()
 
-            public_key, secret_key = generate_keypair()
+            public_key, secret_key = KEM.keypair()
             public_key_b64 = base64.b64encode(public_key).decode('utf-8')
 
             msg = "KYBER_EPHEMERAL:" + public_key_b64 + "\n"
@@ -181,7 +187,7 @@ class QuantumSecureReceiver:
             ciphertext_b64 = ciphertext_msg[len("KYBER_CIPHERTEXT:"):]
             ciphertext = base64.b64decode(ciphertext_b64)
 
-            shared_secret = decapsulate(ciphertext, secret_key)
+            shared_secret = KEM.decaps(ciphertext, secret_key)
             
             self.key_exchange_end_time = time.perf_counter()
             key_exchange_duration = (self.key_exchange_end_time - self.key_exchange_start_time) * 1000000
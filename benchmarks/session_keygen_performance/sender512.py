@@ -8,9 +8,15 @@ from Crypto.Cipher import AES
 import hashlib
 import hmac
 from argon2.low_level import hash_secret_raw, Type
-from kyber_wrapper512 import encapsulate
+from pathlib import Path
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(512)
+
+
 class QuantumSecureSender:
     def __init__(self, receiver_ip, port=5000, iterations=100):
         self.hybrid_key = "a7e3f8c2d15b94e6d0c7a5b9e8f1c2d3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9a0b1c2d3e4f5a6b7c8d9a0b1c2d3e4f5"
@@ -186,7 +192,7 @@ class QuantumSecureSender:
             public_key_b64 = msg[len("KYBER_EPHEMERAL:"):]
             public_key = base64.b64decode(public_key_b64)
 
-            ciphertext, shared_secret = encapsulate(public_key)
+            ciphertext, shared_secret = KEM.encaps(public_key)
             ciphertext_b64 = base64.b64encode(ciphertext).decode('utf-8')
 
             response_msg = "KYBER_CIPHERTEXT:" + ciphertext_b64 + "\n"
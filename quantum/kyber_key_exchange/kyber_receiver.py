@@ -5,12 +5,19 @@ import json
 import hashlib
 import threading
 from queue import Queue
-from kyber_wrapper1024 import generate_keypair, decapsulate
+import sys
+from pathlib import Path
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(1024)
+
+
 def derive_aes_key(psk):
     return hashlib.sha256(psk.encode()).digest()
 
@@ -291,7 +298,7 @@ class BB84ReceiverGUI:
 
     def generate_kyber_keys(self):
         try:
-            self.public_key, self.private_key = generate_keypair()
+            self.public_key, self.private_key = KEM.keypair()
             self.public_key_text.delete(0, tk.END)
             self.public_key_text.insert(0, self.public_key.hex())
             self.private_key_text.delete(0, tk.END)
@@ -312,7 +319,7 @@ class BB84ReceiverGUI:
                 return
 
             encapsulated_key_bytes = bytes.fromhex(encapsulated_key)
-            self.shared_secret = decapsulate(encapsulated_key_bytes, self.private_key)
+            self.shared_secret = KEM.decaps(encapsulated_key_bytes, self.private_key)
             
             self.shared_secret_text.delete(0, tk.END)
             self.shared_secret_text.insert(0, self.shared_secret.hex())
@@ -6,12 +6,19 @@ import random
 import hashlib
 import threading
 from queue import Queue
-from kyber_wrapper1024 import generate_keypair, encapsulate
+import sys
+from pathlib import Path
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(1024)
+
+
 def derive_aes_key(psk):
     return hashlib.sha256(psk.encode()).digest()
 
@@ -308,7 +315,7 @@ class BB84SenderGUI:
 
             self.receiver_public_key = bytes.fromhex(public_key_hex)
 
-            self.encapsulated_key, self.shared_secret = encapsulate(self.receiver_public_key)
+            self.encapsulated_key, self.shared_secret = KEM.encaps(self.receiver_public_key)
 
             self.encapsulated_key_text.delete(0, tk.END)
             self.encapsulated_key_text.insert(0, self.encapsulated_key.hex())
@@ -0,0 +1,86 @@
+#include <stddef.h>
+#include "batch.h"
+#include "kem.h"
+#include "params.h"
+
+/*************************************************
+* Name:        crypto_kem_keypair_batch
+*
+* Description: Generates n key pairs into contiguous arrays,
+*              key pair i at pks + i*KYBER_PUBLICKEYBYTES and
+*              sks + i*KYBER_SECRETKEYBYTES
+*
+* Arguments:   - unsigned char *pks: pointer to output public keys
+*                (an already allocated array of n*KYBER_PUBLICKEYBYTES bytes)
+*              - unsigned char *sks: pointer to output private keys
+*                (an already allocated array of n*KYBER_SECRETKEYBYTES bytes)
+*              - size_t n: number of key pairs
+*
+* Returns 0 (success) or 1 + the index of the first failing key pair
+**************************************************/
+int crypto_kem_keypair_batch(unsigned char *pks,
+                             unsigned char *sks,
+                             size_t n)
+{
+  size_t i;
+  for(i=0;i<n;i++)
+    if(crypto_kem_keypair(pks+i*KYBER_PUBLICKEYBYTES, sks+i*KYBER_SECRETKEYBYTES))
+      return (int)(i+1);
+  return 0;
+}
+
+/*************************************************
+* Name:        crypto_kem_enc_batch
+*
+* Description: Encapsulates to n public keys, one cipher text
+*              and shared secret per key, all in contiguous arrays
+*
+* Arguments:   - unsigned char *cts: pointer to output cipher texts
+*                (an already allocated array of n*KYBER_CIPHERTEXTBYTES bytes)
+*              - unsigned char *ss: pointer to output shared secrets
+*                (an already allocated array of n*KYBER_SSBYTES bytes)
+*              - const unsigned char *pks: pointer to input public keys
+*                (an array of n*KYBER_PUBLICKEYBYTES bytes)
+*              - size_t n: number of public keys
+*
+* Returns 0 (success) or 1 + the index of the first failing public key
+**************************************************/
+int crypto_kem_enc_batch(unsigned char *cts,
+                         unsigned char *ss,
+                         const unsigned char *pks,
+                         size_t n)
+{
+  size_t i;
+  for(i=0;i<n;i++)
+    if(crypto_kem_enc(cts+i*KYBER_CIPHERTEXTBYTES, ss+i*KYBER_SSBYTES, pks+i*KYBER_PUBLICKEYBYTES))
+      return (int)(i+1);
+  return 0;
+}
+
+/*************************************************
+* Name:        crypto_kem_dec_batch
+*
+* Description: Decapsulates n cipher texts made for the same
+*              private key into contiguous shared secrets
+*
+* Arguments:   - unsigned char *ss: pointer to output shared secrets
+*                (an already allocated array of n*KYBER_SSBYTES bytes)
+*              - const unsigned char *cts: pointer to input cipher texts
+*                (an array of n*KYBER_CIPHERTEXTBYTES bytes)
+*              - const unsigned char *sk: pointer to input private key
+*                (an array of KYBER_SECRETKEYBYTES bytes)
+*              - size_t n: number of cipher texts
+*
+* Returns 0 (success) or 1 + the index of the first failing cipher text
+**************************************************/
+int crypto_kem_dec_batch(unsigned char *ss,
+                         const unsigned char *cts,
+                         const unsigned char *sk,
+                         size_t n)
+{
+  size_t i;
+  for(i=0;i<n;i++)
+    if(crypto_kem_dec(ss+i*KYBER_SSBYTES, cts+i*KYBER_CIPHERTEXTBYTES, sk))
+      return (int)(i+1);
+  return 0;
+}
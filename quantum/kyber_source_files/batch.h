@@ -0,0 +1,25 @@
+#ifndef BATCH_H
+#define BATCH_H
+
+#include <stddef.h>
+#include "export.h"
+#include "params.h"
+
+#define crypto_kem_keypair_batch KYBER_NAMESPACE(_keypair_batch)
+KYBER_EXPORT int crypto_kem_keypair_batch(unsigned char *pks,
+                                          unsigned char *sks,
+                                          size_t n);
+
+#define crypto_kem_enc_batch KYBER_NAMESPACE(_enc_batch)
+KYBER_EXPORT int crypto_kem_enc_batch(unsigned char *cts,
+                                      unsigned char *ss,
+                                      const unsigned char *pks,
+                                      size_t n);
+
+#define crypto_kem_dec_batch KYBER_NAMESPACE(_dec_batch)
+KYBER_EXPORT int crypto_kem_dec_batch(unsigned char *ss,
+                                      const unsigned char *cts,
+                                      const unsigned char *sk,
+                                      size_t n);
+
+#endif
@@ -0,0 +1,36 @@
+#include "cpu.h"
+
+/*************************************************
+* Name:        cpu_supports_build
+*
+* Description: Checks with CPUID that this CPU, and the OS through
+*              XSAVE, support every instruction set this library was
+*              compiled for (see quantum/pqc/build.py). The function
+*              itself is compiled for baseline x86-64, so it is safe
+*              to call from any build on any x86-64 CPU.
+*
+* Returns 1 if this library can run here, 0 otherwise
+**************************************************/
+#if (defined(__GNUC__) || defined(__clang__)) && defined(__x86_64__)
+__attribute__((target("arch=x86-64")))
+#endif
+int cpu_supports_build(void)
+{
+#if defined(__AVX2__)
+#if (defined(__GNUC__) || defined(__clang__)) && defined(__x86_64__)
+  __builtin_cpu_init();
+  /* The x86-64-v3 microarchitecture level, which includes x86-64-v2 */
+  return __builtin_cpu_supports("ssse3") && __builtin_cpu_supports("sse4.1")
+      && __builtin_cpu_supports("sse4.2") && __builtin_cpu_supports("popcnt")
+      && __builtin_cpu_supports("avx") && __builtin_cpu_supports("avx2")
+      && __builtin_cpu_supports("bmi") && __builtin_cpu_supports("bmi2")
+      && __builtin_cpu_supports("fma") && __builtin_cpu_supports("f16c")
+      && __builtin_cpu_supports("lzcnt") && __builtin_cpu_supports("movbe");
+#else
+  return 0;
+#endif
+#else
+  /* Portable builds run wherever they load */
+  return 1;
+#endif
+}
@@ -0,0 +1,10 @@
+#ifndef CPU_H
+#define CPU_H
+
+#include "export.h"
+#include "params.h"
+
+#define cpu_supports_build KYBER_NAMESPACE(_cpu_supports_build)
+KYBER_EXPORT int cpu_supports_build(void);
+
+#endif
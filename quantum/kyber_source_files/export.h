@@ -0,0 +1,11 @@
+#ifndef EXPORT_H
+#define EXPORT_H
+
+/* The Windows DLLs export only what is marked, see kyber*_dll.c */
+#ifdef _WIN32
+#define KYBER_EXPORT __declspec(dllexport)
+#else
+#define KYBER_EXPORT
+#endif
+
+#endif
@@ -1,9 +1,16 @@
-from kyber_wrapper512 import generate_keypair, encapsulate, decapsulate
+import sys
+from pathlib import Path
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import os
 import binascii
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(512)
+
+
 def encrypt_message(shared_secret, message):
     key = shared_secret[:16]  # Use first 16 bytes as AES key
     iv = os.urandom(16)  # Generate a random IV
@@ -21,7 +28,7 @@ def decrypt_message(shared_secret, encrypted_message):
 def main():
     try:
         # Generate keypair using Kyber 512
-        public_key, secret_key = generate_keypair()
+        public_key, secret_key = KEM.keypair()
         print("\n")
         print("-------Generated keypair using Kyber 512-------")
         print(f"Public key length: {len(public_key)} bytes")
@@ -32,7 +39,7 @@ def main():
         print(f"Secret Key (hex): {binascii.hexlify(secret_key).decode()}")
 
         # Perform encapsulation using Kyber 512
-        ciphertext, shared_secret_1 = encapsulate(public_key)
+        ciphertext, shared_secret_1 = KEM.encaps(public_key)
         print("\n")
         print("\nPerformed encapsulation")
         print(f"Ciphertext length: {len(ciphertext)} bytes")
@@ -43,7 +50,7 @@ def main():
         print("\n")
 
         # Perform decapsulation using Kyber 512
-        shared_secret_2 = decapsulate(ciphertext, secret_key)
+        shared_secret_2 = KEM.decaps(ciphertext, secret_key)
         print("\nPerformed decapsulation")
         print("Shared secrets match:", shared_secret_1 == shared_secret_2)
         print("\n")
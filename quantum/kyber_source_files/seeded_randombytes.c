@@ -0,0 +1,40 @@
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+#include "fips202.h"
+#include "randombytes.h"
+#include "seeded_randombytes.h"
+
+/*
+ * Deterministic replacement for randombytes.c, linked only into the
+ * cross-check builds of quantum/pqc/crosscheck.py: never ship it.
+ * Call i returns SHAKE256(seed || i) with i as 8 little-endian bytes.
+ */
+
+static uint8_t seed_state[32];
+static uint64_t seed_counter;
+
+/*************************************************
+* Name:        randombytes_seed
+*
+* Description: Restarts the deterministic randombytes stream
+*
+* Arguments:   - const uint8_t *seed: pointer to input seed of 32 bytes
+**************************************************/
+void randombytes_seed(const uint8_t seed[32])
+{
+  memcpy(seed_state, seed, 32);
+  seed_counter = 0;
+}
+
+void randombytes(uint8_t *out, size_t outlen)
+{
+  unsigned int i;
+  uint8_t in[40];
+
+  memcpy(in, seed_state, 32);
+  for(i=0;i<8;i++)
+    in[32+i] = (uint8_t)(seed_counter >> 8*i);
+  seed_counter++;
+  shake256(out, outlen, in, sizeof(in));
+}
@@ -0,0 +1,11 @@
+#ifndef SEEDED_RANDOMBYTES_H
+#define SEEDED_RANDOMBYTES_H
+
+#include <stdint.h>
+#include "export.h"
+#include "params.h"
+
+#define randombytes_seed KYBER_NAMESPACE(_randombytes_seed)
+KYBER_EXPORT void randombytes_seed(const uint8_t seed[32]);
+
+#endif
@@ -0,0 +1,98 @@
+import ctypes
+import threading
+
+
+def input_buffer(data, size, name):
+    """Argument for a read-only C input of exactly `size` bytes, without copying where possible.
+
+    bytes go to C as a pointer to their own storage and writable buffers
+    (bytearray, NumPy arrays, memoryviews of them) are wrapped in place;
+    only other read-only buffers are copied once.
+    """
+    if isinstance(data, bytes):
+        if len(data) != size:
+            raise ValueError(f"{name} must be {size} bytes, got {len(data)}")
+        return data
+    view = memoryview(data).cast('B')
+    if view.nbytes != size:
+        raise ValueError(f"{name} must be {size} bytes, got {view.nbytes}")
+    if view.readonly:
+        return view.tobytes()
+    return (ctypes.c_ubyte * size).from_buffer(view)
+
+
+def batch_input(items, size, name):
+    """(C argument, count) for a batch of `size`-byte inputs.
+
+    The batch is either a sequence of buffers, joined into one bytes object,
+    or one contiguous buffer holding the items back to back.
+    """
+    if isinstance(items, (list, tuple)):
+        for index, item in enumerate(items):
+            nbytes = memoryview(item).nbytes
+            if nbytes != size:
+                raise ValueError(f"{name}[{index}] must be {size} bytes, got {nbytes}")
+        return b''.join(items), len(items)
+    view = memoryview(items).cast('B')
+    if view.nbytes % size:
+        raise ValueError(f"{name} must be a multiple of {size} bytes, got {view.nbytes}")
+    return input_buffer(view, view.nbytes, name), view.nbytes // size
+
+
+def batch_part(argument, size, start, stop):
+    """Items start:stop of a C batch argument from input_buffer/output_buffer, without copying writable ones."""
+    view = memoryview(argument).cast('B')[start * size:stop * size]
+    if view.readonly:
+        return view.tobytes()
+    return (ctypes.c_ubyte * view.nbytes).from_buffer(view)
+
+
+def output_buffer(buffer, size, name):
+    """Writable view of the first `size` bytes of a caller-provided buffer, for C to write into."""
+    view = memoryview(buffer).cast('B')
+    if view.readonly:
+        raise ValueError(f"{name} buffer must be writable")
+    if view.nbytes < size:
+        raise ValueError(f"{name} buffer must hold {size} bytes, got {view.nbytes}")
+    return (ctypes.c_ubyte * size).from_buffer(view)
+
+
+class ScratchBuffers(threading.local):
+    """Per-thread output buffers reused across calls, created on first use.
+
+        scratch = ScratchBuffers(public_key=800, secret_key=1632)
+        scratch.public_key  # ctypes char array of 800 bytes
+    """
+
+    def __init__(self, **sizes):
+        self.sizes = sizes
+
+    def __getattr__(self, name):
+        if name not in self.sizes:
+            raise AttributeError(name)
+        buffer = ctypes.create_string_buffer(self.sizes[name])
+        setattr(self, name, buffer)
+        return buffer
+
+
+def wipe(buffer):
+    """Zero a writable buffer (bytearray, ctypes array, ...) in place."""
+    view = memoryview(buffer).cast('B')
+    ctypes.memset((ctypes.c_ubyte * view.nbytes).from_buffer(view), 0, view.nbytes)
+
+
+def take(buffer, secret=False):
+    """Copy a scratch buffer out as bytes, wiping it afterwards when it held a secret."""
+    data = buffer.raw
+    if secret:
+        wipe(buffer)
+    return data
+
+
+def split(buffer, size, secret=False):
+    """Copy a contiguous scratch buffer out as a list of `size`-byte items, wiping it afterwards when it held secrets."""
+    data = buffer.raw
+    items = [data[start:start + size] for start in range(0, len(data), size)]
+    if secret:
+        wipe(buffer)
+    return items
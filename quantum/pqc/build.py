@@ -0,0 +1,106 @@
+import argparse
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.loader import LEVELS, SOURCE_DIR, VARIANTS, check_variant, default_library_dir, library_name
+
+SOURCES = ['kem.c', 'batch.c', 'cpu.c', 'indcpa.c', 'polyvec.c', 'poly.c', 'ntt.c', 'cbd.c', 'reduce.c',
+           'verify.c', 'fips202.c', 'symmetric-shake.c', 'randombytes.c']
+# Cross-check builds draw their randomness from a seeded SHAKE256 stream instead
+SEEDED_RANDOMBYTES = 'seeded_randombytes.c'
+
+# Same flags as the kyber*_gcc_command.txt DLL builds
+REFERENCE_FLAGS = ['-Wall', '-Wextra', '-Wpedantic', '-O3', '-fomit-frame-pointer']
+# Portable across hosts: no -march=native and no AVX2, which the reference C code does not use anyway
+OPTIMIZED_FLAGS = REFERENCE_FLAGS + ['-funroll-loops', '-flto']
+X86_64_OPTIMIZED_FLAGS = ['-march=x86-64-v2', '-mtune=generic']
+# The x86_64_v3 variant: the reference C code, auto-vectorized by the compiler for that
+# microarchitecture level. It is not the hand-written pq-crystals avx2 implementation. Keep
+# in step with cpu.c, which tells the loader whether this CPU can run it.
+X86_64_V3_FLAGS = OPTIMIZED_FLAGS + ['-march=x86-64-v3', '-mtune=haswell']
+
+
+def is_x86_64():
+    return platform.machine().lower() in ('x86_64', 'amd64')
+
+
+def default_variants():
+    """ref everywhere, plus x86_64_v3 on x86-64; the loader only picks it on CPUs that support it."""
+    return ['ref', 'x86_64_v3'] if is_x86_64() else ['ref']
+
+
+def compile_flags(optimized=False, variant='ref'):
+    if check_variant(variant) == 'x86_64_v3':
+        if not is_x86_64():
+            raise ValueError(f"The x86_64_v3 variant needs an x86-64 target, not {platform.machine()}")
+        return list(X86_64_V3_FLAGS)
+    if not optimized:
+        return list(REFERENCE_FLAGS)
+    flags = list(OPTIMIZED_FLAGS)
+    if is_x86_64():
+        flags += X86_64_OPTIMIZED_FLAGS
+    return flags
+
+
+def build_command(level, output, optimized=False, compiler=None, variant='ref', seeded=False):
+    """Compiler invocation producing the shared library for one Kyber level."""
+    command = [compiler or os.environ.get('CC', 'gcc')] + compile_flags(optimized, variant)
+    command.append(f"-DKYBER_K={LEVELS[level]}")
+    sources = [SEEDED_RANDOMBYTES if seeded and source == 'randombytes.c' else source for source in SOURCES]
+    command += [str(SOURCE_DIR / source) for source in sources]
+    if sys.platform.startswith('win'):
+        # The DLL shim re-exports the KEM functions under their reference names
+        command.append(str(default_library_dir(level) / f"kyber{level}_dll.c"))
+        command += ['-shared', '-Wl,--allow-multiple-definition']
+    elif sys.platform == 'darwin':
+        command += ['-fPIC', '-dynamiclib']
+    else:
+        command += ['-fPIC', '-shared']
+    return command + ['-o', str(output)]
+
+
+def build_library(level, optimized=False, output_dir=None, compiler=None, variant='ref', seeded=False):
+    """Compile libkyber<level>[_<variant>] for this platform; returns its path.
+
+    seeded=True links the deterministic randombytes of the cross-check,
+    which must never be loaded by applications: give it its own output_dir.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unsupported Kyber level {level}; expected one of {sorted(LEVELS)}")
+    if seeded and output_dir is None:
+        raise ValueError("Seeded cross-check builds need their own output directory")
+    output_dir = Path(output_dir) if output_dir else default_library_dir(level)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output = output_dir / library_name(level, variant=variant)
+    command = build_command(level, output, optimized, compiler, variant, seeded)
+    if shutil.which(command[0]) is None:
+        raise RuntimeError(f"C compiler not found: {command[0]}")
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Building {output.name} failed:\n{' '.join(command)}\n{result.stderr}")
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the bundled Kyber reference code as shared libraries')
+    parser.add_argument('--levels', type=int, nargs='+', choices=sorted(LEVELS), default=sorted(LEVELS),
+                        help='Kyber variants to build (default: all)')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=None,
+                        help='Builds to produce: ref (portable) and x86_64_v3, chosen at load time on '
+                             'CPUs that support it (default: ref, plus x86_64_v3 on x86-64)')
+    parser.add_argument('--optimized', action='store_true',
+                        help='Build ref with loop unrolling, LTO and a portable x86-64-v2 target (no AVX2)')
+    parser.add_argument('--output-dir', default=None,
+                        help='Directory for the libraries (default: kyber_source_files/kyber<level>); '
+                             'point KYBER_LIB_DIR at it to load them from there')
+    parser.add_argument('--cc', default=None, help='C compiler (default: $CC or gcc)')
+    args = parser.parse_args()
+
+    for level in args.levels:
+        for variant in args.variants or default_variants():
+            print(f"Built {build_library(level, args.optimized, args.output_dir, args.cc, variant)}")
@@ -0,0 +1,99 @@
+import argparse
+import ctypes
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.build import build_library, default_variants
+from quantum.pqc.kem import Kyber
+from quantum.pqc.loader import LEVELS, VARIANTS, declare_prototypes, open_library, runs_on_this_cpu, symbol_prefix
+
+DEFAULT_COUNT = 100
+DEFAULT_SEED = bytes(range(32))
+
+
+def output_digest(library, level, seed, count):
+    """SHA3-256 over `count` keypair/encaps/decaps rounds of a seeded build, starting from `seed`.
+
+    Every public key, secret key, ciphertext and shared secret goes into the
+    digest, so two builds agree only if they produce identical bytes.
+    """
+    prefix = symbol_prefix(level)
+    reseed = getattr(library, f"{prefix}_randombytes_seed")
+    reseed.argtypes = [ctypes.c_void_p]
+    reseed.restype = None
+    keypair, enc, dec = (getattr(library, f"{prefix}_{name}") for name in ('keypair', 'enc', 'dec'))
+
+    kem = Kyber(level)
+    public_key = ctypes.create_string_buffer(kem.public_key_bytes)
+    secret_key = ctypes.create_string_buffer(kem.secret_key_bytes)
+    ciphertext = ctypes.create_string_buffer(kem.ciphertext_bytes)
+    shared_secret = ctypes.create_string_buffer(kem.shared_secret_bytes)
+    decapsulated = ctypes.create_string_buffer(kem.shared_secret_bytes)
+
+    reseed(seed)
+    digest = hashlib.sha3_256()
+    for round_ in range(count):
+        if keypair(public_key, secret_key) or enc(ciphertext, shared_secret, public_key) \
+                or dec(decapsulated, ciphertext, secret_key):
+            raise RuntimeError(f"Kyber{level} KEM call failed in round {round_}")
+        if decapsulated.raw != shared_secret.raw:
+            raise RuntimeError(f"Kyber{level} decapsulation disagrees with encapsulation in round {round_}")
+        for buffer in (public_key, secret_key, ciphertext, shared_secret):
+            digest.update(buffer.raw)
+    return digest.hexdigest()
+
+
+def cross_check(levels, variants, count=DEFAULT_COUNT, seed=DEFAULT_SEED, compiler=None, progress=print):
+    """Build every variant with deterministic randomness and compare their digests.
+
+    Returns {level: {variant: digest}}; variants this CPU cannot run are
+    left out. The builds go to a temporary directory and are never
+    visible to load_kyber. Agreement shows the builds compute the same
+    thing, not that it is correct Kyber: this is no substitute for the
+    NIST known-answer vectors.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as build_dir:
+        for level in levels:
+            results[level] = {}
+            for variant in variants:
+                path = build_library(level, output_dir=Path(build_dir) / variant, compiler=compiler,
+                                     variant=variant, seeded=True)
+                library = open_library(path)
+                if not runs_on_this_cpu(library, level):
+                    if progress:
+                        progress(f"Kyber{level} {variant}: skipped, not supported by this CPU")
+                    continue
+                declare_prototypes(library, level)
+                results[level][variant] = output_digest(library, level, seed, count)
+                if progress:
+                    progress(f"Kyber{level} {variant}: {results[level][variant]}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Cross-build consistency check: every Kyber build variant must produce identical keys, '
+                    'ciphertexts and shared secrets from the same seed (not a NIST known-answer test)')
+    parser.add_argument('--levels', type=int, nargs='+', choices=sorted(LEVELS), default=sorted(LEVELS),
+                        help='Kyber variants to check (default: all)')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=None,
+                        help='Builds to compare (default: ref, plus x86_64_v3 on x86-64)')
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT,
+                        help=f'Keypair/encaps/decaps rounds per build (default: {DEFAULT_COUNT})')
+    parser.add_argument('--seed', default=DEFAULT_SEED.hex(), help='32-byte seed as hex (default: 00..1f)')
+    parser.add_argument('--cc', default=None, help='C compiler (default: $CC or gcc)')
+    args = parser.parse_args()
+
+    seed = bytes.fromhex(args.seed)
+    if len(seed) != 32:
+        parser.error(f"--seed must be 32 bytes, got {len(seed)}")
+    results = cross_check(args.levels, args.variants or default_variants(), args.count, seed, args.cc)
+    mismatched = [level for level, digests in results.items() if len(set(digests.values())) > 1]
+    if mismatched:
+        print(f"MISMATCH between variants for Kyber{', Kyber'.join(map(str, mismatched))}")
+        sys.exit(1)
+    print("All variants agree")
@@ -0,0 +1,304 @@
+import ctypes
+import functools
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from quantum.pqc.buffers import (ScratchBuffers, batch_input, batch_part, input_buffer, output_buffer, split,
+                                 take)
+from quantum.pqc.loader import (LEVELS, SOURCE_DIR, check_level, check_variant, load_kyber, select_variant,
+                                symbol_prefix)
+
+PARAMS_HEADER = SOURCE_DIR / "params.h"
+# Native entry points in Kyber.functions order; the batch ones come from batch.c
+NATIVE_FUNCTIONS = ('keypair', 'enc', 'dec', 'keypair_batch', 'enc_batch', 'dec_batch')
+
+_DIRECTIVE = re.compile(r'^\s*#\s*(\w+)\s*(.*)$')
+_OBJECT_MACRO = re.compile(r'^(\w+)(?:\s+(.*))?$')
+# The only #if / #elif condition params.h uses
+_LEVEL_CONDITION = re.compile(r'^\(?\s*KYBER_K\s*==\s*(\d+)\s*\)?$')
+_TOKEN = re.compile(r'\d+|[A-Za-z_]\w*|\S')
+
+
+def _evaluate(expression, defines):
+    """Value of a size #define: integers and earlier macros joined by +, * and parentheses."""
+    tokens = _TOKEN.findall(expression)
+    position = 0
+
+    def term():
+        nonlocal position
+        token = tokens[position] if position < len(tokens) else None
+        position += 1
+        if token == '(':
+            value = total()
+            if position >= len(tokens) or tokens[position] != ')':
+                raise ValueError(f"Unbalanced parentheses in {PARAMS_HEADER.name}: {expression}")
+            position += 1
+            return value
+        if token is not None and token.isdigit():
+            return int(token)
+        if token in defines:
+            return defines[token]
+        raise ValueError(f"Unsupported expression in {PARAMS_HEADER.name}: {expression}")
+
+    def product():
+        nonlocal position
+        value = term()
+        while position < len(tokens) and tokens[position] == '*':
+            position += 1
+            value *= term()
+        return value
+
+    def total():
+        nonlocal position
+        value = product()
+        while position < len(tokens) and tokens[position] == '+':
+            position += 1
+            value += product()
+        return value
+
+    value = total()
+    if position != len(tokens):
+        raise ValueError(f"Unsupported expression in {PARAMS_HEADER.name}: {expression}")
+    return value
+
+
+def _level_condition(condition, defines):
+    """Truth of an `#if KYBER_K == n` line; params.h has no other kind."""
+    match = _LEVEL_CONDITION.match(condition)
+    if match is None:
+        raise ValueError(f"Unsupported condition in {PARAMS_HEADER.name}: {condition}")
+    return defines['KYBER_K'] == int(match.group(1))
+
+
+@functools.lru_cache(maxsize=None)
+def read_params(level, header=PARAMS_HEADER):
+    """Integer #defines of params.h as the C build sees them for this level (KYBER_K set).
+
+    Only what the Kyber headers use is understood: #if/#elif on KYBER_K,
+    #ifdef/#ifndef, #else/#endif, line continuations and object-like macros
+    built from integers with + and *. Nothing is passed to eval.
+    """
+    text = re.sub(r'/\*.*?\*/', ' ', header.read_text(), flags=re.S)
+    text = re.sub(r'//[^\n]*', '', text).replace('\\\n', ' ')
+    defines = {'KYBER_K': LEVELS[check_level(level)]}
+    # One entry per open conditional: [taking this branch, some branch already taken]
+    stack = []
+    for line in text.splitlines():
+        match = _DIRECTIVE.match(line)
+        if not match:
+            continue
+        directive, rest = match.group(1), match.group(2).strip()
+        active = all(branch[0] for branch in stack)
+        if directive in ('if', 'ifdef', 'ifndef'):
+            if directive == 'if':
+                taken = active and _level_condition(rest, defines)
+            else:
+                taken = active and ((rest in defines) == (directive == 'ifdef'))
+            stack.append([taken, taken])
+        elif directive == 'elif':
+            taken = not stack[-1][1] and all(branch[0] for branch in stack[:-1]) and _level_condition(rest, defines)
+            stack[-1] = [taken, stack[-1][1] or taken]
+        elif directive == 'else':
+            stack[-1] = [not stack[-1][1], True]
+        elif directive == 'endif':
+            stack.pop()
+        elif directive == 'define' and active:
+            macro = _OBJECT_MACRO.match(rest)
+            if macro is None or macro.group(1) in defines:
+                continue
+            try:
+                defines[macro.group(1)] = _evaluate(macro.group(2) or '1', defines)
+            except ValueError:
+                # Function-like and string macros (KYBER_NAMESPACE, ...) carry no sizes
+                continue
+    return defines
+
+
+class Kyber:
+    """Kyber KEM at one security level (512, 768 or 1024).
+
+    Sizes come from the bundled params.h, and the native library is only
+    loaded on the first key operation, so creating a Kyber is free and each
+    session can pick its own level:
+
+        kem = Kyber(768)
+        public_key, secret_key = kem.keypair()
+        ciphertext, shared_secret = kem.encaps(public_key)
+        assert kem.decaps(ciphertext, secret_key) == shared_secret
+
+    Inputs may be bytes or any buffer; the *_into variants write into
+    caller-provided writable buffers instead of returning new bytes.
+
+    The *_batch methods run many operations per native call on contiguous
+    arrays. ctypes releases the GIL while C runs, so `workers` threads
+    (or the caller's own thread pool) can run chunks on separate cores;
+    the microbench's batch columns measure how far that scales on a host:
+
+        public_keys, secret_keys = kem.keypair_batch(1000, workers=8)
+        ciphertexts, shared_secrets = kem.encaps_batch(public_keys, workers=8)
+
+    variant picks the native build ('ref' or 'x86_64_v3'); left as None it is
+    chosen from the CPU's features when the library is loaded.
+    """
+
+    def __init__(self, level, variant=None):
+        self.level = check_level(level)
+        self.variant = variant if variant is None else check_variant(variant)
+        params = read_params(level)
+        self.name = f"Kyber{level}"
+        self.public_key_bytes = params['KYBER_PUBLICKEYBYTES']
+        self.secret_key_bytes = params['KYBER_SECRETKEYBYTES']
+        self.ciphertext_bytes = params['KYBER_CIPHERTEXTBYTES']
+        self.shared_secret_bytes = params['KYBER_SSBYTES']
+        self._functions = None
+        self._lock = threading.Lock()
+        self._scratch = ScratchBuffers(public_key=self.public_key_bytes, secret_key=self.secret_key_bytes,
+                                       ciphertext=self.ciphertext_bytes, shared_secret=self.shared_secret_bytes)
+
+    def __repr__(self):
+        if self.variant is None:
+            return f"Kyber({self.level})"
+        return f"Kyber({self.level}, {self.variant!r})"
+
+    @property
+    def functions(self):
+        """Native functions in NATIVE_FUNCTIONS order, loading the library on first access.
+
+        The batch entries are None for libraries built without batch.c; the
+        batch methods then loop over the single-operation functions instead.
+        """
+        if self._functions is None:
+            with self._lock:
+                if self._functions is None:
+                    if self.variant is None:
+                        self.variant = select_variant(self.level)
+                    library = load_kyber(self.level, self.variant)
+                    prefix = symbol_prefix(self.level)
+                    self._functions = tuple(getattr(library, f"{prefix}_{name}", None)
+                                            for name in NATIVE_FUNCTIONS)
+        return self._functions
+
+    def keypair_into(self, public_key, secret_key):
+        result = self.functions[0](output_buffer(public_key, self.public_key_bytes, "Public key"),
+                                   output_buffer(secret_key, self.secret_key_bytes, "Secret key"))
+        if result != 0:
+            raise RuntimeError(f"Key generation failed with error {result}")
+
+    def encaps_into(self, public_key, ciphertext, shared_secret):
+        result = self.functions[1](output_buffer(ciphertext, self.ciphertext_bytes, "Ciphertext"),
+                                   output_buffer(shared_secret, self.shared_secret_bytes, "Shared secret"),
+                                   input_buffer(public_key, self.public_key_bytes, "Public key"))
+        if result != 0:
+            raise RuntimeError(f"Encapsulation failed with error {result}")
+
+    def decaps_into(self, ciphertext, secret_key, shared_secret):
+        result = self.functions[2](output_buffer(shared_secret, self.shared_secret_bytes, "Shared secret"),
+                                   input_buffer(ciphertext, self.ciphertext_bytes, "Ciphertext"),
+                                   input_buffer(secret_key, self.secret_key_bytes, "Secret key"))
+        if result != 0:
+            raise RuntimeError(f"Decapsulation failed with error {result}")
+
+    def keypair(self):
+        """New (public_key, secret_key) as bytes."""
+        scratch = self._scratch
+        self.keypair_into(scratch.public_key, scratch.secret_key)
+        return take(scratch.public_key), take(scratch.secret_key, secret=True)
+
+    def encaps(self, public_key):
+        """(ciphertext, shared_secret) for the holder of public_key's secret key."""
+        scratch = self._scratch
+        self.encaps_into(public_key, scratch.ciphertext, scratch.shared_secret)
+        return take(scratch.ciphertext), take(scratch.shared_secret, secret=True)
+
+    def decaps(self, ciphertext, secret_key):
+        scratch = self._scratch
+        self.decaps_into(ciphertext, secret_key, scratch.shared_secret)
+        return take(scratch.shared_secret, secret=True)
+
+    def _run_batch(self, index, n, workers, arguments, operation):
+        """Run native function `index` over n items given as (C argument, item size) pairs.
+
+        The items are split into one chunk per worker thread; an item size of
+        None passes the argument whole to every chunk (the shared secret key).
+        """
+        single, batch = self.functions[index], self.functions[index + 3]
+
+        def run(start, stop):
+            if batch is not None:
+                if (start, stop) == (0, n):
+                    parts = [argument for argument, _ in arguments]
+                else:
+                    parts = [argument if size is None else batch_part(argument, size, start, stop)
+                             for argument, size in arguments]
+                result = batch(*parts, stop - start)
+                if result != 0:
+                    raise RuntimeError(f"{operation} failed for batch item {start + result - 1}")
+                return
+            for item in range(start, stop):
+                result = single(*[argument if size is None else batch_part(argument, size, item, item + 1)
+                                  for argument, size in arguments])
+                if result != 0:
+                    raise RuntimeError(f"{operation} failed for batch item {item} with error {result}")
+
+        workers = max(1, min(workers, n))
+        if workers == 1:
+            run(0, n)
+            return
+        bounds = [n * worker // workers for worker in range(workers + 1)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() re-raises the first chunk's error
+            list(pool.map(run, bounds[:-1], bounds[1:]))
+
+    def keypair_batch_into(self, public_keys, secret_keys, n, workers=1):
+        """Write n key pairs back to back into buffers of n * public/secret_key_bytes."""
+        if n < 0:
+            raise ValueError(f"Batch size must be non-negative, got {n}")
+        self._run_batch(0, n, workers,
+                        [(output_buffer(public_keys, n * self.public_key_bytes, "Public keys"), self.public_key_bytes),
+                         (output_buffer(secret_keys, n * self.secret_key_bytes, "Secret keys"), self.secret_key_bytes)],
+                        "Key generation")
+
+    def encaps_batch_into(self, public_keys, ciphertexts, shared_secrets, workers=1):
+        """Encapsulate to every public key, writing ciphertexts and shared secrets back to back; returns the count."""
+        public_keys, n = batch_input(public_keys, self.public_key_bytes, "Public keys")
+        self._run_batch(1, n, workers,
+                        [(output_buffer(ciphertexts, n * self.ciphertext_bytes, "Ciphertexts"), self.ciphertext_bytes),
+                         (output_buffer(shared_secrets, n * self.shared_secret_bytes, "Shared secrets"),
+                          self.shared_secret_bytes),
+                         (public_keys, self.public_key_bytes)],
+                        "Encapsulation")
+        return n
+
+    def decaps_batch_into(self, ciphertexts, secret_key, shared_secrets, workers=1):
+        """Decapsulate ciphertexts made for one secret key, writing the shared secrets back to back; returns the count."""
+        ciphertexts, n = batch_input(ciphertexts, self.ciphertext_bytes, "Ciphertexts")
+        self._run_batch(2, n, workers,
+                        [(output_buffer(shared_secrets, n * self.shared_secret_bytes, "Shared secrets"),
+                          self.shared_secret_bytes),
+                         (ciphertexts, self.ciphertext_bytes),
+                         (input_buffer(secret_key, self.secret_key_bytes, "Secret key"), None)],
+                        "Decapsulation")
+        return n
+
+    def keypair_batch(self, n, workers=1):
+        """n new key pairs as ([public_key, ...], [secret_key, ...])."""
+        public_keys = ctypes.create_string_buffer(max(n, 0) * self.public_key_bytes)
+        secret_keys = ctypes.create_string_buffer(max(n, 0) * self.secret_key_bytes)
+        self.keypair_batch_into(public_keys, secret_keys, n, workers)
+        return split(public_keys, self.public_key_bytes), split(secret_keys, self.secret_key_bytes, secret=True)
+
+    def encaps_batch(self, public_keys, workers=1):
+        """([ciphertext, ...], [shared_secret, ...]) for a list of public keys or one contiguous buffer of them."""
+        public_keys, n = batch_input(public_keys, self.public_key_bytes, "Public keys")
+        ciphertexts = ctypes.create_string_buffer(n * self.ciphertext_bytes)
+        shared_secrets = ctypes.create_string_buffer(n * self.shared_secret_bytes)
+        self.encaps_batch_into(public_keys, ciphertexts, shared_secrets, workers)
+        return split(ciphertexts, self.ciphertext_bytes), split(shared_secrets, self.shared_secret_bytes, secret=True)
+
+    def decaps_batch(self, ciphertexts, secret_key, workers=1):
+        """[shared_secret, ...] for ciphertexts (a list or one contiguous buffer) made for one secret key."""
+        ciphertexts, n = batch_input(ciphertexts, self.ciphertext_bytes, "Ciphertexts")
+        shared_secrets = ctypes.create_string_buffer(n * self.shared_secret_bytes)
+        self.decaps_batch_into(ciphertexts, secret_key, shared_secrets, workers)
+        return split(shared_secrets, self.shared_secret_bytes, secret=True)
@@ -0,0 +1,98 @@
+import collections
+import threading
+
+from quantum.pqc.buffers import wipe
+
+DEFAULT_POOL_SIZE = 4
+
+
+class EphemeralKeypair:
+    """One single-use keypair; the secret key is a bytearray zeroed by wipe() or on leaving a with block."""
+
+    def __init__(self, public_key, secret_key):
+        self.public_key = public_key
+        self.secret_key = secret_key
+
+    def wipe(self):
+        wipe(self.secret_key)
+
+    def __enter__(self):
+        return self.public_key, self.secret_key
+
+    def __exit__(self, *exc_info):
+        self.wipe()
+
+
+class KeypairPool:
+    """Kyber keypairs generated ahead of time on a background thread, so keygen is off the handshake path.
+
+        pool = KeypairPool(Kyber(512))
+        with pool.acquire() as (public_key, secret_key):
+            shared_secret = kem.decaps(ciphertext, secret_key)
+
+    Every keypair is handed out once and its secret key wiped after use,
+    which keeps the forward secrecy of generating one per handshake. When
+    handshakes outpace the thread, acquire() generates a keypair inline.
+    """
+
+    def __init__(self, kem, size=DEFAULT_POOL_SIZE):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.kem = kem
+        self.size = size
+        self._keypairs = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._fill, name=f"{kem.name} keypair pool", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._keypairs)
+
+    def _generate(self):
+        public_key = bytearray(self.kem.public_key_bytes)
+        secret_key = bytearray(self.kem.secret_key_bytes)
+        self.kem.keypair_into(public_key, secret_key)
+        return EphemeralKeypair(bytes(public_key), secret_key)
+
+    def _fill(self):
+        while True:
+            with self._condition:
+                while not self._closed and len(self._keypairs) >= self.size:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            # Generated outside the lock so acquire() never waits on keygen
+            try:
+                keypair = self._generate()
+            except Exception as e:
+                with self._condition:
+                    self._error = e
+                    self._closed = True
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                if self._closed:
+                    keypair.wipe()
+                    return
+                self._keypairs.append(keypair)
+
+    def acquire(self):
+        """A keypair from the pool, or a freshly generated one when it is empty."""
+        with self._condition:
+            if self._error is not None:
+                raise RuntimeError(f"Keypair pool refill failed: {self._error}")
+            if self._closed:
+                raise RuntimeError("Keypair pool is closed")
+            keypair = self._keypairs.popleft() if self._keypairs else None
+            self._condition.notify()
+        return keypair or self._generate()
+
+    def close(self):
+        """Stop refilling and wipe the secret keys that were never handed out."""
+        with self._condition:
+            self._closed = True
+            while self._keypairs:
+                self._keypairs.popleft().wipe()
+            self._condition.notify()
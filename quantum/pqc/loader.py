@@ -0,0 +1,136 @@
+import ctypes
+import functools
+import os
+import sys
+from pathlib import Path
+
+SOURCE_DIR = Path(__file__).resolve().parents[1] / "kyber_source_files"
+# Overrides where the Kyber libraries are looked up first
+LIB_DIR_ENV = "KYBER_LIB_DIR"
+# Forces a build variant instead of picking one from the CPU's features
+VARIANT_ENV = "KYBER_VARIANT"
+
+# Kyber variant -> KYBER_K module rank
+LEVELS = {512: 2, 768: 3, 1024: 4}
+# Builds of the same reference C sources: ref is portable, x86_64_v3 is compiled for the
+# x86-64-v3 microarchitecture level (AVX2, BMI1/2, FMA, ...) and only runs where cpu.c says so
+VARIANTS = ('ref', 'x86_64_v3')
+
+
+def check_level(level):
+    if level not in LEVELS:
+        raise ValueError(f"Unsupported Kyber level {level}; expected one of {sorted(LEVELS)}")
+    return level
+
+
+def check_variant(variant):
+    if variant not in VARIANTS:
+        raise ValueError(f"Unsupported Kyber build variant {variant!r}; expected one of {list(VARIANTS)}")
+    return variant
+
+
+def library_suffix(platform=None):
+    platform = platform or sys.platform
+    if platform.startswith('win'):
+        return '.dll'
+    if platform == 'darwin':
+        return '.dylib'
+    return '.so'
+
+
+def library_name(level, platform=None, variant='ref'):
+    suffix = '' if check_variant(variant) == 'ref' else f"_{variant}"
+    return f"libkyber{check_level(level)}{suffix}{library_suffix(platform)}"
+
+
+def default_library_dir(level):
+    """Where the bundled DLLs live and build.py puts the libraries it compiles."""
+    return SOURCE_DIR / f"kyber{check_level(level)}"
+
+
+def symbol_prefix(level):
+    return f"pqcrystals_kyber{check_level(level)}_ref"
+
+
+def library_path(level, variant='ref'):
+    """Path of the Kyber library for this platform; FileNotFoundError if it has not been built."""
+    name = library_name(level, variant=variant)
+    candidates = [default_library_dir(level) / name]
+    if os.environ.get(LIB_DIR_ENV):
+        candidates.insert(0, Path(os.environ[LIB_DIR_ENV]) / name)
+    for path in candidates:
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"{name} not found in {', '.join(str(path.parent) for path in candidates)}. "
+                            f"Build it with: python -m quantum.pqc.build --levels {level} --variants {variant}")
+
+
+@functools.lru_cache(maxsize=None)
+def open_library(path):
+    if sys.platform.startswith('win'):
+        # winmode=0 resolves the DLL's own dependencies the way LoadLibrary does
+        return ctypes.CDLL(str(path), winmode=0)
+    return ctypes.CDLL(str(path))
+
+
+def runs_on_this_cpu(library, level):
+    """The opened library's own CPUID check, compiled for baseline x86-64 and safe to call first."""
+    check = getattr(library, f"{symbol_prefix(level)}_cpu_supports_build", None)
+    # Libraries built before cpu.c (the bundled Windows DLLs) cannot tell
+    return check is not None and check() == 1
+
+
+@functools.lru_cache(maxsize=None)
+def cpu_supports(level, variant):
+    """Whether this CPU and OS can run a built variant; FileNotFoundError if it has not been built.
+
+    Each library answers for itself, so no other variant has to be built.
+    """
+    if check_variant(variant) == 'ref':
+        return True
+    return runs_on_this_cpu(open_library(library_path(level, variant)), level)
+
+
+def select_variant(level):
+    """$KYBER_VARIANT if set, else x86_64_v3 when it is built and this CPU supports it, else ref."""
+    if os.environ.get(VARIANT_ENV):
+        return check_variant(os.environ[VARIANT_ENV])
+    try:
+        return 'x86_64_v3' if cpu_supports(level, 'x86_64_v3') else 'ref'
+    except FileNotFoundError:
+        return 'ref'
+
+
+def declare_prototypes(kyber, level):
+    """Set argtypes/restype of the KEM functions of an opened Kyber library."""
+    prefix = symbol_prefix(level)
+    for name, n_args in (('keypair', 2), ('enc', 3), ('dec', 3)):
+        function = getattr(kyber, f"{prefix}_{name}")
+        # void pointers take bytes as they are and ctypes arrays wrapping any writable buffer
+        function.argtypes = [ctypes.c_void_p] * n_args
+        function.restype = ctypes.c_int
+    for name, n_args in (('keypair_batch', 2), ('enc_batch', 3), ('dec_batch', 3)):
+        # Missing from libraries built before batch.c, such as the bundled Windows DLLs
+        function = getattr(kyber, f"{prefix}_{name}", None)
+        if function is not None:
+            function.argtypes = [ctypes.c_void_p] * n_args + [ctypes.c_size_t]
+            function.restype = ctypes.c_int
+
+
+@functools.lru_cache(maxsize=None)
+def load_kyber(level, variant=None):
+    """Load the Kyber library for `level` once per process, with the KEM prototypes declared.
+
+    variant=None picks one with select_variant(). Every variant exports the
+    reference-implementation names, e.g. pqcrystals_kyber512_ref_keypair /
+    _enc / _dec, plus the batch.c entry points _keypair_batch / _enc_batch /
+    _dec_batch when the library was built with them. ctypes releases the
+    GIL for the duration of each call.
+    """
+    variant = select_variant(level) if variant is None else check_variant(variant)
+    if not cpu_supports(level, variant):
+        # Running it anyway would die on the first illegal instruction
+        raise RuntimeError(f"This CPU cannot run the {variant} build of Kyber{level}; use the ref variant")
+    kyber = open_library(library_path(level, variant))
+    declare_prototypes(kyber, level)
+    return kyber
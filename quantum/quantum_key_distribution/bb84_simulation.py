@@ -0,0 +1,178 @@
+import math
+import numpy as np
+
+RECTILINEAR = 0
+DIAGONAL = 1
+
+BACKENDS = ('numpy', 'aer')
+
+
+def make_rng(seed=None):
+    """Return a NumPy Generator, passing existing generators through unchanged."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def random_bits(n_bits, rng=None):
+    return make_rng(rng).integers(0, 2, size=n_bits, dtype=np.uint8)
+
+
+def random_bases(n_bits, rng=None):
+    return make_rng(rng).integers(0, 2, size=n_bits, dtype=np.uint8)
+
+
+def bases_to_array(bases):
+    """Convert a sequence of '+'/'x' basis labels to a uint8 array (0 = '+', 1 = 'x')."""
+    if isinstance(bases, np.ndarray):
+        return bases.astype(np.uint8, copy=False)
+    labels = np.frombuffer(''.join(bases).encode('ascii'), dtype=np.uint8)
+    return (labels == ord('x')).astype(np.uint8)
+
+
+def array_to_bases(bases):
+    return np.where(np.asarray(bases, dtype=bool), 'x', '+').tolist()
+
+
+def circuit_ops_to_arrays(circuit_ops, n_bits):
+    """Recover the prepared bits and bases from a list of {'gate', 'qubits'} operations."""
+    x_applied = np.zeros(n_bits, dtype=np.uint8)
+    h_applied = np.zeros(n_bits, dtype=np.uint8)
+    for op in circuit_ops:
+        if not isinstance(op, dict):
+            raise ValueError(f"Invalid circuit operation: {op!r}")
+        qubits = op.get('qubits')
+        if not qubits:
+            continue
+        qubit = qubits[0] if isinstance(qubits, list) else None
+        if not isinstance(qubit, int) or isinstance(qubit, bool) or not 0 <= qubit < n_bits:
+            raise ValueError(f"Invalid qubit {qubits!r} for a {n_bits}-qubit state")
+        gate = op.get('gate')
+        if gate == 'x':
+            x_applied[qubit] = 1
+        elif gate == 'h':
+            h_applied[qubit] = 1
+    return x_applied, h_applied
+
+
+def arrays_to_circuit_ops(bits, bases):
+    """Encode bits and bases as the X-then-H operation list used on the wire."""
+    bits = np.asarray(bits, dtype=bool)
+    bases = np.asarray(bases, dtype=bool)
+    circuit_ops = []
+    for i in np.flatnonzero(bits | bases).tolist():
+        if bits[i]:
+            circuit_ops.append({'gate': 'x', 'qubits': [i]})
+        if bases[i]:
+            circuit_ops.append({'gate': 'h', 'qubits': [i]})
+    return circuit_ops
+
+
+def measure(bits, bases, measure_bases, backend='numpy', rng=None, chunk_size=16):
+    """Measure BB84 qubits prepared in (bits, bases) using measure_bases.
+
+    Matching bases reproduce the prepared bit; mismatched bases give a uniformly
+    random outcome. The 'aer' backend runs the same experiment on Qiskit Aer and
+    is kept as a reference for cross-checking the NumPy engine.
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    bases = np.asarray(bases, dtype=np.uint8)
+    measure_bases = np.asarray(measure_bases, dtype=np.uint8)
+    if not (bits.shape == bases.shape == measure_bases.shape):
+        raise ValueError("bits, bases and measure_bases must have the same length")
+
+    if backend == 'numpy':
+        return _measure_numpy(bits, bases, measure_bases, make_rng(rng))
+    if backend == 'aer':
+        return _measure_aer(bits, bases, measure_bases, make_rng(rng), chunk_size)
+    raise ValueError(f"Unknown simulation backend: {backend}")
+
+
+def _measure_numpy(bits, bases, measure_bases, rng):
+    coin_flips = rng.integers(0, 2, size=bits.size, dtype=np.uint8)
+    return np.where(bases == measure_bases, bits, coin_flips)
+
+
+def _measure_aer(bits, bases, measure_bases, rng, chunk_size):
+    from qiskit import QuantumCircuit, transpile
+    from qiskit_aer import AerSimulator
+
+    n_bits = bits.size
+    circuits = []
+    for chunk_start in range(0, n_bits, chunk_size):
+        chunk_end = min(n_bits, chunk_start + chunk_size)
+        size = chunk_end - chunk_start
+        qc = QuantumCircuit(size, size)
+        for i in range(size):
+            j = chunk_start + i
+            if bits[j]:
+                qc.x(i)
+            if bases[j]:
+                qc.h(i)
+            if measure_bases[j]:
+                qc.h(i)
+        qc.measure(range(size), range(size))
+        circuits.append(qc)
+
+    if not circuits:
+        return np.zeros(0, dtype=np.uint8)
+
+    backend = AerSimulator()
+    compiled = transpile(circuits, backend)
+    seed = int(rng.integers(0, 2**31 - 1))
+    result = backend.run(compiled, shots=1, seed_simulator=seed).result()
+
+    measurements = np.empty(n_bits, dtype=np.uint8)
+    for index, chunk_start in enumerate(range(0, n_bits, chunk_size)):
+        bitstring = next(iter(result.get_counts(index)))[::-1]
+        measurements[chunk_start:chunk_start + len(bitstring)] = np.frombuffer(
+            bitstring.encode('ascii'), dtype=np.uint8) - ord('0')
+    return measurements
+
+
+def compare_backends(n_qubits=4096, seed=None, alpha=0.001):
+    """Statistical equivalence check between the NumPy engine and the Aer reference.
+
+    Both backends must reproduce the prepared bit wherever the bases agree, and
+    their outcomes on mismatched bases must be indistinguishable fair coins
+    (two-proportion z-test at significance level alpha).
+    """
+    rng = make_rng(seed)
+    bits = random_bits(n_qubits, rng)
+    bases = random_bases(n_qubits, rng)
+    measure_bases = random_bases(n_qubits, rng)
+
+    results = {}
+    for backend in BACKENDS:
+        results[backend] = measure(bits, bases, measure_bases, backend=backend, rng=rng)
+
+    matched = bases == measure_bases
+    mismatched = ~matched
+    n_mismatched = int(mismatched.sum())
+
+    report = {'n_qubits': n_qubits, 'n_matched': int(matched.sum()), 'n_mismatched': n_mismatched}
+    for backend, outcome in results.items():
+        report[f'{backend}_matched_errors'] = int((outcome[matched] != bits[matched]).sum())
+        report[f'{backend}_ones_rate'] = float(outcome[mismatched].mean()) if n_mismatched else 0.0
+
+    if n_mismatched:
+        p1, p2 = report['numpy_ones_rate'], report['aer_ones_rate']
+        pooled = (p1 + p2) / 2
+        stderr = math.sqrt(2 * pooled * (1 - pooled) / n_mismatched) or 1.0
+        z = (p1 - p2) / stderr
+        p_value = math.erfc(abs(z) / math.sqrt(2))
+    else:
+        z, p_value = 0.0, 1.0
+
+    report['z_score'] = z
+    report['p_value'] = p_value
+    report['equivalent'] = (report['numpy_matched_errors'] == 0
+                            and report['aer_matched_errors'] == 0
+                            and p_value >= alpha)
+    return report
+
+
+if __name__ == "__main__":
+    report = compare_backends(seed=2024)
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,238 @@
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import make_rng, measure, random_bases, random_bits
+
+# Standard telecom fibre at 1550 nm
+FIBRE_ATTENUATION_DB_PER_KM = 0.2
+SIMULATION_CHUNK_SIZE = 1 << 22
+
+
+class ChannelState:
+    """BB84 qubits in flight between Alice and Bob.
+
+    `x` and `h` are the bit and basis of the BB84 state that reaches Bob,
+    which models below overwrite as they disturb it. `detected` marks pulses
+    that still produce a click at Bob, `photons` holds photon numbers once a
+    multi-photon source is in play (None means single photons), and
+    `eve_bits` / `eve_known` record what Eve holds and where she will know
+    Alice's bit exactly once the bases are announced.
+    """
+
+    def __init__(self, bits, bases):
+        self.x = np.array(bits, dtype=np.uint8)
+        self.h = np.array(bases, dtype=np.uint8)
+        if self.x.shape != self.h.shape:
+            raise ValueError("Bits and bases must have the same length")
+        n = self.x.size
+        self.detected = np.ones(n, dtype=bool)
+        self.photons = None
+        self.eve_bits = np.zeros(n, dtype=np.uint8)
+        self.eve_known = np.zeros(n, dtype=bool)
+        self.intercepted = np.zeros(n, dtype=bool)
+
+    @property
+    def n_qubits(self):
+        return self.x.size
+
+
+class DepolarizingChannel:
+    """Replaces each qubit by the maximally mixed state with probability p.
+
+    I/2 is the equal mixture of the four BB84 states, so a depolarized qubit
+    is simply re-drawn as a random BB84 state; the QBER it adds is p / 2.
+    """
+
+    def __init__(self, p):
+        if not 0 <= p <= 1:
+            raise ValueError("Depolarizing probability must be in [0, 1]")
+        self.p = p
+
+    def apply(self, state, rng):
+        hit = np.flatnonzero(rng.random(state.n_qubits) < self.p)
+        state.x[hit] = random_bits(hit.size, rng)
+        state.h[hit] = random_bases(hit.size, rng)
+
+
+class LossChannel:
+    """Photon loss with the given transmittance (probability a photon survives)."""
+
+    def __init__(self, transmittance):
+        if not 0 <= transmittance <= 1:
+            raise ValueError("Transmittance must be in [0, 1]")
+        self.transmittance = transmittance
+
+    @classmethod
+    def from_db(cls, loss_db):
+        return cls(10 ** (-loss_db / 10))
+
+    @classmethod
+    def fibre(cls, length_km, attenuation_db_per_km=FIBRE_ATTENUATION_DB_PER_KM):
+        return cls.from_db(length_km * attenuation_db_per_km)
+
+    def apply(self, state, rng):
+        if state.photons is None:
+            state.detected &= rng.random(state.n_qubits) < self.transmittance
+        else:
+            # Each photon of a pulse is lost independently
+            state.photons = rng.binomial(state.photons, self.transmittance)
+            state.detected &= state.photons > 0
+
+
+class WeakCoherentSource:
+    """Attenuated laser pulses: Poisson photon numbers with the given mean.
+
+    Empty pulses never click; pulses with two or more photons are what the
+    beam-splitting attack exploits.
+    """
+
+    def __init__(self, mean_photon_number):
+        if mean_photon_number <= 0:
+            raise ValueError("Mean photon number must be positive")
+        self.mean_photon_number = mean_photon_number
+
+    def apply(self, state, rng):
+        state.photons = rng.poisson(self.mean_photon_number, state.n_qubits)
+        state.detected &= state.photons > 0
+
+
+class BeamSplittingAttack:
+    """Eve taps a fraction of the light and keeps it in a quantum memory.
+
+    Every photon is diverted to Eve independently with probability
+    `tap_fraction`. Pulses where she caught at least one photon reveal
+    Alice's bit to her once the bases are announced, without introducing
+    any errors; Bob just sees extra loss.
+    """
+
+    def __init__(self, tap_fraction):
+        if not 0 <= tap_fraction <= 1:
+            raise ValueError("Tap fraction must be in [0, 1]")
+        self.tap_fraction = tap_fraction
+
+    def apply(self, state, rng):
+        photons = state.photons if state.photons is not None else state.detected.astype(np.int64)
+        tapped = rng.binomial(photons, self.tap_fraction)
+        state.photons = photons - tapped
+        state.detected &= state.photons > 0
+        caught = tapped > 0
+        state.eve_bits[caught] = state.x[caught]
+        state.eve_known |= caught
+        state.intercepted |= caught
+
+
+class InterceptResend:
+    """Eve measures a fraction `rate` of the qubits in random bases and resends what she saw.
+
+    Each intercepted qubit in the wrong basis gives Bob a wrong bit half the
+    time on sifted positions, so the QBER it adds is rate / 4.
+    """
+
+    def __init__(self, rate=1.0, backend='numpy'):
+        if not 0 <= rate <= 1:
+            raise ValueError("Intercept rate must be in [0, 1]")
+        self.rate = rate
+        self.backend = backend
+
+    def apply(self, state, rng, bases=None):
+        intercept_resend(state, self.rate, rng, bases, self.backend)
+
+
+def intercept_resend(state, rate, rng=None, bases=None, backend='numpy'):
+    """Intercept-resend on a random `rate` fraction of the pulses that still carry a photon.
+
+    `bases` optionally fixes Eve's measurement basis per qubit (0 = '+',
+    1 = 'x'); only the entries at intercepted positions are used. Returns
+    the indices that were intercepted.
+    """
+    rng = make_rng(rng)
+    candidates = state.detected if state.photons is None else state.photons > 0
+    if rate >= 1:
+        targets = np.flatnonzero(candidates)
+    else:
+        targets = np.flatnonzero(candidates & (rng.random(state.n_qubits) < rate))
+    eve_bases = (random_bases(targets.size, rng) if bases is None
+                 else np.asarray(bases, dtype=np.uint8)[targets])
+    outcomes = measure(state.x[targets], state.h[targets], eve_bases, backend=backend, rng=rng)
+
+    state.eve_bits[targets] = outcomes
+    state.eve_known[targets] |= eve_bases == state.h[targets]
+    state.intercepted[targets] = True
+    state.x[targets] = outcomes
+    state.h[targets] = eve_bases
+    if state.photons is not None:
+        # Eve resends a single photon
+        state.photons[targets] = 1
+    return targets
+
+
+def transmit(bits, bases, models, rng=None):
+    """Send Alice's qubits through the channel models in order; returns the ChannelState."""
+    rng = make_rng(rng)
+    state = ChannelState(bits, bases)
+    for model in models:
+        model.apply(state, rng)
+    return state
+
+
+def simulate(n_qubits, models, rng=None, chunk_size=SIMULATION_CHUNK_SIZE):
+    """Run n_qubits of BB84 through `models` and report rates, without keeping the key.
+
+    Qubits are processed in chunks of chunk_size so memory stays flat for
+    very long runs. `eve_information` is the fraction of the sifted key Eve
+    knows exactly, and `eve_agreement` the fraction where her guess is right.
+    """
+    rng = make_rng(rng)
+    totals = {'detected': 0, 'sifted': 0, 'errors': 0, 'eve_known': 0, 'eve_agree': 0,
+              'intercepted': 0}
+    for start in range(0, n_qubits, chunk_size):
+        size = min(chunk_size, n_qubits - start)
+        bits = random_bits(size, rng)
+        bases = random_bases(size, rng)
+        state = transmit(bits, bases, models, rng)
+        bob_bases = random_bases(size, rng)
+        sifted = state.detected & (bases == bob_bases)
+        kept = np.flatnonzero(sifted)
+        bob_bits = measure(state.x[kept], state.h[kept], bob_bases[kept], rng=rng)
+
+        totals['detected'] += int(np.count_nonzero(state.detected))
+        totals['sifted'] += kept.size
+        totals['errors'] += int(np.count_nonzero(bob_bits != bits[kept]))
+        totals['eve_known'] += int(np.count_nonzero(state.eve_known[kept]))
+        totals['eve_agree'] += int(np.count_nonzero(state.eve_bits[kept] == bits[kept]))
+        totals['intercepted'] += int(np.count_nonzero(state.intercepted))
+
+    n_sifted = totals['sifted']
+    return {
+        'n_qubits': n_qubits,
+        'n_detected': totals['detected'],
+        'n_sifted': n_sifted,
+        'n_errors': totals['errors'],
+        'n_intercepted': totals['intercepted'],
+        'detection_rate': totals['detected'] / n_qubits if n_qubits else 0.0,
+        'sifted_rate': n_sifted / n_qubits if n_qubits else 0.0,
+        'qber': totals['errors'] / n_sifted if n_sifted else 0.0,
+        'eve_information': totals['eve_known'] / n_sifted if n_sifted else 0.0,
+        'eve_agreement': totals['eve_agree'] / n_sifted if n_sifted else 0.0,
+    }
+
+
+def describe(models):
+    return ', '.join(f"{type(model).__name__}({', '.join(f'{k}={v}' for k, v in vars(model).items())})"
+                     for model in models) or 'ideal channel'
+
+
+if __name__ == "__main__":
+    rng = make_rng(2024)
+    n_qubits = 4_000_000
+    scenarios = [
+        [],
+        [DepolarizingChannel(0.04)],
+        [InterceptResend(0.2)],
+        [InterceptResend(1.0)],
+        [LossChannel.fibre(25)],
+        [WeakCoherentSource(0.5), BeamSplittingAttack(1 - LossChannel.fibre(25).transmittance)],
+    ]
+    for models in scenarios:
+        report = simulate(n_qubits, models, rng)
+        print(f"{describe(models)}: QBER {report['qber']*100:.2f}%, "
+              f"sifted {report['sifted_rate']*100:.2f}%, Eve knows {report['eve_information']*100:.2f}%")
@@ -0,0 +1,251 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array
+
+PAGE_QUBITS = 16
+DEFAULT_CACHE_PAGES = 128
+RENDER_DPI = 100
+
+CIRCUIT_STYLE = {
+    'backgroundcolor': '#F5F5F5',
+    'linecolor': '#333333',
+    'textcolor': '#000000',
+    'gatefacecolor': ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#1abc9c'],
+    'gatetextcolor': 'white',
+    'subfontsize': 12,
+    'fontsize': 14,
+    'creglinestyle': 'solid',
+    'creglinecolor': '#FF6600',
+    'displaytext': {
+        'CNOT': '⊕',
+        'X': '✕',
+        'H': 'H',
+        'SWAP': '⇄',
+        'Z': 'Z',
+        'S': 'S',
+        'T': 'T',
+        'RX': 'Rx',
+        'RY': 'Ry',
+        'RZ': 'Rz'
+    }
+}
+
+GATE_DESCRIPTIONS = {
+    'h': 'Hadamard (H): Creates superposition',
+    'x': 'Pauli-X: Bit flip (NOT gate)',
+    'z': 'Pauli-Z: Phase flip',
+    'y': 'Pauli-Y: Combined X and Z',
+    'cx': 'CNOT: Controlled-NOT',
+    'measure': 'Measurement: Collapses state',
+    'rx': 'RX: Rotation around X-axis',
+    'ry': 'RY: Rotation around Y-axis',
+    'rz': 'RZ: Rotation around Z-axis'
+}
+
+
+class PreparationCircuit:
+    """BB84 preparation circuit for `bits` in `bases`, kept as the two arrays.
+
+    Qubit i gets X when bits[i] is 1, then H when bases[i] is 'x'. Gates are
+    only built for the qubits a page shows, so describing a transmission of
+    any size costs no more than its arrays.
+    """
+
+    def __init__(self, bits, bases, name='bb84_preparation'):
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.bases = bases_to_array(bases)
+        if self.bits.shape != self.bases.shape:
+            raise ValueError("Bits and bases must have the same length")
+        self.name = name
+        self.num_qubits = self.num_clbits = self.bits.size
+        self._digest = None
+
+    def gate_counts(self):
+        counts = {'x': int(np.count_nonzero(self.bits)), 'h': int(np.count_nonzero(self.bases))}
+        return {gate: count for gate, count in counts.items() if count}
+
+    def size(self):
+        return sum(self.gate_counts().values())
+
+    def depth(self):
+        if np.any(self.bits & self.bases):
+            return 2
+        return 1 if self.size() else 0
+
+    def width(self):
+        return self.num_qubits + self.num_clbits
+
+    def digest(self):
+        if self._digest is None:
+            digest = hashlib.sha256(f"{self.name}:{self.num_qubits}:".encode())
+            digest.update(np.packbits(self.bits).tobytes())
+            digest.update(np.packbits(self.bases).tobytes())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def window(self, start, stop, name):
+        window = _window_circuit(start, stop - start, stop - start, name)
+        for i in range(stop - start):
+            if self.bits[start + i]:
+                window.x(i)
+            if self.bases[start + i]:
+                window.h(i)
+        return window
+
+
+def _window_circuit(start, n, n_clbits, name):
+    # One register per qubit so the diagram labels show the original qubit numbers
+    registers = [QuantumRegister(1, f"q{start + i}") for i in range(n)]
+    if n_clbits:
+        registers.append(ClassicalRegister(n_clbits, "c"))
+    return QuantumCircuit(*registers, name=name)
+
+
+def circuit_digest(circuit):
+    """SHA-256 over the circuit's registers and operations; equal circuits give equal digests."""
+    if isinstance(circuit, PreparationCircuit):
+        return circuit.digest()
+    digest = hashlib.sha256(f"{circuit.name}:{circuit.num_qubits}:{circuit.num_clbits}".encode())
+    for instruction in circuit.data:
+        qubits = ','.join(str(circuit.find_bit(q).index) for q in instruction.qubits)
+        clbits = ','.join(str(circuit.find_bit(c).index) for c in instruction.clbits)
+        digest.update(f"|{instruction.operation.name}{list(instruction.operation.params)}:{qubits}:{clbits}".encode())
+    return digest.hexdigest()
+
+
+def page_count(circuit, page_qubits=PAGE_QUBITS):
+    return max(1, -(-circuit.num_qubits // page_qubits))
+
+
+def page_circuit(circuit, page, page_qubits=PAGE_QUBITS):
+    """Sub-circuit of qubits [page * page_qubits, ...) with the operations acting only on them.
+
+    Each qubit keeps its classical bit when the circuit pairs them one to
+    one, as BB84 circuits do. Operations that reach outside the window are
+    left out; BB84 preparation has none. A PreparationCircuit builds just
+    the window's gates.
+    """
+    if not 0 <= page < page_count(circuit, page_qubits):
+        raise ValueError(f"Page {page} out of range")
+    start = page * page_qubits
+    stop = min(start + page_qubits, circuit.num_qubits)
+    n = stop - start
+    name = f"{circuit.name} [{start}-{stop - 1}]"
+    if isinstance(circuit, PreparationCircuit):
+        return circuit.window(start, stop, name)
+    n_clbits = n if circuit.num_clbits == circuit.num_qubits else 0
+    window = _window_circuit(start, n, n_clbits, name)
+    for instruction in circuit.data:
+        qubits = [circuit.find_bit(q).index - start for q in instruction.qubits]
+        if not all(0 <= q < n for q in qubits):
+            continue
+        clbits = [circuit.find_bit(c).index - start for c in instruction.clbits]
+        if not all(0 <= c < n_clbits for c in clbits):
+            continue
+        window.append(instruction.operation, qubits, clbits)
+    return window
+
+
+def render_page(circuit, page, page_qubits=PAGE_QUBITS):
+    """PNG bytes of one page of the circuit diagram.
+
+    Draws on a standalone Figure rather than through pyplot, so it is safe
+    to call from a worker thread.
+    """
+    window = page_circuit(circuit, page, page_qubits)
+    start = page * page_qubits
+    fig = Figure(figsize=(8, max(4, window.num_qubits * 0.9)), dpi=RENDER_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    window.draw(output='mpl', ax=ax, scale=0.9, style=CIRCUIT_STYLE, fold=20,
+                plot_barriers=True, initial_state=True, with_layout=True)
+
+    title = f"Quantum Circuit: {circuit.name}\n"
+    title += (f"Qubits {start}-{start + window.num_qubits - 1} of {circuit.num_qubits} | "
+              f"{len(window.data)} Operations | Depth: {window.depth()}")
+    ax.set_title(title, fontsize=16, color='#2c3e50', pad=20)
+
+    gate_types = sorted(set(instr.operation.name for instr in window.data))
+    legend_text = "Gate Legend:\n\n"
+    for gate in gate_types:
+        if gate.lower() in GATE_DESCRIPTIONS:
+            legend_text += f"• {GATE_DESCRIPTIONS[gate.lower()]}\n"
+    props = dict(boxstyle='round', facecolor='#f8f9fa', alpha=0.7)
+    ax.text(0.98, 0.02, legend_text, transform=ax.transAxes, fontsize=10,
+            verticalalignment='bottom', horizontalalignment='right', bbox=props)
+
+    gradient = np.repeat(np.linspace(0, 1, 100).reshape(-1, 1), 10, axis=1)
+    ax.imshow(gradient, aspect='auto', extent=[-0.5, -0.3, -0.5, window.num_qubits + 0.5],
+              cmap='Blues', alpha=0.2, zorder=-1)
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+class CircuitRenderer:
+    """Pages of circuit diagrams rendered once and kept as PNG bytes.
+
+    Pages are cached by (circuit digest, page, page size) in a bounded LRU,
+    so reopening the visualization of the same transmission, or paging back,
+    costs a dictionary lookup. Safe to share between the Tk thread and
+    rendering workers.
+    """
+
+    def __init__(self, page_qubits=PAGE_QUBITS, cache_pages=DEFAULT_CACHE_PAGES):
+        if page_qubits <= 0:
+            raise ValueError("Page size must be positive")
+        self.page_qubits = page_qubits
+        self.cache_pages = cache_pages
+        self._pages = OrderedDict()
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def digest(self, circuit):
+        """Digest of the circuit, computed once per circuit object as long as it is not modified."""
+        if isinstance(circuit, PreparationCircuit):
+            return circuit.digest()
+        key = (id(circuit), len(circuit.data))
+        with self._lock:
+            cached = self._digests.get(key)
+            if cached is not None and cached[0] is circuit:
+                return cached[1]
+        value = circuit_digest(circuit)
+        with self._lock:
+            # Only the latest circuit is worth remembering
+            self._digests = {key: (circuit, value)}
+        return value
+
+    def page_count(self, circuit):
+        return page_count(circuit, self.page_qubits)
+
+    def cached(self, digest, page):
+        """PNG bytes of the page if already rendered, else None."""
+        key = (digest, page, self.page_qubits)
+        with self._lock:
+            png = self._pages.get(key)
+            if png is not None:
+                self._pages.move_to_end(key)
+            return png
+
+    def render(self, circuit, page, digest=None):
+        """PNG bytes of the page, from the cache or freshly rendered; call it from a worker thread."""
+        digest = digest or self.digest(circuit)
+        png = self.cached(digest, page)
+        if png is not None:
+            return png
+        png = render_page(circuit, page, self.page_qubits)
+        with self._lock:
+            self._pages[(digest, page, self.page_qubits)] = png
+            while len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+        return png
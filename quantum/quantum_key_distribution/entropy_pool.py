@@ -0,0 +1,133 @@
+import threading
+import numpy as np
+
+
+class QuantumEntropyPool:
+    """Bit-packed buffer of quantum random bits refilled from batched Aer jobs.
+
+    The Hadamard circuit is built and transpiled once; each job then pulls
+    `shots_per_job` shots with memory=True, so one job yields
+    qubits_per_shot * shots_per_job random bits. A background thread tops the
+    buffer back up to `capacity_bits` whenever it drops below `low_water_bits`.
+    """
+
+    def __init__(self, capacity_bits=1 << 21, low_water_bits=None, qubits_per_shot=16,
+                 shots_per_job=65536, seed=None, start=True):
+        from qiskit import QuantumCircuit, transpile
+        from qiskit_aer import AerSimulator
+
+        self.capacity_bytes = max(1, capacity_bits // 8)
+        if low_water_bits is None:
+            low_water_bits = capacity_bits // 2
+        self.low_water_bytes = low_water_bits // 8
+        self.qubits_per_shot = qubits_per_shot
+        self.shots_per_job = shots_per_job
+
+        self.circuit = QuantumCircuit(qubits_per_shot)
+        self.circuit.h(range(qubits_per_shot))
+        self.circuit.measure_all()
+        self._backend = AerSimulator()
+        self._compiled = transpile(self.circuit, self._backend)
+        self._seeds = np.random.default_rng(seed) if seed is not None else None
+
+        self._buffer = bytearray()
+        self._demand_bytes = 0
+        self._closed = False
+        self._error = None
+        self._lock = threading.Lock()
+        self._wanted = threading.Condition(self._lock)
+        self._filled = threading.Condition(self._lock)
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._error = None
+                self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+                self._thread.start()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wanted.notify_all()
+            self._filled.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def available_bits(self):
+        with self._lock:
+            return len(self._buffer) * 8
+
+    def take_bytes(self, n_bytes):
+        """Remove and return n_bytes of packed random bytes, waiting for a refill if needed."""
+        with self._lock:
+            if self._thread is None:
+                raise RuntimeError("Entropy pool is not running")
+            self._demand_bytes += n_bytes
+            self._wanted.notify()
+            try:
+                while len(self._buffer) < n_bytes:
+                    if self._error is not None:
+                        raise RuntimeError(f"Entropy pool refill failed: {self._error}")
+                    if self._closed:
+                        raise RuntimeError("Entropy pool is closed")
+                    self._filled.wait()
+                chunk = bytes(self._buffer[:n_bytes])
+                del self._buffer[:n_bytes]
+            finally:
+                self._demand_bytes -= n_bytes
+            if len(self._buffer) < self.low_water_bytes:
+                self._wanted.notify()
+        return chunk
+
+    def take_bits(self, n_bits):
+        """Return n_bits random bits as a uint8 array of 0/1 values."""
+        packed = np.frombuffer(self.take_bytes((n_bits + 7) // 8), dtype=np.uint8)
+        return np.unpackbits(packed, count=n_bits)
+
+    def _target_bytes(self):
+        return max(self.capacity_bytes, self._demand_bytes)
+
+    def _needs_refill(self):
+        return len(self._buffer) < self.low_water_bytes or len(self._buffer) < self._demand_bytes
+
+    def _refill_loop(self):
+        while True:
+            with self._lock:
+                while not self._closed and not self._needs_refill():
+                    self._wanted.wait()
+                if self._closed:
+                    return
+            while True:
+                try:
+                    chunk = self._run_job()
+                except Exception as e:
+                    with self._lock:
+                        self._error = e
+                        self._closed = True
+                        self._filled.notify_all()
+                    return
+                with self._lock:
+                    self._buffer += chunk
+                    self._filled.notify_all()
+                    if self._closed or len(self._buffer) >= self._target_bytes():
+                        break
+
+    def _run_job(self):
+        options = {'shots': self.shots_per_job, 'memory': True}
+        if self._seeds is not None:
+            options['seed_simulator'] = int(self._seeds.integers(0, 2**31 - 1))
+        memory = self._backend.run(self._compiled, **options).result().get_memory()
+        bits = np.frombuffer(''.join(memory).encode('ascii'), dtype=np.uint8) & 1
+        return np.packbits(bits).tobytes()
@@ -0,0 +1,73 @@
+import struct
+
+# Every message on a QKD socket is an 8-byte big-endian length followed by the payload.
+LENGTH = struct.Struct('>Q')
+# Largest frame accepted unless the caller passes its own limit; JSON replies for
+# multi-million-qubit exchanges stay well below it
+DEFAULT_MAX_FRAME_SIZE = 1 << 28
+RECV_CHUNK_SIZE = 1 << 20
+COALESCE_LIMIT = 1 << 16
+
+
+def send_frame(sock, payload):
+    """Send one length-prefixed frame. payload may be bytes, bytearray or memoryview."""
+    header = LENGTH.pack(len(payload))
+    if len(payload) <= COALESCE_LIMIT:
+        sock.sendall(header + bytes(payload))
+    else:
+        # Large payloads go out as-is instead of being copied behind the header
+        sock.sendall(header)
+        sock.sendall(payload)
+
+
+def recv_frame(sock, max_size=DEFAULT_MAX_FRAME_SIZE):
+    """Receive one frame of at most max_size bytes.
+
+    The buffer grows as data arrives rather than to the announced length up
+    front, so a peer cannot make us allocate more than it actually sends.
+    """
+    length = _recv_length(sock, max_size)
+    buffer = bytearray(min(length, RECV_CHUNK_SIZE))
+    received = 0
+    while received < length:
+        if received == len(buffer):
+            buffer.extend(bytes(min(len(buffer), length - received)))
+        received += _recv_into(sock, memoryview(buffer)[received:], received, length)
+    return buffer
+
+
+async def send_frame_async(writer, payload):
+    """asyncio counterpart of send_frame for a StreamWriter."""
+    writer.write(LENGTH.pack(len(payload)))
+    writer.write(payload)
+    await writer.drain()
+
+
+async def recv_frame_async(reader, max_size=DEFAULT_MAX_FRAME_SIZE):
+    """asyncio counterpart of recv_frame; raises asyncio.IncompleteReadError on EOF.
+
+    readexactly() accumulates the payload as it arrives, so memory again
+    follows the bytes actually received.
+    """
+    (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    if length > max_size:
+        raise ValueError(f"Frame of {length} bytes exceeds the {max_size} byte limit")
+    return await reader.readexactly(length)
+
+
+def _recv_length(sock, max_size):
+    header = bytearray(LENGTH.size)
+    received = 0
+    while received < LENGTH.size:
+        received += _recv_into(sock, memoryview(header)[received:], received, LENGTH.size)
+    (length,) = LENGTH.unpack(header)
+    if length > max_size:
+        raise ValueError(f"Frame of {length} bytes exceeds the {max_size} byte limit")
+    return length
+
+
+def _recv_into(sock, view, received, total):
+    n = sock.recv_into(view, min(len(view), RECV_CHUNK_SIZE))
+    if n == 0:
+        raise ConnectionError(f"Connection closed after {received} of {total} bytes")
+    return n
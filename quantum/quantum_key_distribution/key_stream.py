@@ -0,0 +1,233 @@
+import threading
+import time
+
+import numpy as np
+
+from quantum.quantum_key_distribution.postprocessing import DEFAULT_EPSILON
+from quantum.quantum_key_distribution.protocol import ReceiverSession, SenderSession
+from quantum.quantum_key_distribution.qber import DEFAULT_ABORT_THRESHOLD, DEFAULT_SAMPLE_FRACTION
+from quantum.quantum_key_distribution.wire_format import PACKED_FORMAT, decode_message
+
+DEFAULT_ROUND_QUBITS = 1 << 20
+DEFAULT_CAPACITY_BYTES = 1 << 20
+
+
+class KeyRingBuffer:
+    """Fixed-size FIFO of secure key bytes shared by a producer and its consumers.
+
+    Key material is handed out at most once: take() returns the oldest bytes
+    and zeroes their slots. A full buffer makes put() wait for consumers
+    rather than overwrite key nobody has used yet.
+    """
+
+    def __init__(self, capacity_bytes=DEFAULT_CAPACITY_BYTES):
+        if capacity_bytes <= 0:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity_bytes
+        self._data = bytearray(capacity_bytes)
+        self._head = 0
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._readable = threading.Condition(self._lock)
+        self._writable = threading.Condition(self._lock)
+
+    @property
+    def available(self):
+        with self._lock:
+            return self._size
+
+    def close(self):
+        """Wake every waiter; buffered key can still be taken afterwards."""
+        with self._lock:
+            self._closed = True
+            self._readable.notify_all()
+            self._writable.notify_all()
+
+    def put(self, data, timeout=None):
+        """Append data, waiting for space; returns the number of bytes stored.
+
+        Returns early with fewer bytes if the buffer is closed or the timeout
+        expires while waiting.
+        """
+        view = memoryview(data).cast('B')
+        deadline = None if timeout is None else time.monotonic() + timeout
+        written = 0
+        with self._lock:
+            while written < len(view):
+                while self._size == self.capacity and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return written
+                    self._writable.wait(remaining)
+                if self._closed:
+                    return written
+                tail = (self._head + self._size) % self.capacity
+                n = min(len(view) - written, self.capacity - self._size, self.capacity - tail)
+                self._data[tail:tail + n] = view[written:written + n]
+                self._size += n
+                written += n
+                self._readable.notify_all()
+        return written
+
+    def take(self, n_bytes, timeout=None):
+        """Remove and return the next n_bytes of key, waiting until that much is buffered."""
+        if n_bytes > self.capacity:
+            raise ValueError(f"Cannot take more than the buffer capacity of {self.capacity} bytes")
+        with self._lock:
+            if not self._readable.wait_for(lambda: self._size >= n_bytes or self._closed, timeout):
+                raise TimeoutError(f"Only {self._size} of {n_bytes} key bytes available")
+            if self._size < n_bytes:
+                raise RuntimeError("Key stream is closed")
+            out = bytearray(n_bytes)
+            first = min(n_bytes, self.capacity - self._head)
+            out[:first] = self._data[self._head:self._head + first]
+            out[first:] = self._data[:n_bytes - first]
+            # Consumed key must not linger in memory
+            self._data[self._head:self._head + first] = bytes(first)
+            self._data[:n_bytes - first] = bytes(n_bytes - first)
+            self._head = (self._head + n_bytes) % self.capacity
+            self._size -= n_bytes
+            self._writable.notify_all()
+        return bytes(out)
+
+
+class KeyStream:
+    """Back-to-back BB84 rounds in a background thread feeding two key buffers.
+
+    Each round runs a sender/receiver session pair in-process (optionally
+    through channel models), estimates the QBER on a published sample,
+    aborts above the threshold, and otherwise reconciles and
+    privacy-amplifies the rest through the sessions' Cascade exchange. The
+    secure bytes go to both `sender_keys` and `receiver_keys`, so the two
+    ends of a secure channel draw identical key with take(n_bytes).
+    """
+
+    def __init__(self, round_qubits=DEFAULT_ROUND_QUBITS, capacity_bytes=DEFAULT_CAPACITY_BYTES,
+                 channel=None, seed=None, engine=None, sample_fraction=DEFAULT_SAMPLE_FRACTION,
+                 abort_threshold=DEFAULT_ABORT_THRESHOLD, epsilon=DEFAULT_EPSILON, start=True):
+        self.round_qubits = round_qubits
+        self.channel = list(channel or ())
+        self.engine = engine
+        self.sample_fraction = sample_fraction
+        self.abort_threshold = abort_threshold
+        self.epsilon = epsilon
+        self.sender_keys = KeyRingBuffer(capacity_bytes)
+        self.receiver_keys = KeyRingBuffer(capacity_bytes)
+        self.stats = {'rounds': 0, 'aborted': 0, 'unverified': 0, 'secure_bytes': 0,
+                      'last_qber': None, 'elapsed': 0.0}
+
+        self._seeds = np.random.SeedSequence(seed)
+        self._closed = False
+        self._error = None
+        self._lock = threading.Lock()
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(target=self._run_loop, daemon=True)
+                self._thread.start()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self.sender_keys.close()
+        self.receiver_keys.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def key_rate(self):
+        """Secure key bits produced per second of round time so far."""
+        elapsed = self.stats['elapsed']
+        return self.stats['secure_bytes'] * 8 / elapsed if elapsed else 0.0
+
+    def take(self, n_bytes, timeout=None):
+        """Next n_bytes of the sender's key; take_receiver returns the same bytes for the receiver."""
+        return self._take(self.sender_keys, n_bytes, timeout)
+
+    def take_receiver(self, n_bytes, timeout=None):
+        return self._take(self.receiver_keys, n_bytes, timeout)
+
+    def _take(self, buffer, n_bytes, timeout):
+        try:
+            return buffer.take(n_bytes, timeout)
+        except RuntimeError:
+            if self._error is not None:
+                raise RuntimeError(f"Key stream failed: {self._error}") from self._error
+            raise
+
+    def run_round(self):
+        """Run one BB84 round; returns the (sender, receiver) secure key bytes it produced (possibly empty)."""
+        rng = np.random.default_rng(self._seeds.spawn(1)[0])
+        sender = SenderSession(rng=rng, engine=self.engine)
+        receiver = ReceiverSession(rng=rng, channel=self.channel, engine=self.engine)
+
+        sender.prepare(self.round_qubits)
+        receiver.accept_quantum_state(decode_message(sender.quantum_state(PACKED_FORMAT)))
+        comparison = sender.receive_measurements(decode_message(receiver.measure()))
+        sender.receive_basis_reply(receiver.receive_basis_comparison(comparison))
+        sample = sender.qber_sample(self.sample_fraction, threshold=self.abort_threshold)
+        estimate = sender.receive_qber_reply(receiver.receive_qber_sample(sample))
+
+        self.stats['rounds'] += 1
+        self.stats['last_qber'] = estimate.qber
+        if estimate.abort:
+            self.stats['aborted'] += 1
+            return b'', b''
+        message = sender.reconcile(epsilon=self.epsilon)
+        while message is not None:
+            reply = receiver.receive_reconciliation(message)
+            message = sender.receive_reconciliation(reply) if reply is not None else None
+        if not sender.verified:
+            self.stats['unverified'] += 1
+            return b'', b''
+        # Drop the zero padding of the last packed byte
+        n_bytes = sender.secure_length // 8
+        return sender.secure_key[:n_bytes], receiver.secure_key[:n_bytes]
+
+    def _run_loop(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+            start = time.perf_counter()
+            try:
+                sender_key, receiver_key = self.run_round()
+            except Exception as e:
+                self._error = e
+                self.sender_keys.close()
+                self.receiver_keys.close()
+                return
+            self.stats['elapsed'] += time.perf_counter() - start
+            if sender_key:
+                self.stats['secure_bytes'] += len(sender_key)
+                # Verified keys agree, so both buffers see the same bytes in the same order
+                self.sender_keys.put(sender_key)
+                self.receiver_keys.put(receiver_key)
+
+
+if __name__ == "__main__":
+    from quantum.quantum_key_distribution.channel import DepolarizingChannel
+
+    with KeyStream(channel=[DepolarizingChannel(0.04)], seed=2024) as stream:
+        start = time.perf_counter()
+        for _ in range(8):
+            alice_key = stream.take(32 * 1024)
+            bob_key = stream.take_receiver(32 * 1024)
+            assert alice_key == bob_key
+        elapsed = time.perf_counter() - start
+        print(f"Took 256 KiB of matching key in {elapsed:.2f} s")
+        print(f"Stats: {stream.stats}")
+        print(f"Secure key rate: {stream.key_rate / 1e6:.3f} Mbit/s")
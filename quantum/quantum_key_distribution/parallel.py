@@ -0,0 +1,124 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import make_rng, measure, random_bits
+
+DEFAULT_SHARD_SIZE = 1 << 20
+
+
+def seed_sequence(seed=None):
+    """SeedSequence for `seed`, which may also be a Generator (one draw is taken from it)."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        return np.random.SeedSequence(int(seed.integers(2**63)))
+    return np.random.SeedSequence(seed)
+
+
+def shard_bounds(n, shard_size):
+    return [(start, min(start + shard_size, n)) for start in range(0, n, shard_size)]
+
+
+class ShardedEngine:
+    """Runs BB84 bit generation and measurement over qubit shards on a process pool.
+
+    Inputs and outputs live in one shared-memory block that every worker
+    maps, so only shard bounds and seeds are pickled. Shard i draws its
+    randomness from the i-th child of the caller's SeedSequence, making the
+    output a function of (seed, shard_size) alone: the worker count and the
+    order in which shards finish do not matter, and workers=1 runs the same
+    shards in-process.
+
+    Jobs no larger than one shard never touch the pool, which is created on
+    first use and kept until close().
+    """
+
+    def __init__(self, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+        if shard_size <= 0:
+            raise ValueError("Shard size must be positive")
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def random_bits(self, n_bits, seed=None):
+        """n_bits uniformly random bits, generated shard by shard."""
+        return self._run(_random_bits_shard, n_bits, (), seed)
+
+    def measure(self, bits, bases, measure_bases, seed=None, backend='numpy'):
+        """Sharded equivalent of bb84_simulation.measure."""
+        bits = np.asarray(bits, dtype=np.uint8)
+        bases = np.asarray(bases, dtype=np.uint8)
+        measure_bases = np.asarray(measure_bases, dtype=np.uint8)
+        if not (bits.shape == bases.shape == measure_bases.shape):
+            raise ValueError("bits, bases and measure_bases must have the same length")
+        return self._run(_measure_shard, bits.size, (bits, bases, measure_bases), seed, backend)
+
+    def _run(self, task, n, inputs, seed, *extra):
+        bounds = shard_bounds(n, self.shard_size)
+        seeds = seed_sequence(seed).spawn(len(bounds))
+        if self.workers == 1 or len(bounds) <= 1:
+            out = np.empty(n, dtype=np.uint8)
+            for (start, stop), shard_seed in zip(bounds, seeds):
+                out[start:stop] = task(start, stop, [a[start:stop] for a in inputs], shard_seed, *extra)
+            return out
+
+        # Layout: each input array, then the output, n bytes apiece
+        block = shared_memory.SharedMemory(create=True, size=max(1, n * (len(inputs) + 1)))
+        buffer = np.ndarray((len(inputs) + 1, n), dtype=np.uint8, buffer=block.buf)
+        try:
+            for i, array in enumerate(inputs):
+                buffer[i] = array
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [self._pool.submit(_shared_shard, task, block.name, len(inputs), n,
+                                         start, stop, shard_seed, extra)
+                       for (start, stop), shard_seed in zip(bounds, seeds)]
+            for future in futures:
+                future.result()
+            return buffer[-1].copy()
+        finally:
+            # The mapping cannot be closed while a NumPy view still points into it
+            del buffer
+            block.close()
+            block.unlink()
+
+
+def _shared_shard(task, name, n_inputs, n, start, stop, seed, extra):
+    block = _attach(name)
+    buffer = np.ndarray((n_inputs + 1, n), dtype=np.uint8, buffer=block.buf)
+    try:
+        buffer[-1, start:stop] = task(start, stop, buffer[:n_inputs, start:stop], seed, *extra)
+    finally:
+        del buffer
+        block.close()
+
+
+def _attach(name):
+    # Only the creating process may unlink the block (track= is new in Python 3.13)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _random_bits_shard(start, stop, inputs, seed):
+    return random_bits(stop - start, make_rng(seed))
+
+
+def _measure_shard(start, stop, inputs, seed, backend):
+    bits, bases, measure_bases = inputs
+    return measure(bits, bases, measure_bases, backend=backend, rng=make_rng(seed))
@@ -0,0 +1,404 @@
+import hashlib
+import math
+import time
+import numpy as np
+
+CASCADE_PASSES = 4
+# Block size for the first Cascade pass is about 0.73 / QBER (Brassard & Salvail)
+CASCADE_FIRST_BLOCK_FACTOR = 0.73
+VERIFY_TAG_BITS = 64
+DEFAULT_EPSILON = 1e-10
+
+
+def to_bits(key, n_bits=None):
+    """Accept a 0/1 array or packed bytes / packed uint8 array and return a uint8 bit array."""
+    if isinstance(key, (bytes, bytearray, memoryview)):
+        return np.unpackbits(np.frombuffer(key, dtype=np.uint8), count=n_bits)
+    key = np.asarray(key, dtype=np.uint8)
+    if n_bits is not None and key.size != n_bits:
+        return np.unpackbits(key, count=n_bits)
+    return key
+
+
+def binary_entropy(p):
+    if p <= 0 or p >= 1:
+        return 0.0
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+def secure_key_length(n_bits, qber, leaked_bits, epsilon=DEFAULT_EPSILON):
+    """Asymptotic BB84 secure key length after error correction has leaked `leaked_bits`.
+
+    n(1 - h(Q)) bounds what Eve can know from the quantum channel; the
+    disclosed parities and a 2*log2(1/epsilon) privacy amplification margin
+    are subtracted from that.
+    """
+    length = n_bits * (1 - binary_entropy(qber)) - leaked_bits - 2 * math.log2(1 / epsilon)
+    return max(0, int(math.floor(length)))
+
+
+class CascadeResult:
+    def __init__(self, bits, leaked_bits, corrected, rounds):
+        self.bits = bits
+        self.leaked_bits = leaked_bits
+        self.corrected = corrected
+        self.rounds = rounds
+
+
+def first_block_size(n_bits, qber):
+    """Block size of the first Cascade pass for a key of n_bits at the given QBER."""
+    block = int(CASCADE_FIRST_BLOCK_FACTOR / max(qber, 1e-4))
+    return min(max(block, 4), max(n_bits, 1))
+
+
+def cascade_plan(n_bits, block, passes=CASCADE_PASSES, seed=None):
+    """(block size, shuffle) of every Cascade pass.
+
+    The first pass keeps the key order and each later one doubles the block
+    and draws an affine shuffle from `seed`, so both parties derive the same
+    plan from (block, passes, seed) alone.
+    """
+    if n_bits == 0:
+        return []
+    rng = np.random.default_rng(seed)
+    block = min(block, n_bits)
+    plan = []
+    for pass_index in range(passes):
+        shuffle = (1, 0, 1, 0) if pass_index == 0 else _affine_shuffle(n_bits, rng)
+        plan.append((block, shuffle))
+        block = min(2 * block, n_bits)
+    return plan
+
+
+def _check_cascade_args(block, passes):
+    for name, value in (('block size', block), ('passes', passes)):
+        if not isinstance(value, (int, np.integer)) or isinstance(value, bool) or value <= 0:
+            raise ValueError(f"Cascade {name} must be a positive integer")
+
+
+def _shuffled_order(n, shuffle):
+    """Key positions in a pass's shuffled order: order[k] is the k-th position."""
+    return (shuffle[0] * np.arange(n, dtype=np.int64) + shuffle[1]) % n
+
+
+def _word_parity(words):
+    """Parity of each uint64 word, folded down with shifts and XORs."""
+    for shift in (32, 16, 8, 4, 2, 1):
+        words = words ^ (words >> np.uint64(shift))
+    return (words & np.uint64(1)).astype(np.uint8)
+
+
+class _PackedParities:
+    """Parities of ranges of a bit sequence kept as 64-bit words.
+
+    Bit k sits in word k // 64, and `prefix[j]` is the parity of the first
+    j words, so the parity of [start, stop) takes two word lookups and two
+    masked word parities however long the range is.
+    """
+
+    def __init__(self, bits):
+        packed = np.packbits(bits, bitorder='little')
+        # One spare word so that a range may stop at the very end
+        self.words = np.zeros(bits.size // 64 + 1, dtype='<u8')
+        self.words.view(np.uint8)[:packed.size] = packed
+        self.prefix = np.zeros(self.words.size, dtype=np.uint8)
+        np.bitwise_xor.accumulate(_word_parity(self.words[:-1]), out=self.prefix[1:])
+
+    def _parity_before(self, k):
+        word = k >> 6
+        mask = (np.uint64(1) << (k & 63).astype(np.uint64)) - np.uint64(1)
+        return self.prefix[word] ^ _word_parity(self.words[word] & mask)
+
+    def ranges(self, starts, stops):
+        return self._parity_before(stops) ^ self._parity_before(starts)
+
+
+class CascadeResponder:
+    """Alice's side of Cascade: answers Bob's parity queries on her key.
+
+    A query names a pass and ranges [start, stop) of that pass's shuffled
+    order, or no ranges for the parities of all of the pass's blocks. Every
+    parity handed out is counted in `leaked_bits`.
+    """
+
+    def __init__(self, bits, block, passes=CASCADE_PASSES, seed=None):
+        _check_cascade_args(block, passes)
+        self.bits = to_bits(bits)
+        self.plan = cascade_plan(self.bits.size, block, passes, seed)
+        self.leaked_bits = 0
+        self._packed = {}
+
+    def parities(self, pass_index, starts=None, stops=None):
+        if not 0 <= pass_index < len(self.plan):
+            raise ValueError(f"No Cascade pass {pass_index}")
+        n = self.bits.size
+        block, shuffle = self.plan[pass_index]
+        packed = self._packed.get(pass_index)
+        if packed is None:
+            # The key in this pass's order, packed once and queried for the rest of the run
+            packed = _PackedParities(self.bits[_shuffled_order(n, shuffle)])
+            self._packed[pass_index] = packed
+        if starts is None:
+            starts = np.arange(0, n, block)
+            stops = np.minimum(starts + block, n)
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        if starts.shape != stops.shape or starts.ndim != 1:
+            raise ValueError("Parity ranges need one stop per start")
+        if starts.size and (starts.min() < 0 or stops.max() > n or np.any(starts > stops)):
+            raise ValueError("Parity range outside the key")
+        self.leaked_bits += starts.size
+        return packed.ranges(starts, stops)
+
+
+class CascadeCorrector:
+    """Bob's side of Cascade: corrects his key towards Alice's from the parities he asks for.
+
+        query = corrector.next_query()      # (pass_index, starts, stops), None when done
+        corrector.receive_parities(parities)
+
+    Each pass starts with the parities of all its blocks (starts and stops
+    are None). All odd blocks of the earliest pass that has any are then
+    bisected together, one query per halving, so the number of round trips
+    grows with the block size rather than with the number of errors. A
+    located error is flipped and re-checked against every earlier pass,
+    which is the cascade. Only Bob's bits are touched; `bits` holds the
+    corrected key.
+    """
+
+    def __init__(self, bits, block, passes=CASCADE_PASSES, seed=None):
+        _check_cascade_args(block, passes)
+        self.bits = to_bits(bits).copy()
+        self.plan = cascade_plan(self.bits.size, block, passes, seed)
+        self.leaked_bits = 0
+        self.rounds = 0
+        self._corrected = []
+        self._mismatched = []
+        self._bisection = None
+        self._query = None
+
+    @property
+    def corrected(self):
+        return sum(positions.size for positions in self._corrected)
+
+    def next_query(self):
+        if self._query is not None:
+            return self._query
+        if self._bisection is None:
+            odd_pass = next((p for p, odd in enumerate(self._mismatched) if odd.any()), None)
+            if odd_pass is None:
+                if len(self._mismatched) == len(self.plan):
+                    return None
+                self._query = (len(self._mismatched), None, None)
+                return self._query
+            self._bisection = self._start_bisection(odd_pass)
+
+        pass_index, odd_blocks, index, prefix, lo, hi = self._bisection
+        active = hi - lo > 1
+        if not active.any():
+            self._finish_bisection()
+            return self.next_query()
+        block = self.plan[pass_index][0]
+        mid = (lo + hi) // 2
+        base = odd_blocks[active] * block
+        self._query = (pass_index, base + lo[active], base + mid[active])
+        return self._query
+
+    def receive_parities(self, parities):
+        if self._query is None:
+            raise ValueError("No Cascade parities were asked for")
+        pass_index, starts, stops = self._query
+        parities = np.asarray(parities, dtype=np.uint8)
+        n = self.bits.size
+        block, shuffle = self.plan[pass_index]
+        if starts is None:
+            starts = np.arange(0, n, block)
+            if parities.shape != starts.shape:
+                raise ValueError("Wrong number of Cascade parities")
+            own = _PackedParities(self.bits[_shuffled_order(n, shuffle)])
+            self._mismatched.append(own.ranges(starts, np.minimum(starts + block, n)) != parities)
+        else:
+            if parities.shape != starts.shape:
+                raise ValueError("Wrong number of Cascade parities")
+            _, odd_blocks, index, prefix, lo, hi = self._bisection
+            active = np.flatnonzero(hi - lo > 1)
+            mid = (lo[active] + hi[active]) // 2
+            own = prefix[active, mid] ^ prefix[active, lo[active]]
+            # A differing left half holds the error
+            left = own != parities
+            hi[active] = np.where(left, mid, hi[active])
+            lo[active] = np.where(left, lo[active], mid)
+        self.leaked_bits += parities.size
+        self._query = None
+
+    def _start_bisection(self, pass_index):
+        """Gather the odd blocks as one (n_odd, block) matrix with a running parity per row."""
+        n = self.bits.size
+        block, shuffle = self.plan[pass_index]
+        odd_blocks = np.flatnonzero(self._mismatched[pass_index])
+        offsets = odd_blocks[:, None] * block + np.arange(block)
+        valid = offsets < n
+        index = (shuffle[0] * np.minimum(offsets, n - 1) + shuffle[1]) % n
+        prefix = np.zeros((odd_blocks.size, block + 1), dtype=np.uint8)
+        np.bitwise_xor.accumulate(self.bits[index] & valid, axis=1, out=prefix[:, 1:])
+        lo = np.zeros(odd_blocks.size, dtype=np.int64)
+        hi = np.minimum(block, n - odd_blocks * block)
+        return pass_index, odd_blocks, index, prefix, lo, hi
+
+    def _finish_bisection(self):
+        _, odd_blocks, index, _, lo, _ = self._bisection
+        self._bisection = None
+        n = self.bits.size
+        positions = index[np.arange(odd_blocks.size), lo]
+        self.bits[positions] ^= 1
+        self._corrected.append(positions)
+        self.rounds += 1
+        for p, mismatched in enumerate(self._mismatched):
+            block, shuffle = self.plan[p]
+            blocks = (shuffle[2] * (positions - shuffle[3])) % n // block
+            mismatched ^= (np.bincount(blocks, minlength=mismatched.size) & 1).astype(bool)
+
+
+def cascade(alice_bits, bob_bits, qber, passes=CASCADE_PASSES, seed=None):
+    """Cascade error correction of Bob's key towards Alice's, with both keys in one process.
+
+    Runs the CascadeResponder / CascadeCorrector exchange locally; every
+    parity Alice answers is counted in `leaked_bits`. The sessions in
+    protocol/ run the same exchange over messages.
+    """
+    alice = to_bits(alice_bits)
+    bob = to_bits(bob_bits)
+    n = alice.size
+    if bob.size != n:
+        raise ValueError("Alice's and Bob's keys must have the same length")
+    if n == 0:
+        return CascadeResult(bob.copy(), 0, 0, 0)
+
+    block = first_block_size(n, qber)
+    responder = CascadeResponder(alice, block, passes, seed)
+    corrector = CascadeCorrector(bob, block, passes, seed)
+    query = corrector.next_query()
+    while query is not None:
+        corrector.receive_parities(responder.parities(*query))
+        query = corrector.next_query()
+    return CascadeResult(corrector.bits, corrector.leaked_bits, corrector.corrected, corrector.rounds)
+
+
+def _affine_shuffle(n, rng):
+    """Random permutation i -> (a*i + b) mod n, with gcd(a, n) = 1.
+
+    Neighbouring positions land about a apart, which is what Cascade's later
+    passes need to split up errors that shared a block earlier, and both the
+    permutation and its inverse are plain arithmetic rather than 1M-entry
+    shuffles and scatters. Returns (a, b, a^-1 mod n, b).
+    """
+    while True:
+        multiplier = int(rng.integers(n // 4 + 1, 3 * n // 4 + 2)) if n > 4 else 1
+        if math.gcd(multiplier, n) == 1:
+            break
+    offset = int(rng.integers(0, n))
+    return multiplier, offset, pow(multiplier, -1, n), offset
+
+
+def toeplitz_seed(n_bits, out_bits, seed=None):
+    """Random bits defining an out_bits x n_bits Toeplitz matrix (n_bits + out_bits - 1 of them)."""
+    return np.random.default_rng(seed).integers(0, 2, size=n_bits + out_bits - 1, dtype=np.uint8)
+
+
+def toeplitz_hash(bits, out_bits, seed_bits):
+    """Multiply the key by the Toeplitz matrix T[i, j] = seed[i - j + n - 1] over GF(2).
+
+    T @ x is a slice of the convolution of seed and x, so it is computed with
+    real FFTs in O(n log n) instead of building the matrix. A circular
+    convolution of length n + out_bits - 1 suffices because wrap-around only
+    lands on the discarded first n - 1 outputs. Integer sums stay below n,
+    far inside float64's exact range, and are rounded before taking parity.
+    """
+    bits = to_bits(bits)
+    n = bits.size
+    if out_bits <= 0 or n == 0:
+        return np.zeros(0, dtype=np.uint8)
+    seed_bits = np.asarray(seed_bits, dtype=np.uint8)
+    if seed_bits.size != n + out_bits - 1:
+        raise ValueError("Toeplitz seed must have n_bits + out_bits - 1 bits")
+    size = 1 << (seed_bits.size - 1).bit_length()
+    spectrum = np.fft.rfft(seed_bits, size) * np.fft.rfft(bits, size)
+    conv = np.fft.irfft(spectrum, size)[n - 1:n - 1 + out_bits]
+    return (np.rint(conv).astype(np.int64) & 1).astype(np.uint8)
+
+
+def privacy_amplification(bits, out_bits, seed=None):
+    """Compress the reconciled key to out_bits with a seeded Toeplitz hash; returns packed bytes."""
+    bits = to_bits(bits)
+    hashed = toeplitz_hash(bits, out_bits, toeplitz_seed(bits.size, out_bits, seed))
+    return np.packbits(hashed).tobytes()
+
+
+def verification_tag(bits):
+    digest = hashlib.sha256(np.packbits(to_bits(bits)).tobytes()).digest()
+    return digest[:VERIFY_TAG_BITS // 8]
+
+
+class PostProcessResult:
+    """Outcome of reconciliation plus privacy amplification for one sifted key."""
+
+    def __init__(self, n_sifted, qber, cascade_result, verified, final_length, key, elapsed):
+        self.n_sifted = n_sifted
+        self.qber = qber
+        self.corrected_errors = cascade_result.corrected
+        self.cascade_rounds = cascade_result.rounds
+        self.leaked_bits = cascade_result.leaked_bits + VERIFY_TAG_BITS
+        self.verified = verified
+        self.final_length = final_length
+        self.key = key
+        self.elapsed = elapsed
+        self.key_rate = final_length / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        return {
+            'n_sifted': self.n_sifted,
+            'qber': self.qber,
+            'corrected_errors': self.corrected_errors,
+            'cascade_rounds': self.cascade_rounds,
+            'leaked_bits': self.leaked_bits,
+            'verified': self.verified,
+            'final_length': self.final_length,
+            'elapsed': self.elapsed,
+            'key_rate': self.key_rate,
+        }
+
+
+def postprocess(alice_key, bob_key, qber, n_bits=None, seed=None, epsilon=DEFAULT_EPSILON):
+    """Cascade, verify and privacy-amplify a sifted key pair.
+
+    Keys may be 0/1 arrays or packed bytes (pass n_bits for packed input).
+    Returns a PostProcessResult whose `key` holds the final secure key as
+    packed bytes; it is empty if verification failed or no secure length
+    remains after subtracting the leaked bits.
+    """
+    start = time.perf_counter()
+    alice = to_bits(alice_key, n_bits)
+    bob = to_bits(bob_key, n_bits)
+    seeds = np.random.SeedSequence(seed).spawn(2)
+
+    reconciled = cascade(alice, bob, qber, seed=seeds[0])
+    verified = verification_tag(alice) == verification_tag(reconciled.bits)
+    final_length = 0
+    key = b''
+    if verified:
+        final_length = secure_key_length(alice.size, qber,
+                                         reconciled.leaked_bits + VERIFY_TAG_BITS, epsilon)
+        key = privacy_amplification(reconciled.bits, final_length, seeds[1])
+    return PostProcessResult(alice.size, qber, reconciled, verified, final_length, key,
+                             time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(2024)
+    n_bits, qber = 1_000_000, 0.02
+    alice_key = rng.integers(0, 2, size=n_bits, dtype=np.uint8)
+    bob_key = alice_key ^ (rng.random(n_bits) < qber).astype(np.uint8)
+    result = postprocess(np.packbits(alice_key).tobytes(), np.packbits(bob_key).tobytes(),
+                         qber, n_bits=n_bits, seed=7)
+    for key, value in result.stats().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,18 @@
+"""Headless BB84 protocol: sender, receiver and eavesdropper state machines.
+
+The sessions exchange plain dicts / bytes and NumPy arrays and never touch a
+socket or a widget, so GUIs, benchmarks and servers drive the same logic.
+"""
+from quantum.quantum_key_distribution.protocol.eavesdropper import EavesdropperSession
+from quantum.quantum_key_distribution.protocol.messages import (
+    BASIS_COMPARISON, CASCADE_DONE, CASCADE_PARITIES, CASCADE_QUERY, CASCADE_START, MEASUREMENTS,
+    PRIVACY_AMPLIFICATION, QBER_RESULT, QBER_SAMPLE, QUANTUM_STATE, REQUEST, SIFTED, UNKNOWN, message_kind)
+from quantum.quantum_key_distribution.protocol.receiver import ReceiverSession
+from quantum.quantum_key_distribution.protocol.sender import SenderSession
+
+__all__ = [
+    'BASIS_COMPARISON', 'CASCADE_DONE', 'CASCADE_PARITIES', 'CASCADE_QUERY', 'CASCADE_START',
+    'MEASUREMENTS', 'PRIVACY_AMPLIFICATION', 'QBER_RESULT', 'QBER_SAMPLE', 'QUANTUM_STATE', 'REQUEST',
+    'SIFTED', 'UNKNOWN',
+    'EavesdropperSession', 'ReceiverSession', 'SenderSession', 'message_kind',
+]
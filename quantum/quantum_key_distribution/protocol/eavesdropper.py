@@ -0,0 +1,75 @@
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array, make_rng, random_bases
+from quantum.quantum_key_distribution.channel import ChannelState, intercept_resend
+from quantum.quantum_key_distribution.protocol.messages import parse_quantum_state, quantum_state_message
+from quantum.quantum_key_distribution.transcript import EAVESDROPPER, recorded
+from quantum.quantum_key_distribution.wire_format import JSON_FORMAT, PACKED_FORMAT, encode_quantum_state
+
+AWAITING_STATE = 'awaiting_state'
+READY_TO_INTERCEPT = 'ready_to_intercept'
+COMPLETE = 'complete'
+
+
+class EavesdropperSession:
+    """Intercept-resend eavesdropper (Eve) with no I/O of its own.
+
+        session.accept_quantum_state(state)
+        forwarded = session.intercept()   -> to receiver in the sender's wire format
+
+    Every other message is relayed unchanged by the caller. Only a random
+    fraction `rate` of the qubits is intercepted; the rest are forwarded
+    untouched. Steps are logged in `steps` for transcript.capture.
+    """
+
+    role = EAVESDROPPER
+
+    def __init__(self, backend='numpy', rng=None, rate=1.0):
+        if not 0 <= rate <= 1:
+            raise ValueError("Intercept rate must be in [0, 1]")
+        self.backend = backend
+        self.rate = rate
+        self.rng = make_rng(rng)
+        self.reset()
+
+    def reset(self):
+        self.state = AWAITING_STATE
+        self.steps = []
+        self.n_bits = 0
+        self.wire_format = JSON_FORMAT
+        self.sender_x = None
+        self.sender_h = None
+        self.received_state = None
+        self.bases = None
+        self.measurements = None
+        self.matched = None
+        self.intercepted = None
+
+    @recorded('accept_quantum_state')
+    def accept_quantum_state(self, message):
+        n_bits, sender_x, sender_h = parse_quantum_state(message)
+        self.reset()
+        self.n_bits = n_bits
+        self.sender_x, self.sender_h = sender_x, sender_h
+        self.received_state = encode_quantum_state(sender_x, sender_h)
+        self.wire_format = PACKED_FORMAT if message.get('wire_format') == PACKED_FORMAT else JSON_FORMAT
+        self.state = READY_TO_INTERCEPT
+        return n_bits
+
+    @recorded('intercept')
+    def intercept(self, bases=None, start_time=None):
+        """Measure the intercepted qubits and return the re-prepared state to forward."""
+        if self.state != READY_TO_INTERCEPT:
+            raise ValueError("No quantum state to intercept")
+        if bases is None:
+            bases = random_bases(self.n_bits, self.rng)
+        bases = bases_to_array(bases)
+        if bases.size != self.n_bits:
+            raise ValueError("Number of measurement bases does not match the quantum state")
+        self.bases = bases
+        channel_state = ChannelState(self.sender_x, self.sender_h)
+        intercept_resend(channel_state, self.rate, self.rng, bases, self.backend)
+        self.intercepted = channel_state.intercepted
+        self.measurements = channel_state.eve_bits
+        self.matched = (bases == self.sender_h) & self.intercepted
+        self.sender_x = self.sender_h = None
+        self.state = COMPLETE
+        return quantum_state_message(channel_state.x, channel_state.h, self.wire_format, start_time)
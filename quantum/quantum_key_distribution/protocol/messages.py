@@ -0,0 +1,249 @@
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import (
+    array_to_bases, arrays_to_circuit_ops, bases_to_array, circuit_ops_to_arrays)
+from quantum.quantum_key_distribution.wire_format import (
+    JSON_FORMAT, PACKED_FORMAT, encode_measurements, encode_quantum_state)
+
+QUANTUM_STATE = 'quantum_state'
+MEASUREMENTS = 'measurements'
+BASIS_COMPARISON = 'basis_comparison'
+SIFTED = 'sifted'
+QBER_SAMPLE = 'qber_sample'
+QBER_RESULT = 'qber_result'
+CASCADE_START = 'cascade_start'
+CASCADE_QUERY = 'cascade_query'
+CASCADE_PARITIES = 'cascade_parities'
+CASCADE_DONE = 'cascade_done'
+PRIVACY_AMPLIFICATION = 'privacy_amplification'
+REQUEST = 'request'
+UNKNOWN = 'unknown'
+
+_PHASES = (SIFTED, QBER_SAMPLE, QBER_RESULT, CASCADE_START, CASCADE_QUERY, CASCADE_PARITIES, CASCADE_DONE,
+           PRIVACY_AMPLIFICATION)
+
+
+def message_kind(message):
+    """Classify a decoded message so peers can dispatch without poking at its keys."""
+    if 'x_applied' in message or 'circuit_operations' in message:
+        return QUANTUM_STATE
+    if 'sender_bases' in message:
+        return BASIS_COMPARISON
+    if message.get('phase') in _PHASES:
+        return message['phase']
+    if 'bob_bases' in message:
+        return MEASUREMENTS
+    if 'request' in message:
+        return REQUEST
+    return UNKNOWN
+
+
+def quantum_state_message(bits, bases, wire_format=JSON_FORMAT, start_time=None):
+    """Quantum state for qubits prepared from `bits` in `bases` (0 = '+', 1 = 'x').
+
+    The packed format comes back as bytes ready for the wire; the JSON format
+    as a dict of circuit operations.
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    bases = bases_to_array(bases)
+    if wire_format == PACKED_FORMAT:
+        return encode_quantum_state(bits, bases, start_time)
+    message = {
+        'circuit_operations': arrays_to_circuit_ops(bits, bases),
+        'n_bits': int(bits.size),
+    }
+    if start_time is not None:
+        message['start_time'] = start_time
+    return message
+
+
+def parse_quantum_state(message):
+    """Return (n_bits, x_applied, h_applied) from a decoded quantum state message."""
+    n_bits = message.get('n_bits')
+    if not isinstance(n_bits, int) or isinstance(n_bits, bool) or n_bits <= 0:
+        raise ValueError("Invalid quantum state data received")
+    if 'x_applied' in message:
+        return n_bits, message['x_applied'], message['h_applied']
+    circuit_ops = message.get('circuit_operations')
+    if circuit_ops is None:
+        raise ValueError("Invalid quantum state data received")
+    x_applied, h_applied = circuit_ops_to_arrays(circuit_ops, n_bits)
+    return n_bits, x_applied, h_applied
+
+
+def measurements_message(bases, detected=None, wire_format=JSON_FORMAT):
+    """Receiver's reply: its bases, plus `detected` when some qubits were lost in the channel.
+
+    This is the only time the bases are sent. The packed format comes back
+    as bytes ready for the wire, the JSON one as '+'/'x' labels. The
+    measured bits never leave the receiver; the sender only learns the ones
+    sampled for the QBER estimate.
+    """
+    bases = np.asarray(bases, dtype=np.uint8)
+    if wire_format == PACKED_FORMAT:
+        return encode_measurements(bases, detected)
+    message = {'bob_bases': array_to_bases(bases)}
+    if detected is not None and not detected.all():
+        message['bob_detected'] = detected.astype(np.uint8).tolist()
+    return message
+
+
+def parse_measurements(message):
+    """Return the receiver's bases as a uint8 array from its reply."""
+    if message_kind(message) != MEASUREMENTS:
+        raise ValueError("No valid quantum measurement response received")
+    return bases_to_array(message['bob_bases'])
+
+
+def parse_detected(message):
+    """Mask of qubits the receiver detected, or None when all of them were."""
+    detected = message.get('bob_detected')
+    if detected is None:
+        return None
+    return np.asarray(detected, dtype=bool)
+
+
+def basis_comparison_message(bases):
+    return {
+        'sender_bases': array_to_bases(bases),
+        'phase': BASIS_COMPARISON,
+    }
+
+
+def parse_basis_comparison(message):
+    sender_bases = message.get('sender_bases')
+    if not sender_bases:
+        raise ValueError("Missing data for basis comparison")
+    return bases_to_array(sender_bases)
+
+
+def sifted_message(n_sifted):
+    """Receiver's reply to the basis comparison: how many bits it kept, for the sender to check."""
+    return {'phase': SIFTED, 'n_sifted': int(n_sifted)}
+
+
+def parse_sifted(message):
+    if message_kind(message) != SIFTED:
+        raise ValueError("Invalid basis comparison result")
+    return _count(message, 'n_sifted')
+
+
+def qber_sample_message(positions, bits, confidence, threshold):
+    """Publish our sifted bits at `positions` so the peer can estimate the QBER."""
+    return {
+        'phase': QBER_SAMPLE,
+        'sample_positions': np.asarray(positions, dtype=np.int64).tolist(),
+        'sample_bits': np.asarray(bits, dtype=np.uint8).tolist(),
+        'confidence': confidence,
+        'abort_threshold': threshold,
+    }
+
+
+def parse_qber_sample(message):
+    """Return (positions, bits, confidence, threshold) from a QBER sample message."""
+    if message_kind(message) != QBER_SAMPLE:
+        raise ValueError("No QBER sample received")
+    positions = np.asarray(message['sample_positions'], dtype=np.int64)
+    bits = np.asarray(message['sample_bits'], dtype=np.uint8)
+    return positions, bits, message['confidence'], message['abort_threshold']
+
+
+def qber_result_message(bits, estimate):
+    """Reply to a QBER sample with our own bits at the sampled positions and our verdict."""
+    message = {
+        'phase': QBER_RESULT,
+        'sample_bits': np.asarray(bits, dtype=np.uint8).tolist(),
+    }
+    message.update(estimate.stats())
+    return message
+
+
+def parse_qber_result(message):
+    if message_kind(message) != QBER_RESULT:
+        raise ValueError("No QBER result received")
+    return np.asarray(message['sample_bits'], dtype=np.uint8)
+
+
+def _count(message, key):
+    value = message.get(key)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError(f"Invalid {key} in {message.get('phase')} message")
+    return value
+
+
+def cascade_start_message(block_size, passes, seed):
+    """Start Cascade: both sides derive every pass's blocks and shuffle from these three numbers."""
+    return {
+        'phase': CASCADE_START,
+        'block_size': int(block_size),
+        'passes': int(passes),
+        'seed': int(seed),
+    }
+
+
+def parse_cascade_start(message):
+    """Return (block_size, passes, seed)."""
+    if message_kind(message) != CASCADE_START:
+        raise ValueError("No Cascade start received")
+    return _count(message, 'block_size'), _count(message, 'passes'), _count(message, 'seed')
+
+
+def cascade_query_message(pass_index, starts=None, stops=None):
+    """Ask for parities of ranges of a pass's shuffled key; no ranges means every block of the pass."""
+    message = {'phase': CASCADE_QUERY, 'pass_index': int(pass_index)}
+    if starts is not None:
+        message['starts'] = np.asarray(starts, dtype=np.int64).tolist()
+        message['stops'] = np.asarray(stops, dtype=np.int64).tolist()
+    return message
+
+
+def parse_cascade_query(message):
+    """Return (pass_index, starts, stops); starts and stops are None for a whole-pass query."""
+    if message_kind(message) != CASCADE_QUERY:
+        raise ValueError("No Cascade query received")
+    pass_index = _count(message, 'pass_index')
+    if 'starts' not in message:
+        return pass_index, None, None
+    return (pass_index, np.asarray(message['starts'], dtype=np.int64),
+            np.asarray(message.get('stops', ()), dtype=np.int64))
+
+
+def cascade_parities_message(parities):
+    return {'phase': CASCADE_PARITIES, 'parities': np.asarray(parities, dtype=np.uint8).tolist()}
+
+
+def parse_cascade_parities(message):
+    if message_kind(message) != CASCADE_PARITIES:
+        raise ValueError("No Cascade parities received")
+    return np.asarray(message['parities'], dtype=np.uint8)
+
+
+def cascade_done_message(tag):
+    """Cascade finished; `tag` is the verification hash of the corrected key."""
+    return {'phase': CASCADE_DONE, 'verification_tag': bytes(tag).hex()}
+
+
+def parse_cascade_done(message):
+    if message_kind(message) != CASCADE_DONE:
+        raise ValueError("No Cascade result received")
+    return bytes.fromhex(message['verification_tag'])
+
+
+def privacy_amplification_message(verified, final_length, seed):
+    """Toeplitz seed and output length; a length of 0 means no secure key is left."""
+    return {
+        'phase': PRIVACY_AMPLIFICATION,
+        'verified': bool(verified),
+        'final_length': int(final_length),
+        'seed': None if seed is None else int(seed),
+    }
+
+
+def parse_privacy_amplification(message):
+    """Return (verified, final_length, seed)."""
+    if message_kind(message) != PRIVACY_AMPLIFICATION:
+        raise ValueError("No privacy amplification parameters received")
+    final_length = _count(message, 'final_length')
+    if final_length:
+        return bool(message.get('verified')), final_length, _count(message, 'seed')
+    return bool(message.get('verified')), 0, None
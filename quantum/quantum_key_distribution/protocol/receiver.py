@@ -0,0 +1,180 @@
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array, make_rng, measure, random_bases
+from quantum.quantum_key_distribution.channel import transmit
+from quantum.quantum_key_distribution.postprocessing import (
+    CascadeCorrector, privacy_amplification, verification_tag)
+from quantum.quantum_key_distribution.protocol.messages import (
+    CASCADE_START, PRIVACY_AMPLIFICATION, cascade_done_message, cascade_query_message, measurements_message,
+    message_kind, parse_basis_comparison, parse_cascade_parities, parse_cascade_start,
+    parse_privacy_amplification, parse_qber_sample, parse_quantum_state, qber_result_message, sifted_message)
+from quantum.quantum_key_distribution.qber import discard_sample, estimate_qber
+from quantum.quantum_key_distribution.sifting import sift
+from quantum.quantum_key_distribution.transcript import RECEIVER, recorded
+from quantum.quantum_key_distribution.wire_format import JSON_FORMAT, PACKED_FORMAT, encode_quantum_state
+
+AWAITING_STATE = 'awaiting_state'
+READY_TO_MEASURE = 'ready_to_measure'
+AWAITING_BASIS_COMPARISON = 'awaiting_basis_comparison'
+COMPLETE = 'complete'
+RECONCILING = 'reconciling'
+AWAITING_AMPLIFICATION = 'awaiting_amplification'
+
+
+class ReceiverSession:
+    """BB84 receiver (Bob) as a state machine with no I/O of its own.
+
+        session.accept_quantum_state(state)
+        reply = session.measure()                           -> to sender
+        reply = session.receive_basis_comparison(message)   -> to sender
+        reply = session.receive_qber_sample(message)        -> to sender (optional)
+        reply = session.receive_reconciliation(message)     -> to sender, until it returns None
+
+    Accepting and measuring are separate steps so an interactive client can
+    choose the measurement bases after the state has arrived. `channel` is a
+    list of channel models (see channel.py) the qubits pass through before
+    being measured; lost qubits are reported to the sender and left out of
+    the sifted key. With a parallel.ShardedEngine, bases and measurements of
+    large states are computed across worker processes.
+
+    Each step is logged in `steps` so transcript.capture can save the run;
+    the state as received is kept bit-packed for the same reason. Replies
+    use the wire format the state arrived in.
+    """
+
+    role = RECEIVER
+
+    def __init__(self, backend='numpy', rng=None, channel=None, engine=None):
+        self.backend = backend
+        self.channel = list(channel or ())
+        self.engine = engine
+        self.rng = make_rng(rng)
+        self.reset()
+
+    def reset(self):
+        self.state = AWAITING_STATE
+        self.steps = []
+        self.n_bits = 0
+        self.start_time = None
+        self.wire_format = JSON_FORMAT
+        self.sender_x = None
+        self.sender_h = None
+        self.received_state = None
+        self.bases = None
+        self.measurements = None
+        self.detected = None
+        self.sender_bases = None
+        self.sifted = None
+        self.key_bits = None
+        self.qber_estimate = None
+        self.sender_sample_bits = None
+        self.verified = None
+        self.corrected_errors = None
+        self.secure_length = None
+        self.secure_key = None
+        self._cascade = None
+
+    @recorded('accept_quantum_state')
+    def accept_quantum_state(self, message):
+        if self.state not in (AWAITING_STATE, READY_TO_MEASURE, COMPLETE, RECONCILING, AWAITING_AMPLIFICATION):
+            raise ValueError(f"Unexpected quantum state while {self.state}")
+        n_bits, sender_x, sender_h = parse_quantum_state(message)
+        self.reset()
+        self.n_bits = n_bits
+        self.sender_x, self.sender_h = sender_x, sender_h
+        self.received_state = encode_quantum_state(sender_x, sender_h)
+        self.start_time = message.get('start_time')
+        self.wire_format = PACKED_FORMAT if message.get('wire_format') == PACKED_FORMAT else JSON_FORMAT
+        self.state = READY_TO_MEASURE
+        return n_bits
+
+    @recorded('measure')
+    def measure(self, bases=None):
+        """Measure the accepted state in `bases` (random when not given) and return the reply."""
+        if self.state != READY_TO_MEASURE:
+            raise ValueError("No quantum state to measure")
+        if bases is None:
+            if self.engine is not None:
+                bases = self.engine.random_bits(self.n_bits, self.rng)
+            else:
+                bases = random_bases(self.n_bits, self.rng)
+        bases = bases_to_array(bases)
+        if bases.size != self.n_bits:
+            raise ValueError("Number of measurement bases does not match the quantum state")
+        self.bases = bases
+        x, h = self.sender_x, self.sender_h
+        if self.channel:
+            arrived = transmit(x, h, self.channel, self.rng)
+            x, h, self.detected = arrived.x, arrived.h, arrived.detected
+        if self.engine is not None:
+            self.measurements = self.engine.measure(x, h, bases, self.rng, self.backend)
+        else:
+            self.measurements = measure(x, h, bases, backend=self.backend, rng=self.rng)
+        # The prepared state is no longer needed once it has been measured
+        self.sender_x = self.sender_h = None
+        self.state = AWAITING_BASIS_COMPARISON
+        return measurements_message(self.bases, self.detected, self.wire_format)
+
+    @recorded('receive_basis_comparison')
+    def receive_basis_comparison(self, message):
+        """Sift against the sender's bases; the reply only confirms how many bits were kept."""
+        if self.state != AWAITING_BASIS_COMPARISON:
+            raise ValueError("Missing data for basis comparison")
+        self.sender_bases = parse_basis_comparison(message)
+        self.sifted = sift(self.sender_bases, self.bases, bits_b=self.measurements,
+                           detected=self.detected)
+        self.key_bits = self.sifted.key_bits
+        self.state = COMPLETE
+        return sifted_message(self.sifted.n_sifted)
+
+    @recorded('receive_qber_sample')
+    def receive_qber_sample(self, message):
+        """Estimate the QBER from Alice's published sample; reply with Bob's bits there.
+
+        The sampled positions are public from now on, so they are dropped from
+        key_bits whatever the verdict.
+        """
+        if self.state != COMPLETE or self.qber_estimate is not None:
+            raise ValueError("QBER can only be estimated once, after sifting")
+        positions, bits, confidence, threshold = parse_qber_sample(message)
+        self.qber_estimate = estimate_qber(self.key_bits, positions, bits, confidence, threshold)
+        self.sender_sample_bits = bits
+        reply = qber_result_message(self.key_bits[positions], self.qber_estimate)
+        self.key_bits = discard_sample(self.key_bits, self.qber_estimate)
+        return reply
+
+    def receive_reconciliation(self, message):
+        """Correct Bob's key with Cascade, asking the sender for parities; returns the next message.
+
+        The sender's start message and each batch of parities are answered
+        with the next parity query, and the end of Cascade with the corrected
+        key's verification tag. The privacy amplification parameters that
+        come back set `secure_key` and return None. Not recorded in `steps`.
+        """
+        kind = message_kind(message)
+        if kind == CASCADE_START:
+            if self.state != COMPLETE or self.qber_estimate is None or self.secure_key is not None:
+                raise ValueError("Reconciliation follows the QBER estimate, once per run")
+            if self.qber_estimate.abort:
+                raise ValueError("QBER may exceed the abort threshold; there is no key to reconcile")
+            self._cascade = CascadeCorrector(self.key_bits, *parse_cascade_start(message))
+            self.state = RECONCILING
+        elif kind == PRIVACY_AMPLIFICATION:
+            if self.state != AWAITING_AMPLIFICATION:
+                raise ValueError(f"Unexpected privacy amplification while {self.state}")
+            verified, length, seed = parse_privacy_amplification(message)
+            if length > self.key_bits.size:
+                raise ValueError("Secure key cannot be longer than the reconciled key")
+            self.verified, self.secure_length = verified, length
+            self.corrected_errors = self._cascade.corrected
+            self.secure_key = privacy_amplification(self._cascade.bits, length, seed) if length else b''
+            self._cascade = None
+            self.state = COMPLETE
+            return None
+        else:
+            if self.state != RECONCILING:
+                raise ValueError(f"Unexpected reconciliation message while {self.state}")
+            self._cascade.receive_parities(parse_cascade_parities(message))
+        query = self._cascade.next_query()
+        if query is None:
+            self.state = AWAITING_AMPLIFICATION
+            return cascade_done_message(verification_tag(self._cascade.bits))
+        return cascade_query_message(*query)
@@ -0,0 +1,212 @@
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array, make_rng, random_bits
+from quantum.quantum_key_distribution.postprocessing import (
+    CASCADE_PASSES, DEFAULT_EPSILON, VERIFY_TAG_BITS, CascadeResponder, first_block_size,
+    privacy_amplification, secure_key_length, verification_tag)
+from quantum.quantum_key_distribution.protocol.messages import (
+    CASCADE_QUERY, basis_comparison_message, cascade_parities_message, cascade_start_message, message_kind,
+    parse_cascade_done, parse_cascade_query, parse_detected, parse_measurements, parse_qber_result, parse_sifted,
+    privacy_amplification_message, qber_sample_message, quantum_state_message)
+from quantum.quantum_key_distribution.qber import (
+    DEFAULT_ABORT_THRESHOLD, DEFAULT_CONFIDENCE, DEFAULT_SAMPLE_FRACTION, discard_sample,
+    estimate_qber, sample_positions)
+from quantum.quantum_key_distribution.sifting import sift
+from quantum.quantum_key_distribution.transcript import SENDER, recorded
+from quantum.quantum_key_distribution.wire_format import JSON_FORMAT
+
+READY = 'ready'
+AWAITING_MEASUREMENTS = 'awaiting_measurements'
+AWAITING_BASIS_REPLY = 'awaiting_basis_reply'
+AWAITING_QBER_REPLY = 'awaiting_qber_reply'
+RECONCILING = 'reconciling'
+COMPLETE = 'complete'
+
+
+class SenderSession:
+    """BB84 sender (Alice) as a state machine with no I/O of its own.
+
+    The caller moves messages between peers; the session only turns incoming
+    messages into outgoing ones:
+
+        state = session.quantum_state(wire_format)       -> to receiver
+        comparison = session.receive_measurements(reply) -> to receiver
+        sifted = session.receive_basis_reply(reply)
+        sample = session.qber_sample()                   -> to receiver (optional)
+        estimate = session.receive_qber_reply(reply)
+        start = session.reconcile()                      -> to receiver (optional)
+        reply = session.receive_reconciliation(message)  -> to receiver, until secure_key is set
+
+    `random_source` is a callable n -> uint8 array of random bits, e.g.
+    QuantumEntropyPool.take_bits; otherwise bits come from the session's RNG,
+    sharded across processes when a parallel.ShardedEngine is given.
+
+    Each step is logged in `steps` so transcript.capture can save the run.
+    """
+
+    role = SENDER
+
+    def __init__(self, random_source=None, rng=None, engine=None):
+        self.rng = make_rng(rng)
+        if random_source is None:
+            if engine is not None:
+                random_source = lambda n: engine.random_bits(n, self.rng)
+            else:
+                random_source = lambda n: random_bits(n, self.rng)
+        self.random_source = random_source
+        self.reset()
+
+    def reset(self):
+        self.state = READY
+        self.steps = []
+        self.bits = None
+        self.bases = None
+        self.bob_bases = None
+        self.bob_detected = None
+        self.bob_sample_bits = None
+        self.sifted = None
+        self.key_bits = None
+        self.qber_estimate = None
+        self._qber_request = None
+        self.verified = None
+        self.leaked_bits = None
+        self.secure_length = None
+        self.secure_key = None
+        self._cascade = None
+        self._amplification = None
+
+    @property
+    def n_bits(self):
+        return 0 if self.bits is None else self.bits.size
+
+    @recorded('prepare')
+    def prepare(self, n_bits=None, bits=None, bases=None):
+        """Choose the bits and bases to send; any that are not given are drawn at random."""
+        if self.state != READY:
+            raise ValueError(f"Cannot prepare a new run while {self.state}")
+        if bits is None and bases is None and not n_bits:
+            raise ValueError("Number of qubits must be positive")
+        if bits is not None:
+            bits = np.asarray(bits, dtype=np.uint8)
+            n_bits = bits.size
+        if bases is not None:
+            bases = bases_to_array(bases)
+            n_bits = bases.size
+        self.bits = bits if bits is not None else np.asarray(self.random_source(n_bits), dtype=np.uint8)
+        self.bases = bases if bases is not None else np.asarray(self.random_source(n_bits), dtype=np.uint8)
+        if self.bits.shape != self.bases.shape:
+            raise ValueError("Bits and bases must have the same length")
+        return self.bits, self.bases
+
+    @recorded('quantum_state')
+    def quantum_state(self, wire_format=JSON_FORMAT, start_time=None):
+        if self.bits is None:
+            raise ValueError("Call prepare() before sending the quantum state")
+        if self.state not in (READY, AWAITING_MEASUREMENTS):
+            raise ValueError(f"Cannot send the quantum state while {self.state}")
+        self.state = AWAITING_MEASUREMENTS
+        return quantum_state_message(self.bits, self.bases, wire_format, start_time)
+
+    @recorded('receive_measurements')
+    def receive_measurements(self, message):
+        """Record the receiver's bases and detections and return the basis comparison message."""
+        if self.state != AWAITING_MEASUREMENTS:
+            raise ValueError(f"Unexpected measurement response while {self.state}")
+        self.bob_bases = parse_measurements(message)
+        if self.bob_bases.size != self.n_bits:
+            raise ValueError("Receiver measured a different number of qubits")
+        self.bob_detected = parse_detected(message)
+        if self.bob_detected is not None and self.bob_detected.size != self.n_bits:
+            raise ValueError("Receiver detection mask has the wrong length")
+        self.state = AWAITING_BASIS_REPLY
+        return basis_comparison_message(self.bases)
+
+    @recorded('receive_basis_reply')
+    def receive_basis_reply(self, message):
+        """Finish the run once the receiver confirms it has sifted.
+
+        Only Bob's bases and detections are known here, so the sifted result
+        carries no error count; the QBER comes from the sample exchange.
+        """
+        if self.state != AWAITING_BASIS_REPLY:
+            raise ValueError(f"Unexpected basis comparison result while {self.state}")
+        n_sifted = parse_sifted(message)
+        # Alice's key is her own prepared bits on the sifted positions
+        self.sifted = sift(self.bases, self.bob_bases, bits_a=self.bits, detected=self.bob_detected)
+        if self.sifted.n_sifted != n_sifted:
+            raise ValueError("Receiver kept a different number of sifted bits")
+        self.key_bits = self.sifted.key_bits
+        self.state = COMPLETE
+        return self.sifted
+
+    @recorded('qber_sample')
+    def qber_sample(self, fraction=DEFAULT_SAMPLE_FRACTION, confidence=DEFAULT_CONFIDENCE,
+                    threshold=DEFAULT_ABORT_THRESHOLD):
+        """Publish a random sample of Alice's sifted bits for QBER estimation.
+
+        May be called again while awaiting the reply, e.g. after the exchange
+        failed; a fresh sample is drawn.
+        """
+        if self.state not in (COMPLETE, AWAITING_QBER_REPLY) or self.qber_estimate is not None:
+            raise ValueError("QBER can only be estimated once, after sifting")
+        positions = sample_positions(self.key_bits.size, fraction, self.rng)
+        self._qber_request = (positions, confidence, threshold)
+        self.state = AWAITING_QBER_REPLY
+        return qber_sample_message(positions, self.key_bits[positions], confidence, threshold)
+
+    @recorded('receive_qber_reply')
+    def receive_qber_reply(self, message):
+        """Estimate the QBER from Bob's sampled bits and drop the sample from the key."""
+        if self.state != AWAITING_QBER_REPLY:
+            raise ValueError(f"Unexpected QBER result while {self.state}")
+        positions, confidence, threshold = self._qber_request
+        bob_bits = parse_qber_result(message)
+        self.qber_estimate = estimate_qber(self.key_bits, positions, bob_bits, confidence, threshold)
+        self.bob_sample_bits = bob_bits
+        self.key_bits = discard_sample(self.key_bits, self.qber_estimate)
+        self._qber_request = None
+        self.state = COMPLETE
+        return self.qber_estimate
+
+    def reconcile(self, passes=CASCADE_PASSES, epsilon=DEFAULT_EPSILON):
+        """Start Cascade on the key left after the QBER sample; returns the start message.
+
+        The receiver drives Cascade from here: receive_reconciliation answers
+        its parity queries and, once it reports its corrected key, privacy-
+        amplifies. Reconciliation is not recorded in `steps`.
+        """
+        if self.state != COMPLETE or self.qber_estimate is None or self.secure_key is not None:
+            raise ValueError("Reconciliation follows the QBER estimate, once per run")
+        if self.qber_estimate.abort:
+            raise ValueError("QBER may exceed the abort threshold; there is no key to reconcile")
+        # The upper confidence bound is the QBER the security proof may assume
+        qber = max(self.qber_estimate.upper, 1e-6)
+        block = first_block_size(self.key_bits.size, qber)
+        seed = int(self.rng.integers(2**63))
+        self._cascade = CascadeResponder(self.key_bits, block, passes, seed)
+        self._amplification = (qber, epsilon)
+        self.state = RECONCILING
+        return cascade_start_message(block, passes, seed)
+
+    def receive_reconciliation(self, message):
+        """Answer a Cascade parity query, or verify the receiver's key and return the amplification message.
+
+        After the latter `secure_key` holds the final key as packed bytes;
+        it is empty when verification failed or no secure length is left.
+        """
+        if self.state != RECONCILING:
+            raise ValueError(f"Unexpected reconciliation message while {self.state}")
+        if message_kind(message) == CASCADE_QUERY:
+            return cascade_parities_message(self._cascade.parities(*parse_cascade_query(message)))
+        self.verified = parse_cascade_done(message) == verification_tag(self.key_bits)
+        self.leaked_bits = self._cascade.leaked_bits + VERIFY_TAG_BITS
+        qber, epsilon = self._amplification
+        self.secure_length, seed, self.secure_key = 0, None, b''
+        if self.verified:
+            self.secure_length = secure_key_length(self.key_bits.size, qber, self.leaked_bits, epsilon)
+        if self.secure_length:
+            seed = int(self.rng.integers(2**63))
+            self.secure_key = privacy_amplification(self.key_bits, self.secure_length, seed)
+        self._cascade = None
+        self.state = COMPLETE
+        return privacy_amplification_message(self.verified, self.secure_length, seed)
@@ -0,0 +1,97 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+DEFAULT_SAMPLE_FRACTION = 0.2
+DEFAULT_CONFIDENCE = 0.99
+# BB84 with one-way post-processing yields no secret key above about 11% QBER
+DEFAULT_ABORT_THRESHOLD = 0.11
+
+
+def sample_positions(n_sifted, fraction=DEFAULT_SAMPLE_FRACTION, rng=None):
+    """Random sorted positions of the sifted key to publish for QBER estimation."""
+    if not 0 < fraction <= 1:
+        raise ValueError("Sample fraction must be in (0, 1]")
+    rng = np.random.default_rng(rng)
+    n_sample = min(n_sifted, max(1, int(round(n_sifted * fraction)))) if n_sifted else 0
+    return np.sort(rng.choice(n_sifted, size=n_sample, replace=False))
+
+
+def wilson_interval(n_errors, n_sample, confidence=DEFAULT_CONFIDENCE):
+    """Two-sided Wilson score interval for an error rate; returns (lower, upper).
+
+    Unlike the normal approximation it stays inside [0, 1] and is still
+    meaningful when no errors were seen in the sample.
+    """
+    if n_sample == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = n_errors / n_sample
+    denominator = 1 + z * z / n_sample
+    centre = (p + z * z / (2 * n_sample)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n_sample + z * z / (4 * n_sample * n_sample)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class QberEstimate:
+    """QBER measured on a published sample of the sifted key.
+
+    `abort` is set when the upper confidence bound exceeds the threshold:
+    the channel cannot be told apart from an eavesdropper at that level, so
+    no key should be distilled. Otherwise the upper bound is the
+    conservative QBER to hand to post-processing.
+    """
+
+    def __init__(self, positions, n_errors, n_sifted,
+                 confidence=DEFAULT_CONFIDENCE, threshold=DEFAULT_ABORT_THRESHOLD):
+        self.positions = positions
+        self.n_sample = int(positions.size)
+        self.n_errors = int(n_errors)
+        self.n_sifted = n_sifted
+        self.qber = self.n_errors / self.n_sample if self.n_sample else 0.0
+        self.lower, self.upper = wilson_interval(self.n_errors, self.n_sample, confidence)
+        self.confidence = confidence
+        self.threshold = threshold
+        self.abort = self.upper > threshold
+        self.n_remaining = n_sifted - self.n_sample
+
+    def remaining_mask(self):
+        """Boolean mask over the sifted key of the positions that were not published."""
+        mask = np.ones(self.n_sifted, dtype=bool)
+        mask[self.positions] = False
+        return mask
+
+    def stats(self):
+        return {
+            'n_sample': self.n_sample,
+            'n_errors': self.n_errors,
+            'qber': self.qber,
+            'lower': self.lower,
+            'upper': self.upper,
+            'confidence': self.confidence,
+            'threshold': self.threshold,
+            'abort': self.abort,
+            'n_remaining': self.n_remaining,
+        }
+
+
+def estimate_qber(key_bits, positions, sample_bits,
+                  confidence=DEFAULT_CONFIDENCE, threshold=DEFAULT_ABORT_THRESHOLD):
+    """Compare our sifted key at `positions` with the peer's published `sample_bits`."""
+    key_bits = np.asarray(key_bits, dtype=np.uint8)
+    positions = np.asarray(positions, dtype=np.int64)
+    sample_bits = np.asarray(sample_bits, dtype=np.uint8)
+    if positions.shape != sample_bits.shape:
+        raise ValueError("Sample positions and bits differ in length")
+    if positions.size and (positions.min() < 0 or positions.max() >= key_bits.size):
+        raise ValueError("Sample position outside the sifted key")
+    if np.unique(positions).size != positions.size:
+        raise ValueError("Sample positions must be distinct")
+    n_errors = np.count_nonzero(key_bits[positions] != sample_bits)
+    return QberEstimate(positions, n_errors, key_bits.size, confidence, threshold)
+
+
+def discard_sample(key_bits, estimate):
+    """The sifted key with the published sample positions removed."""
+    return np.asarray(key_bits, dtype=np.uint8)[estimate.remaining_mask()]
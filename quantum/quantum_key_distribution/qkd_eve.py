@@ -1,13 +1,23 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import socket
-import json
-import random
+import sys
 import threading
-from queue import Queue
+from pathlib import Path
+import numpy as np
 import time
 from time import perf_counter
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.bb84_simulation import make_rng
+from quantum.quantum_key_distribution.framing import recv_frame, send_frame
+from quantum.quantum_key_distribution.protocol import (
+    BASIS_COMPARISON, QUANTUM_STATE, EavesdropperSession, message_kind)
+from quantum.quantum_key_distribution.result_table import BASIS_LABELS, BIT_LABELS, KEPT_LABELS, VirtualTable
+from quantum.quantum_key_distribution.transcript import capture, save_transcript
+from quantum.quantum_key_distribution.tk_worker import TkWorker
+from quantum.quantum_key_distribution.wire_format import decode_message, send_message
+
 class BB84EveGUI:
     def __init__(self, root):
         self.root = root
@@ -21,9 +31,12 @@ class BB84EveGUI:
 
         self.setup_output_frame(main_frame)
 
-        self.queue = Queue()
+        self.worker = TkWorker(root)
         self.listening = False
         self.server_socket = None
+
+        self.rng = make_rng()
+        self.session = EavesdropperSession(rng=self.rng)
         
     def get_ip(self):
         try:
@@ -82,6 +95,11 @@ class BB84EveGUI:
         ttk.Radiobutton(mode_frame, text="Manual", variable=self.mode_var,
                        value="manual").pack(side='left', padx=5)
 
+        ttk.Label(mode_frame, text="Intercept rate:").pack(side='left', padx=5)
+        self.rate_entry = ttk.Entry(mode_frame, width=8)
+        self.rate_entry.pack(side='left', padx=5)
+        self.rate_entry.insert(0, "1.0")
+
         button_frame = ttk.Frame(input_frame)
         button_frame.pack(fill='x', pady=5)
         
@@ -92,6 +110,9 @@ class BB84EveGUI:
         self.clear_button = ttk.Button(button_frame, text="Clear Output",
                                      command=self.clear_output)
         self.clear_button.pack(side='left', padx=5)
+
+        ttk.Button(button_frame, text="Save Transcript",
+                  command=self.export_transcript).pack(side='left', padx=5)
         
         ttk.Button(button_frame, text="Refresh Status",
                   command=self.refresh_status).pack(side='left', padx=5)
@@ -103,19 +124,27 @@ class BB84EveGUI:
     def setup_output_frame(self, parent):
         output_frame = ttk.LabelFrame(parent, text="Interception Results", padding="10")
         output_frame.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.result_table = VirtualTable(output_frame)
+        self.result_table.pack(fill='x', pady=(0, 5))
         
-        self.output = scrolledtext.ScrolledText(output_frame, height=20)
+        self.output = scrolledtext.ScrolledText(output_frame, height=10)
         self.output.pack(fill='both', expand=True)
     
     def clear_output(self):
         self.output.delete(1.0, tk.END)
-    
-    def get_measurement_outcome(self, alice_bit, alice_basis, eve_basis):
-        if alice_basis == eve_basis:
-            return alice_bit, True
-        else:
-            return random.randint(0, 1), False
+        self.result_table.clear()
 
+    def export_transcript(self):
+        if not self.session.steps:
+            messagebox.showwarning("Warning", "No session to save yet")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("Session transcripts", "*.json")])
+        if path:
+            save_transcript(path, capture(self.session))
+            self.output.insert(tk.END, f"\nSession transcript saved to {path}\n")
+    
     def manual_measurement_dialog(self, n_bits):
         dialog = tk.Toplevel(self.root)
         dialog.title("Manual Measurements")
@@ -213,126 +242,82 @@ class BB84EveGUI:
         self.listen_button.config(text="Start Intercepting")
         self.output.insert(tk.END, "Stopped intercepting.\n")
     
-    def display_results(self, eve_bases, eve_measurements, matched_bases):
-        self.output.insert(tk.END, "\nInterception Results:\n")
-        self.output.insert(tk.END, "-" * 60 + "\n")
-        self.output.insert(tk.END, "Bit\tEve's\tEve's\tBasis\n")
-        self.output.insert(tk.END, "No.\tBasis\tMeasure\tMatched?\n")
-        self.output.insert(tk.END, "-" * 60 + "\n")
-        
-        for i in range(len(eve_measurements)):
-            self.output.insert(tk.END, 
-                             f"{i}\t{eve_bases[i]}\t{eve_measurements[i]}\t"
-                             f"{'Yes' if matched_bases[i] else 'No'}\n")
+    def display_results(self, eve_bases, eve_measurements, matched_bases, intercepted):
+        self.result_table.show(
+            ["Intercepted?", "Eve's Basis", "Eve's Measure", "Basis Matched?"],
+            [(intercepted, KEPT_LABELS), (eve_bases, BASIS_LABELS), (eve_measurements, BIT_LABELS),
+             (matched_bases, KEPT_LABELS)])
 
-        matching_bases = sum(matched_bases)
-        total_qubits = len(eve_measurements)
-        self.output.insert(tk.END, "-" * 60 + "\n")
-        self.output.insert(tk.END, f"\nTotal qubits intercepted: {total_qubits}\n")
+        self.output.insert(tk.END, "\nInterception Results (per-qubit table above)\n")
+
+        matching_bases = int(np.count_nonzero(matched_bases))
+        total_qubits = int(np.count_nonzero(intercepted))
+        self.output.insert(tk.END, f"\nTotal qubits intercepted: {total_qubits} of {len(eve_measurements)}\n")
         self.output.insert(tk.END, f"Correct bases guessed: {matching_bases}\n")
-        self.output.insert(tk.END, 
-                          f"Success rate: {(matching_bases/total_qubits)*100:.2f}%\n")
+        if total_qubits:
+            self.output.insert(tk.END, 
+                              f"Success rate: {(matching_bases/total_qubits)*100:.2f}%\n")
+
+    def log(self, text):
+        """Append to the output from any thread."""
+        self.worker.call_soon(self.output.insert, tk.END, text)
+
+    def read_settings(self):
+        """Receiver address, intercept rate and mode as currently entered; runs on the Tk thread."""
+        rate = min(max(float(self.rate_entry.get()), 0.0), 1.0)
+        return self.receiver_host_entry.get(), int(self.receiver_port_entry.get()), rate, self.mode_var.get()
 
     def intercept_transmission(self):
         try:
             while self.listening:
                 sender_conn, sender_addr = self.server_socket.accept()
-                self.output.insert(tk.END, f"\nIntercepted connection from {sender_addr}\n")
+                self.log(f"\nIntercepted connection from {sender_addr}\n")
 
-                receiver_host = self.receiver_host_entry.get()
-                receiver_port = int(self.receiver_port_entry.get())
+                receiver_host, receiver_port, rate, mode = self.worker.run_on_ui(self.read_settings)
                 receiver_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.output.insert(tk.END, f"Attempting to connect to receiver at {receiver_host}:{receiver_port}\n")
+                self.log(f"Attempting to connect to receiver at {receiver_host}:{receiver_port}\n")
                 receiver_socket.connect((receiver_host, receiver_port))
-                self.output.insert(tk.END, "Connected to receiver\n")
+                self.log("Connected to receiver\n")
                 
-                data = sender_conn.recv(16384).decode()
-                received_json = json.loads(data)
-
-                if 'phase' in received_json and received_json['phase'] == 'basis_comparison':
-                    self.output.insert(tk.END, "Intercepted basis comparison message.\n")
-                    receiver_socket.sendall(json.dumps(received_json).encode())
-                    receiver_response = receiver_socket.recv(4096).decode()
-                    sender_conn.sendall(receiver_response.encode())
-
-                elif 'circuit_operations' in received_json and 'n_bits' in received_json:
-                    n_bits = received_json['n_bits']
-                    circuit_ops = received_json['circuit_operations']
-
-                    sender_bits = []
-                    sender_bases = []
-                    for i in range(n_bits):
-                        ops_for_i = [op for op in circuit_ops if i in op['qubits']]
-                        if not ops_for_i:
-                            s_bit, s_basis = 0, '+'
-                        elif len(ops_for_i) == 1:
-                            op = ops_for_i[0]
-                            if op['gate'] == 'x':
-                                s_bit, s_basis = 1, '+'
-                            elif op['gate'] == 'h':
-                                s_bit, s_basis = 0, 'x'
-                            else:
-                                s_bit, s_basis = 0, '+'
-                        elif len(ops_for_i) >= 2:
-                            s_bit, s_basis = 1, 'x'
-                        sender_bits.append(s_bit)
-                        sender_bases.append(s_basis)
-
-                    if self.mode_var.get() == "auto":
-                        eve_bases = [random.choice(['+', 'x']) for _ in range(n_bits)]
+                data = recv_frame(sender_conn)
+                received_json = decode_message(data)
+
+                kind = message_kind(received_json)
+                if kind == BASIS_COMPARISON:
+                    self.log("Intercepted basis comparison message.\n")
+                    send_frame(receiver_socket, data)
+                    send_frame(sender_conn, recv_frame(receiver_socket))
+
+                elif kind == QUANTUM_STATE:
+                    n_bits = self.session.accept_quantum_state(received_json)
+                    self.session.rate = rate
+
+                    if mode == "auto":
+                        eve_bases = None
                     else:
-                        eve_bases = self.manual_measurement_dialog(n_bits)
+                        eve_bases = self.worker.run_on_ui(self.manual_measurement_dialog, n_bits)
                         if not eve_bases:
                             sender_conn.close()
                             receiver_socket.close()
                             continue
-                    
-                    eve_measurements = []
-                    matched_bases = []
-                    for i in range(n_bits):
-                        if eve_bases[i] == sender_bases[i]:
-                            m_bit = sender_bits[i]
-                            matched = True
-                        else:
-                            m_bit = random.randint(0, 1)
-                            matched = False
-                        eve_measurements.append(m_bit)
-                        matched_bases.append(matched)
-
-                    self.root.after(0, self.display_results, eve_bases, eve_measurements, matched_bases)
-
-                    new_circuit_ops = []
-                    for i in range(n_bits):
-                        if eve_bases[i] == '+':
-                            if eve_measurements[i] == 1:
-                                new_circuit_ops.append({'gate': 'x', 'qubits': [i]})
-                        elif eve_bases[i] == 'x':
-                            if eve_measurements[i] == 0:
-                                new_circuit_ops.append({'gate': 'h', 'qubits': [i]})
-                            else:
-                                new_circuit_ops.append({'gate': 'x', 'qubits': [i]})
-                                new_circuit_ops.append({'gate': 'h', 'qubits': [i]})
-                    
-                    new_quantum_state = {
-                        'circuit_operations': new_circuit_ops,
-                        'n_bits': n_bits,
-                        'start_time': perf_counter()  
-                    }
-
-                    receiver_socket.sendall(json.dumps(new_quantum_state).encode())
-                    receiver_response = receiver_socket.recv(4096).decode()
-                    sender_conn.sendall(receiver_response.encode())
+
+                    # Resent in the format the sender negotiated with the receiver through us
+                    new_quantum_state = self.session.intercept(eve_bases, start_time=perf_counter())
+                    self.worker.call_soon(self.display_results, self.session.bases, self.session.measurements,
+                                          self.session.matched, self.session.intercepted)
+
+                    send_message(receiver_socket, new_quantum_state)
+                    send_frame(sender_conn, recv_frame(receiver_socket))
                 
                 else:
-                    receiver_socket.sendall(data.encode())
-                    receiver_response = receiver_socket.recv(4096).decode()
-                    sender_conn.sendall(receiver_response.encode())
+                    send_frame(receiver_socket, data)
+                    send_frame(sender_conn, recv_frame(receiver_socket))
                 
                 sender_conn.close()
                 receiver_socket.close()
         except Exception as e:
             if self.listening:
-                self.output.insert(tk.END, f"\nError during interception: {str(e)}\n")
+                self.log(f"\nError during interception: {str(e)}\n")
 
 if __name__ == "__main__":
     root = tk.Tk()
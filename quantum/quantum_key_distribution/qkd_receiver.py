@@ -1,19 +1,29 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import socket
-import json
-import random
+import sys
 import hashlib
 import threading
-from queue import Queue
+from pathlib import Path
 import time
 from time import perf_counter
-import qiskit
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import base64
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array, make_rng
+from quantum.quantum_key_distribution.parallel import DEFAULT_SHARD_SIZE, ShardedEngine
+from quantum.quantum_key_distribution.postprocessing import to_bits
+from quantum.quantum_key_distribution.protocol import (
+    CASCADE_PARITIES, CASCADE_START, PRIVACY_AMPLIFICATION, QBER_SAMPLE, ReceiverSession, message_kind)
+from quantum.quantum_key_distribution.protocol.receiver import AWAITING_BASIS_COMPARISON, READY_TO_MEASURE
+from quantum.quantum_key_distribution.result_table import BASIS_LABELS, BIT_LABELS, KEPT_LABELS, VirtualTable
+from quantum.quantum_key_distribution.sifting import bits_to_string, preview_key, preview_list, sift
+from quantum.quantum_key_distribution.tk_worker import TkWorker
+from quantum.quantum_key_distribution.transcript import capture, save_transcript
+from quantum.quantum_key_distribution.wire_format import recv_message, send_message, wire_formats_response
 
 def derive_aes_key(psk):
     """Derive a 256-bit AES key from the PSK."""
@@ -55,15 +65,26 @@ class BB84ReceiverGUI:
         self.bob_measurements = None
         self.final_key = None
 
-        self.queue = Queue()
+        self.worker = TkWorker(root)
         self.listening = False
         self.server_socket = None
-        self.received_data = None
         self.client_socket = None
         self.last_client_ip = None
 
-        self.sent_key_hash = None
-        self.received_key_hash = None
+        self.rng = make_rng()
+        # Started for the first state larger than one shard; closed with the window
+        self.engine = None
+        self.session = ReceiverSession(rng=self.rng)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        if self.listening:
+            self.stop_listening()
+        self.worker.close()
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+        self.root.destroy()
         
     def get_ip(self):
         try:
@@ -103,6 +124,9 @@ class BB84ReceiverGUI:
             return
 
         psk_hash = hashlib.sha256(psk.encode()).hexdigest()
+        # Read by the listener thread, which must not touch the widgets
+        self.stored_aes_key = derive_aes_key(psk)
+        self.local_ip = self.get_ip()
         self.stored_psk_hash = psk_hash
 
         self.auth_status_label.config(text="Waiting for Authentication", foreground="orange")
@@ -113,31 +137,31 @@ class BB84ReceiverGUI:
     def handle_auth_request(self, client_socket, received_data, addr):
         if hasattr(self, 'stored_psk_hash'):
             if received_data['psk_hash'] == self.stored_psk_hash:
-                aes_key = derive_aes_key(self.psk_entry.get().strip())
+                aes_key = self.stored_aes_key
                 encrypted_sender_ip = received_data.get('sender_ip', '')
 
                 try:
                     sender_ip = decrypt_data(encrypted_sender_ip, aes_key)  
                     self.last_client_ip = sender_ip
 
-                    encrypted_receiver_ip = encrypt_data(self.get_ip(), aes_key) 
+                    encrypted_receiver_ip = encrypt_data(self.local_ip, aes_key) 
 
                     response = {
                         'status': 'authenticated',
                         'receiver_ip': encrypted_receiver_ip
                     }
-                    self.root.after(0, lambda: self.update_auth_status(True, sender_ip))
+                    self.worker.call_soon(self.update_auth_status, True, sender_ip)
                 except Exception as e:
                     response = {'status': 'failed', 'error': str(e)}
-                    self.root.after(0, lambda: self.update_auth_status(False))
+                    self.worker.call_soon(self.update_auth_status, False)
             else:
                 response = {'status': 'failed'}
-                self.root.after(0, lambda: self.update_auth_status(False))
+                self.worker.call_soon(self.update_auth_status, False)
         else:
             response = {'status': 'not_ready'}
-            self.root.after(0, lambda: self.output.insert(tk.END, "No PSK set on receiver\n"))
+            self.worker.call_soon(self.output.insert, tk.END, "No PSK set on receiver\n")
 
-        client_socket.sendall(json.dumps(response).encode())
+        send_message(client_socket, response)
     
     def update_auth_status(self, success, sender_ip=None):
         if success:
@@ -176,17 +200,14 @@ class BB84ReceiverGUI:
         key_frame = ttk.Frame(pcompare_frame)
         key_frame.pack(fill='x', pady=5)
 
-        ttk.Label(key_frame, text="Quantum Key Subset:").pack(side='left', padx=5)
-        self.key_entry = ttk.Entry(key_frame, width=30, show="*")
-        self.key_entry.pack(side='left', padx=5, expand=True, fill='x')
+        ttk.Label(key_frame, text="Sample estimate:").pack(side='left', padx=5)
+        self.qber_label = ttk.Label(key_frame, text="Waiting for the sender's sample")
+        self.qber_label.pack(side='left', padx=5)
  
         key_button_frame = ttk.Frame(pcompare_frame)
         key_button_frame.pack(fill='x', pady=5)
         
-        ttk.Button(key_button_frame, text="Send Key Subset", 
-                command=self.send_key).pack(side='left', padx=5)
-        
-        ttk.Button(key_button_frame, text="Compare Key Subset", 
+        ttk.Button(key_button_frame, text="Check for Eavesdropping", 
                 command=self.compare_keys).pack(side='left', padx=5)
 
     def setup_input_frame(self, parent):
@@ -223,6 +244,13 @@ class BB84ReceiverGUI:
         ttk.Radiobutton(mode_frame, text="Manual", variable=self.mode_var,
                        value="manual").pack(side='left', padx=5)
 
+        ttk.Label(mode_frame, text="Simulator:").pack(side='left', padx=5)
+        self.backend_var = tk.StringVar(value="numpy")
+        ttk.Radiobutton(mode_frame, text="NumPy", variable=self.backend_var,
+                       value="numpy").pack(side='left', padx=5)
+        ttk.Radiobutton(mode_frame, text="Qiskit Aer (reference)", variable=self.backend_var,
+                       value="aer").pack(side='left', padx=5)
+
         button_frame = ttk.Frame(input_frame)
         button_frame.pack(fill='x', pady=5)
         
@@ -237,6 +265,9 @@ class BB84ReceiverGUI:
         self.clear_button = ttk.Button(button_frame, text="Clear Output",
                                      command=self.clear_output)
         self.clear_button.pack(side='left', padx=5)
+
+        ttk.Button(button_frame, text="Save Transcript",
+                  command=self.export_transcript).pack(side='left', padx=5)
         
         ttk.Button(button_frame, text="Refresh IP Status",
                   command=self.refresh_status).pack(side='left', padx=5)
@@ -248,22 +279,42 @@ class BB84ReceiverGUI:
     def setup_output_frame(self, parent):
         output_frame = ttk.LabelFrame(parent, text="Results", padding="10")
         output_frame.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.result_table = VirtualTable(output_frame)
+        self.result_table.pack(fill='x', pady=(0, 5))
         
-        self.output = scrolledtext.ScrolledText(output_frame, height=20)
+        self.output = scrolledtext.ScrolledText(output_frame, height=10)
         self.output.pack(fill='both', expand=True)
     
     def clear_output(self):
         self.output.delete(1.0, tk.END)
+        self.result_table.clear()
+
+    def export_transcript(self):
+        if not self.session.steps:
+            messagebox.showwarning("Warning", "No session to save yet")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("Session transcripts", "*.json")])
+        if path:
+            save_transcript(path, capture(self.session))
+            self.output.insert(tk.END, f"\nSession transcript saved to {path}\n")
 
     def compare_keys(self):
-        if not self.sent_key_hash and not self.received_key_hash:
-            messagebox.showwarning("Warning", "No keys available to compare")
+        estimate = self.session.qber_estimate
+        if estimate is None:
+            messagebox.showwarning("Warning", "No QBER estimate available. The sender publishes the sample.")
             return
         
-        if self.sent_key_hash == self.received_key_hash:
-            messagebox.showinfo("Key Comparison", "Keys match! No eavesdropping detected.")
+        if not estimate.abort:
+            messagebox.showinfo("QBER Estimation",
+                                f"QBER {estimate.qber*100:.2f}% (upper bound {estimate.upper*100:.2f}%) "
+                                f"is below the {estimate.threshold*100:.1f}% threshold. "
+                                "No eavesdropping detected.")
         else:
-            messagebox.showerror("Eavesdropping Alert!", "WARNING: Keys do not match! Possible eavesdropping detected!")
+            messagebox.showerror("Eavesdropping Alert!",
+                                 f"WARNING: QBER upper bound {estimate.upper*100:.2f}% exceeds the "
+                                 f"{estimate.threshold*100:.1f}% threshold! Possible eavesdropping detected!")
             self.output.insert(tk.END, "\n")
             self.output.insert(tk.END,"\n----------⚠️ WARNING: POSSIBLE EAVESDROPPING DETECTED!⚠️----------\n")
 
@@ -303,166 +354,147 @@ class BB84ReceiverGUI:
         self.measure_button.config(state='disabled')
 
     def start_measuring(self):
-        if self.received_data and self.client_socket:
-            try:
-                quantum_state = self.received_data
-                circuit_ops = quantum_state.get('circuit_operations')
-                n_bits = quantum_state.get('n_bits')
-                if not circuit_ops or not n_bits:
-                    raise ValueError("Invalid quantum state data received")
-
-                if self.mode_var.get() == "auto":
-                    bob_bases = ['+' if random.randint(0, 1) == 0 else 'x' for _ in range(n_bits)]
-                else:
-                    bob_bases = self.manual_measurement_dialog(n_bits)
-                    if not bob_bases: 
-                        return
-
-                chunk_size = 16
-                bob_measurements = []
-
-                for chunk_start in range(0, n_bits, chunk_size):
-                    chunk_end = min(n_bits, chunk_start + chunk_size)
-                    current_chunk_size = chunk_end - chunk_start
-
-                    qc = QuantumCircuit(current_chunk_size, current_chunk_size)
-
-                    for op in circuit_ops:
-                        q_index = op.get('qubits', [None])[0]
-                        if q_index is None:
-                            continue
-                        if chunk_start <= q_index < chunk_end:
-                            adjusted_index = q_index - chunk_start
-                            gate = op.get('gate')
-                            if gate == 'x':
-                                qc.x(adjusted_index)
-                            elif gate == 'h':
-                                qc.h(adjusted_index)
-
-                    for i in range(current_chunk_size):
-                        global_index = chunk_start + i
-                        if bob_bases[global_index] == 'x':
-                            qc.h(i)
-
-                    qc.measure(range(current_chunk_size), range(current_chunk_size))
-
-                    backend = AerSimulator()
-                    compiled_circuit = transpile(qc, backend)
-                    job = backend.run(compiled_circuit, shots=1)
-                    result = job.result()
-                    counts = result.get_counts()
-                    measured_bitstring = list(counts.keys())[0]
-                    measured_bitstring = measured_bitstring[::-1]
-                    for bit in measured_bitstring:
-                        bob_measurements.append(int(bit))
-
-                self.output.insert(tk.END, f"\nBob's Bases: {bob_bases}\n\n")
-                self.output.insert(tk.END, f"Bob's Measurements: {bob_measurements}\n")
-
-                response_data = {
-                    'bob_bases': bob_bases,
-                    'bob_measurements': bob_measurements
-                }
-                self.client_socket.sendall(json.dumps(response_data).encode())
-
-                self.bob_bases = bob_bases
-                self.bob_measurements = bob_measurements
-
-                self.received_data = None
-                self.measure_button.config(state='disabled')
-                
-                if 'start_time' in quantum_state:
-                    elapsed = perf_counter() - quantum_state['start_time']
-                    self.output.insert(tk.END, f"\nTime from transmission start to measurement: {elapsed:.6f} seconds.\n")
-            
-            except Exception as e:
-                self.display_error(f"Error during measurement: {e}")
-                if self.client_socket:
-                    self.client_socket.close()
-                self.client_socket = None
+        if self.session.state == READY_TO_MEASURE and self.client_socket:
+            n_bits = self.session.n_bits
+            if self.mode_var.get() == "auto":
+                bob_bases = None
+            else:
+                bob_bases = self.manual_measurement_dialog(n_bits)
+                if not bob_bases: 
+                    return
+
+            self.session.backend = self.backend_var.get()
+            if self.engine is None and n_bits > DEFAULT_SHARD_SIZE:
+                # Large states are measured on all cores
+                self.engine = ShardedEngine()
+            self.session.engine = self.engine
+            self.measure_button.config(state='disabled')
+            self.worker.submit(self.measure_and_reply, bob_bases,
+                               on_done=self.measurement_done, on_error=self.measurement_failed)
         else:
             self.display_error("No data received or connection lost")
             self.measure_button.config(state='disabled')
 
+    def measure_and_reply(self, bob_bases):
+        """Measure and answer the sender; runs on a worker thread."""
+        response_data = self.session.measure(bob_bases)
+        send_message(self.client_socket, response_data)
+        return response_data
+
+    def measurement_done(self, response_data):
+        bob_bases = self.session.bases
+        bob_measurements = self.session.measurements
+
+        self.output.insert(tk.END, f"\nBob's Bases: {preview_list(np.where(bob_bases, 'x', '+'))}\n\n")
+        self.output.insert(tk.END, f"Bob's Measurements: {preview_list(bob_measurements)}\n")
+
+        self.bob_bases = bob_bases
+        self.bob_measurements = bob_measurements
+        
+        if self.session.start_time is not None:
+            elapsed = perf_counter() - self.session.start_time
+            self.output.insert(tk.END, f"\nTime from transmission start to measurement: {elapsed:.6f} seconds.\n")
+
+    def measurement_failed(self, e):
+        self.display_error(f"Error during measurement: {e}")
+        if self.client_socket:
+            self.client_socket.close()
+        self.client_socket = None
+
     def listen_for_connection(self):
         try:
             while self.listening:
                 try:
                     self.server_socket.settimeout(1)
                     client_socket, addr = self.server_socket.accept()
-                    data = client_socket.recv(16384).decode()
-                    received_data = json.loads(data)
+                    received_data = recv_message(client_socket)
 
                     if 'request' in received_data and received_data['request'] == 'authenticate':
                         self.handle_auth_request(client_socket, received_data, addr)
                         client_socket.close()
                         continue
 
+                    if 'request' in received_data and received_data['request'] == 'wire_formats':
+                        send_message(client_socket, wire_formats_response())
+                        client_socket.close()
+                        continue
+
                     if not self.is_authenticated:
                         client_socket.close()
-                        self.root.after(0, lambda: self.output.insert(tk.END, "Rejected connection from unauthenticated sender\n"))
+                        self.worker.call_soon(self.output.insert, tk.END, "Rejected connection from unauthenticated sender\n")
                         continue
 
                     self.client_socket = client_socket
                     self.last_client_ip = addr[0]
-                    self.root.after(0, lambda: self.output.insert(tk.END, f"\nConnected to {addr}\n"))
+                    self.worker.call_soon(self.output.insert, tk.END, f"\nConnected to {addr}\n")
 
                     if 'request' in received_data:
-                        if received_data['request'] == 'get_key':
-                            key_hash = received_data.get('key_hash')
-                            if key_hash:
-                                self.received_key_hash = key_hash
-                                response = {'status': 'received'}
-                                self.root.after(0, lambda: self.output.insert(tk.END, f"\nReceived key subset hash: {key_hash}\n"))
-                                messagebox.showinfo("Info", "Key subset hash received! Stop Listening")
-                            else:
-                                response = {'status': 'error', 'message': 'Invalid key data'}
-                            client_socket.sendall(json.dumps(response).encode())
-                            client_socket.close()
+                        self.worker.call_soon(self.output.insert, tk.END, "Unknown request received.\n")
+                        client_socket.close()
 
-                        else:
-                            self.root.after(0, lambda: self.output.insert(tk.END, "Unknown request received.\n"))
-                            client_socket.close()
+                    elif message_kind(received_data) == QBER_SAMPLE:
+                        try:
+                            response = self.session.receive_qber_sample(received_data)
+                        except (ValueError, KeyError) as e:
+                            response = {'status': 'error', 'message': str(e)}
+                        send_message(client_socket, response)
+                        client_socket.close()
+                        self.client_socket = None
+                        if self.session.qber_estimate is not None and 'status' not in response:
+                            self.worker.call_soon(self.display_qber_estimate, self.session.qber_estimate)
+
+                    elif message_kind(received_data) in (CASCADE_START, CASCADE_PARITIES, PRIVACY_AMPLIFICATION):
+                        try:
+                            response = self.session.receive_reconciliation(received_data)
+                        except (ValueError, KeyError) as e:
+                            response = {'status': 'error', 'message': str(e)}
+                        done = response is None
+                        if done:
+                            response = {'status': 'ok', 'secure_length': self.session.secure_length}
+                        send_message(client_socket, response)
+                        client_socket.close()
+                        self.client_socket = None
+                        if done:
+                            self.worker.call_soon(self.display_secure_key, self.session.verified,
+                                                  self.session.corrected_errors, self.session.secure_length,
+                                                  self.session.secure_key)
 
                     elif 'sender_bases' in received_data:
                         sender_bases = received_data.get('sender_bases')
-                        if sender_bases and self.bob_bases and self.bob_measurements:
-                            matching_indices = [i for i in range(len(sender_bases)) if sender_bases[i] == self.bob_bases[i]]
-                            final_measurements = [self.bob_measurements[i] for i in matching_indices]
-                            final_key = ''.join(str(bit) for bit in final_measurements)
-                            self.final_key = final_key
-
-                            response_data = {
-                                'bob_bases': self.bob_bases,
-                                'bob_measurements': self.bob_measurements
-                            }
-                            client_socket.sendall(json.dumps(response_data).encode())
-
-                            self.root.after(0, lambda: self.display_results(
-                                None,
-                                sender_bases,
-                                self.bob_bases,
-                                self.bob_measurements,
-                                matching_indices
-                            ))
+                        if sender_bases and self.session.state == AWAITING_BASIS_COMPARISON:
+                            response_data = self.session.receive_basis_comparison(received_data)
+                            sifted = self.session.sifted
+
+                            send_message(client_socket, response_data)
+
+                            # Arrays are passed now: the session may move on before the UI catches up
+                            self.worker.call_soon(self.display_results, None, self.session.sender_bases,
+                                                  self.session.bases, self.session.measurements, sifted)
                         else:
                             response = {'status': 'error', 'message': 'Missing data for basis comparison'}
-                            client_socket.sendall(json.dumps(response).encode())
+                            send_message(client_socket, response)
 
                         client_socket.close()
                         self.client_socket = None
 
                     else:
-                        self.received_data = received_data
-                        start_time = self.received_data.get('start_time')
+                        try:
+                            self.session.accept_quantum_state(received_data)
+                        except ValueError as e:
+                            send_message(client_socket, {'status': 'error', 'message': str(e)})
+                            client_socket.close()
+                            self.client_socket = None
+                            self.worker.call_soon(self.display_error, str(e))
+                            continue
+                        start_time = self.session.start_time
                         if start_time is not None:
                             elapsed = perf_counter() - start_time
                             self.elapsed_time = elapsed
-                            self.root.after(0, lambda: self.output.insert(
-                                tk.END, f"Quantum state received. Time taken: {elapsed:.6f} seconds. Start measuring.\n"))
+                            self.worker.call_soon(self.output.insert, tk.END,
+                                                  f"Quantum state received. Time taken: {elapsed:.6f} seconds. Start measuring.\n")
                         else:
-                            self.root.after(0, lambda: self.output.insert(tk.END, "Quantum state received. Start measuring.\n"))
-                        self.root.after(0, lambda: self.measure_button.config(state='normal'))
+                            self.worker.call_soon(self.output.insert, tk.END, "Quantum state received. Start measuring.\n")
+                        self.worker.call_soon(lambda: self.measure_button.config(state='normal'))
 
                 except socket.timeout:
                     continue
@@ -471,11 +503,11 @@ class BB84ReceiverGUI:
                     if not self.listening:
                         break
                     else:
-                        self.root.after(0, lambda: self.display_error(f"Socket error: {e}"))
+                        self.worker.call_soon(self.display_error, f"Socket error: {e}")
 
         except Exception as e:
             if self.listening:
-                self.root.after(0, lambda: self.display_error(f"Error in connection: {e}"))
+                self.worker.call_soon(self.display_error, f"Error in connection: {e}")
 
         finally:
             if hasattr(self, 'server_socket'):
@@ -484,7 +516,7 @@ class BB84ReceiverGUI:
                 except Exception:
                     pass
             self.listening = False
-            self.root.after(0, lambda: self.listen_button.config(text="Start Listening"))
+            self.worker.call_soon(lambda: self.listen_button.config(text="Start Listening"))
 
     def manual_measurement_dialog(self, n_bits):
         dialog = tk.Toplevel(self.root)
@@ -541,120 +573,60 @@ class BB84ReceiverGUI:
         dialog.wait_window()
         return receiver_bases if receiver_bases else None
     
-    def send_key(self):
-        key = self.key_entry.get().strip()
-        if not key:
-            messagebox.showwarning("Warning", "Key cannot be empty")
+    def display_qber_estimate(self, estimate):
+        self.output.insert(tk.END, f"\nSender published {estimate.n_sample} of {estimate.n_sifted} sifted bits "
+                                   f"for QBER estimation\n")
+        self.output.insert(tk.END, f"Errors in sample: {estimate.n_errors}\n")
+        self.output.insert(tk.END, f"Sample QBER: {estimate.qber*100:.2f}% "
+                                   f"({estimate.confidence*100:.0f}% Wilson interval {estimate.lower*100:.2f}% - "
+                                   f"{estimate.upper*100:.2f}%)\n")
+        self.output.insert(tk.END, f"Remaining key bits: {estimate.n_remaining}\n")
+        self.qber_label.config(text=f"{estimate.qber*100:.2f}% (upper {estimate.upper*100:.2f}%)",
+                               foreground="red" if estimate.abort else "green")
+        if estimate.abort:
+            self.final_key = None
+            self.output.insert(tk.END, f"QBER may exceed the {estimate.threshold*100:.1f}% abort threshold; "
+                                       "key discarded\n")
+            self.output.insert(tk.END, "\n----------⚠️ WARNING: POSSIBLE EAVESDROPPING DETECTED!⚠️----------\n")
             return
+        self.output.insert(tk.END, "Waiting for the sender to reconcile the key\n")
 
-        if not hasattr(self, 'last_client_ip') or not self.last_client_ip:
-            messagebox.showwarning("Warning", "No previous connection found. Start listening first.")
+    def display_secure_key(self, verified, corrected_errors, secure_length, secure_key):
+        self.output.insert(tk.END, f"\nCascade corrected {corrected_errors} bits\n")
+        if not verified:
+            self.final_key = None
+            self.output.insert(tk.END, "Reconciled keys failed verification; key discarded\n")
             return
-        
-        try:
-            key_hash = hashlib.sha256(key.encode()).hexdigest()
-            self.sent_key_hash = key_hash
-
-            try:
-                port = int(self.port_entry.get())
-            except ValueError:
-                messagebox.showwarning("Warning", "Invalid port number.")
-                return
-
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((self.last_client_ip, port))
-                key_data = {'request': 'get_key', 'key_hash': key_hash}
-                s.sendall(json.dumps(key_data).encode())
-
-                s.settimeout(10)
-                try:
-                    response = s.recv(4096).decode()
-                    response_data = json.loads(response)
-                    
-                    if response_data.get('status') == 'received':
-                        self.output.insert(tk.END, f"\nKey subset hash sent successfully to {self.last_client_ip}.\n")
-                        messagebox.showinfo("Info", "Key subset sent! Please start Listening")
-                    else:
-                        self.output.insert(tk.END, "\nError: Key hash was not acknowledged.\n")
-                except socket.timeout:
-                    self.output.insert(tk.END, "\nTimeout: No response from receiver.\n")
-
-            self.key_entry.delete(0, tk.END)
-
-        except Exception as e:
-            self.output.insert(tk.END, f"\nError sending key: {e}\n")
-            messagebox.showerror("Error", str(e))
-
-    def check_queue(self):
-        try:
-            while True:
-                method_name, args = self.queue.get_nowait()
-                if method_name == "display_results":
-                    self.display_results(*args)
-                elif method_name == "error":
-                    self.display_error(args)
-                elif method_name == "status":
-                    self.output.insert(tk.END, args)
-        except:
-            if self.listening:
-                self.root.after(100, self.check_queue)
-
-    def display_results(self, sender_bits, sender_bases, bob_bases, bob_measurements, kept_indices=None):
-        show_sender_bits = sender_bits is not None
-
-        if kept_indices is None and sender_bases and bob_bases:
-            kept_indices = [i for i in range(len(sender_bases)) 
-                           if sender_bases[i] == bob_bases[i]]
-        
-        self.output.insert(tk.END, "\nBB84 Protocol Results\n")
-        self.output.insert(tk.END, "-" * 60 + "\n")
-
-        header = "Bit\tAlice's\tBob's\tBob's\tBit\n"
-        if show_sender_bits:
-            header = "Bit\tAlice's\tAlice's\tBob's\tBob's\tBit\n"
-            subheader = "No.\tBit\tBasis\tBasis\tMeasure\tKept?\n"
-        else:
-            header = "Bit\tAlice's\tBob's\tBob's\tBit\n"
-            subheader = "No.\tBasis\tBasis\tMeasure\tKept?\n"
-            
-        self.output.insert(tk.END, header)
-        self.output.insert(tk.END, subheader)
-        self.output.insert(tk.END, "-" * 60 + "\n")
-        
-        for i in range(len(sender_bases)):
-            kept = "Yes" if i in kept_indices else "No"
-            if show_sender_bits:
-                self.output.insert(tk.END, 
-                                 f"{i}\t{sender_bits[i]}\t{sender_bases[i]}\t"
-                                 f"{bob_bases[i]}\t{bob_measurements[i]}\t{kept}\n")
-            else:
-                self.output.insert(tk.END, 
-                                 f"{i}\t{sender_bases[i]}\t"
-                                 f"{bob_bases[i]}\t{bob_measurements[i]}\t{kept}\n")
-
-        receiver_key = [bob_measurements[i] for i in kept_indices] if kept_indices else []
-        final_key = ''.join(str(bit) for bit in receiver_key)
-        
-        self.output.insert(tk.END, "-" * 60 + "\n")
-        self.output.insert(tk.END, f"\nFinal Shared key: {final_key}\n")
-        
-        self.final_key = final_key
-
-        if final_key:
-            subset_length = max(1, len(final_key) * 20 // 100)
-            key_subset = final_key[:subset_length]
-            self.output.insert(tk.END, f"\nKey subset for verification: {key_subset}\n")
+        # Error-corrected and privacy-amplified, so this is the key both sides keep
+        self.final_key = bits_to_string(to_bits(secure_key, secure_length))
+        self.output.insert(tk.END, f"Secure key length: {secure_length} bits\n")
+        self.output.insert(tk.END, f"\nFinal Shared key: {preview_key(self.final_key)}\n")
+
+    def display_results(self, sender_bits, sender_bases, bob_bases, bob_measurements, sifted=None):
+        if sifted is None:
+            sifted = sift(sender_bases, bob_bases, sender_bits, bob_measurements)
+
+        headings = ["Alice's Basis", "Bob's Basis", "Bob's Measure", "Kept?"]
+        columns = [(bases_to_array(sender_bases), BASIS_LABELS), (bases_to_array(bob_bases), BASIS_LABELS),
+                   (np.asarray(bob_measurements, dtype=np.uint8), BIT_LABELS), (sifted.mask, KEPT_LABELS)]
+        if sender_bits is not None:
+            headings.insert(0, "Alice's Bit")
+            columns.insert(0, (np.asarray(sender_bits, dtype=np.uint8), BIT_LABELS))
+        self.result_table.show(headings, columns)
+
+        self.output.insert(tk.END, "\nBB84 Protocol Results (per-qubit table above)\n")
+
+        # No key is final until the sender's QBER sample has been checked
+        self.final_key = None
+        self.output.insert(tk.END, f"\nSifted key: {preview_key(sifted.key_string())}\n")
 
-            self.key_entry.delete(0, tk.END)
-            self.key_entry.insert(0, key_subset)
+        self.qber_label.config(text="Waiting for the sender's sample", foreground="")
 
-        matching_bases = len(kept_indices) if kept_indices else 0
-        total_qubits = len(sender_bases)
-        self.output.insert(tk.END, f"\nTotal qubits: {total_qubits}\n")
-        self.output.insert(tk.END, f"Matching Bases: {matching_bases}\n")
-        if total_qubits > 0:
+        self.output.insert(tk.END, f"\nTotal qubits: {sifted.n_total}\n")
+        self.output.insert(tk.END, f"Matching Bases: {sifted.n_sifted}\n")
+        if sifted.n_total > 0:
             self.output.insert(tk.END, 
-                              f"Key Generation Rate: {(matching_bases/total_qubits)*100:.2f}%\n")
+                              f"Key Generation Rate: {sifted.match_rate*100:.2f}%\n")
            
     def display_error(self, error_message):
         self.output.insert(tk.END, f"\nError: {error_message}\n")
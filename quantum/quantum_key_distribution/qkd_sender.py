@@ -1,18 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import socket
-import json
-import random
+import sys
 import hashlib
 from tkinter import filedialog
 from matplotlib.lines import Line2D
-import qiskit
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
-from qiskit_aer import AerSimulator
-from qiskit import transpile
-import threading
 import numpy as np
-from queue import Queue
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import time
@@ -22,6 +15,23 @@ matplotlib.use('TkAgg')
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import base64
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.circuit_render import CircuitRenderer, PreparationCircuit
+from quantum.quantum_key_distribution.entropy_pool import QuantumEntropyPool
+from quantum.quantum_key_distribution.postprocessing import to_bits
+from quantum.quantum_key_distribution.protocol import (
+    MEASUREMENTS, PRIVACY_AMPLIFICATION, SIFTED, SenderSession, message_kind)
+from quantum.quantum_key_distribution.qber import DEFAULT_ABORT_THRESHOLD, DEFAULT_SAMPLE_FRACTION
+from quantum.quantum_key_distribution.result_table import BASIS_LABELS, BIT_LABELS, KEPT_LABELS, VirtualTable
+from quantum.quantum_key_distribution.sifting import bits_to_string, preview_key, preview_list
+from quantum.quantum_key_distribution.state_view import (
+    DEFAULT_SHOTS, MAX_STATEVECTOR_QUBITS, ProductState, bin_qubits, non_uniform_example, uniform_example)
+from quantum.quantum_key_distribution.tk_worker import TkWorker
+from quantum.quantum_key_distribution.transcript import capture, save_transcript
+from quantum.quantum_key_distribution.wire_format import (
+    PACKED_FORMAT, choose_wire_format, recv_message, request_wire_formats, send_message)
 
 def derive_aes_key(psk):
     """Derive a 256-bit AES key from the PSK."""
@@ -57,18 +67,26 @@ class BB84SenderGUI:
         
         self.setup_output_frame(main_frame)
         
-        self.queue = Queue()
+        self.worker = TkWorker(root)
 
-        self.bob_measurements = None
         self.bob_bases = None
         self.sender_bits = None
         self.sender_bases = None
         self.final_key = None
 
-        self.sent_key_hash = None
-        self.received_key_hash = None
+        self.classical_peer = None
 
         self.current_circuit = None
+        self.circuit_renderer = CircuitRenderer()
+
+        # Started on first use: it loads qiskit and runs a refill thread
+        self.entropy_pool = None
+        self.session = SenderSession(random_source=self.take_random_bits)
+
+    def take_random_bits(self, n_bits):
+        if self.entropy_pool is None:
+            self.entropy_pool = QuantumEntropyPool()
+        return self.entropy_pool.take_bits(n_bits)
 
     def get_ip(self):
         try:
@@ -106,43 +124,56 @@ class BB84SenderGUI:
         if not psk:
             messagebox.showerror("Error", "Pre-shared key cannot be empty")
             return
-        
-        aes_key = derive_aes_key(psk)
-        encrypted_sender_ip = encrypt_data(self.get_ip(), aes_key)
-        
+
+        receiver_ip = self.host_entry.get().strip()
+        if not receiver_ip:
+            messagebox.showerror("Error", "Receiver IP is required")
+            return
         try:
-            receiver_ip = self.host_entry.get().strip()
-            if not receiver_ip:
-                messagebox.showerror("Error", "Receiver IP is required")
-                return
-                
             port = int(self.port_entry.get())
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((receiver_ip, port))
-                auth_data = {
-                    'request': 'authenticate',
-                    'psk_hash': hashlib.sha256(psk.encode()).hexdigest(),
-                    'sender_ip': encrypted_sender_ip
-                }
-                s.sendall(json.dumps(auth_data).encode())
-
-                response = s.recv(4096).decode()
-                response_data = json.loads(response)
-
-                if response_data.get('status') == 'authenticated':
-                    encrypted_receiver_ip = response_data.get('receiver_ip', '')
-                    decrypted_receiver_ip = decrypt_data(encrypted_receiver_ip, aes_key)  # Decrypt received IP
-                    self.auth_success(decrypted_receiver_ip)
-                elif response_data.get('status') == 'not_ready':
-                    self.auth_status_label.config(text="Receiver not ready", foreground="orange")
-                    messagebox.showinfo("Authentication", "Receiver is not ready. Please wait for receiver to enter PSK.")
-                else:
-                    self.auth_failure()
-                    
-        except Exception as e:
-            self.display_error(f"Authentication error: {e}")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.auth_button.config(state='disabled')
+        self.auth_status_label.config(text="Authenticating...", foreground="orange")
+        self.worker.submit(self.request_authentication, psk, self.get_ip(), receiver_ip, port,
+                           on_done=self.auth_response, on_error=self.auth_error)
+
+    def request_authentication(self, psk, sender_ip, receiver_ip, port):
+        """Runs on a worker thread; returns (status, decrypted receiver IP or None)."""
+        aes_key = derive_aes_key(psk)
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.connect((receiver_ip, port))
+            auth_data = {
+                'request': 'authenticate',
+                'psk_hash': hashlib.sha256(psk.encode()).hexdigest(),
+                'sender_ip': encrypt_data(sender_ip, aes_key)
+            }
+            send_message(s, auth_data)
+            response_data = recv_message(s)
+
+        status = response_data.get('status')
+        if status == 'authenticated':
+            encrypted_receiver_ip = response_data.get('receiver_ip', '')
+            return status, decrypt_data(encrypted_receiver_ip, aes_key)  # Decrypt received IP
+        return status, None
+
+    def auth_response(self, result):
+        status, receiver_ip = result
+        if status == 'authenticated':
+            self.auth_success(receiver_ip)
+        elif status == 'not_ready':
+            self.auth_status_label.config(text="Receiver not ready", foreground="orange")
+            self.auth_button.config(state='normal')
+            messagebox.showinfo("Authentication", "Receiver is not ready. Please wait for receiver to enter PSK.")
+        else:
             self.auth_failure()
 
+    def auth_error(self, e):
+        self.display_error(f"Authentication error: {e}")
+        self.auth_failure()
+
     def auth_success(self, receiver_ip):
         self.is_authenticated = True
         status_text = f"Authenticated with Receiver at: {receiver_ip}"
@@ -164,17 +195,23 @@ class BB84SenderGUI:
         key_frame = ttk.Frame(pcompare_frame)
         key_frame.pack(fill='x', pady=5)
 
-        ttk.Label(key_frame, text="Quantum Key Subset:").pack(side='left', padx=5)
-        self.key_entry = ttk.Entry(key_frame, width=30, show="*")
-        self.key_entry.pack(side='left', padx=5, expand=True, fill='x')
+        ttk.Label(key_frame, text="Sample fraction:").pack(side='left', padx=5)
+        self.sample_fraction_entry = ttk.Entry(key_frame, width=8)
+        self.sample_fraction_entry.insert(0, str(DEFAULT_SAMPLE_FRACTION))
+        self.sample_fraction_entry.pack(side='left', padx=5)
+
+        ttk.Label(key_frame, text="Abort above QBER:").pack(side='left', padx=5)
+        self.abort_threshold_entry = ttk.Entry(key_frame, width=8)
+        self.abort_threshold_entry.insert(0, str(DEFAULT_ABORT_THRESHOLD))
+        self.abort_threshold_entry.pack(side='left', padx=5)
 
         key_button_frame = ttk.Frame(pcompare_frame)
         key_button_frame.pack(fill='x', pady=5)
         
-        ttk.Button(key_button_frame, text="Send Key Subset", 
-                command=self.send_key).pack(side='left', padx=5)
+        ttk.Button(key_button_frame, text="Estimate QBER", 
+                command=self.estimate_qber).pack(side='left', padx=5)
         
-        ttk.Button(key_button_frame, text="Compare Key Subset", 
+        ttk.Button(key_button_frame, text="Check for Eavesdropping", 
                 command=self.compare_keys).pack(side='left', padx=5)
         
     def setup_input_frame(self, parent):
@@ -230,21 +267,19 @@ class BB84SenderGUI:
         button_frame = ttk.Frame(input_frame)
         button_frame.pack(fill='x', pady=5)
 
-        self.listen_button = ttk.Button(button_frame, text="Start Listening", 
-                                        command=self.start_listening)
-        self.listen_button.pack(side='left', padx=5)
-
-        ttk.Button(button_frame, text="Start Transmission", 
-                  command=self.start_transmission).pack(side='left', padx=5)
+        self.start_button = ttk.Button(button_frame, text="Start Transmission", 
+                                       command=self.start_transmission)
+        self.start_button.pack(side='left', padx=5)
 
         ttk.Button(button_frame, text="Clear Output",
                   command=self.clear_output).pack(side='left', padx=5)
 
+        ttk.Button(button_frame, text="Save Transcript",
+                  command=self.export_transcript).pack(side='left', padx=5)
+
         ttk.Button(button_frame, text="Refresh IP Status",
                   command=self.refresh_status).pack(side='left', padx=5)
 
-        self.listening = False
-
         button_frame = ttk.Frame(input_frame)
         button_frame.pack(fill='x', pady=5)
     
@@ -255,66 +290,27 @@ class BB84SenderGUI:
     def setup_output_frame(self, parent):
         output_frame = ttk.LabelFrame(parent, text="Results", padding="10")
         output_frame.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.result_table = VirtualTable(output_frame)
+        self.result_table.pack(fill='x', pady=(0, 5))
         
-        self.output = scrolledtext.ScrolledText(output_frame, height=20)
+        self.output = scrolledtext.ScrolledText(output_frame, height=10)
         self.output.pack(fill='both', expand=True)
 
         
     def clear_output(self):
         self.output.delete(1.0, tk.END)
+        self.result_table.clear()
 
-    def start_listening(self):
-        if not self.listening:
-            try:
-                host = '0.0.0.0'
-                port = int(self.port_entry.get())
-                
-                self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                self.server_socket.bind((host, port))
-                self.server_socket.listen()
-                
-                self.listening = True
-                self.listen_button.config(text="Stop Listening")
-                
-                pvt_ip = self.get_ip()
-                if pvt_ip:
-                    self.output.insert(tk.END, f"Private IP: {pvt_ip}\n")
-                self.output.insert(tk.END, f"Listening on port: {port}\n")
-                self.output.insert(tk.END, "Waiting for incoming connections...\n")
-                
-                threading.Thread(target=self.listen_for_connection, daemon=True).start()
-                
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
-        else:
-            self.stop_listening()
-            
-    def generate_quantum_random_bits(self, num_bits):
-        num_qubits_per_chunk = 16
-        total_key_length = num_bits
-        key_binary = ''
-        
-        while len(key_binary) < total_key_length:
-            qc = QuantumCircuit(num_qubits_per_chunk)
-            for qubit in range(num_qubits_per_chunk):
-                qc.h(qubit)
-            qc.measure_all()
-
-            self.current_circuit = qc
-            # Enable the visualization button
-            self.visualize_button.config(state='normal')
-            
-            backend = AerSimulator()
-            compiled_circuit = transpile(qc, backend)
-            job = backend.run(compiled_circuit, shots=1)
-            result = job.result()
-            counts = result.get_counts()
-            random_chunk = list(counts.keys())[0]
-            key_binary += random_chunk
-        
-        key_binary = key_binary[:total_key_length]
-        return [int(bit) for bit in key_binary]
+    def export_transcript(self):
+        if not self.session.steps:
+            messagebox.showwarning("Warning", "No session to save yet")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("Session transcripts", "*.json")])
+        if path:
+            save_transcript(path, capture(self.session))
+            self.output.insert(tk.END, f"\nSession transcript saved to {path}\n")
 
     def manual_input_dialog(self, n_bits):
         dialog = tk.Toplevel(self.root)
@@ -380,25 +376,33 @@ class BB84SenderGUI:
         
         dialog.wait_window()
         
-        return sender_bits, sender_bases if sender_bits else (None, None)
+        return (sender_bits, sender_bases) if sender_bits else (None, None)
+
+    def log(self, text):
+        """Append to the output from any thread."""
+        self.worker.call_soon(self.output.insert, tk.END, text)
 
     def send_data(self, host, port, data):
+        """Blocking request/response with a peer; call it from a worker thread."""
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                self.output.insert(tk.END, f"Attempting to connect to {host}:{port}\n")
+                self.log(f"Attempting to connect to {host}:{port}\n")
                 s.connect((host, port))
-                self.output.insert(tk.END, f"Connected to {host}:{port}\n")
-                s.sendall(json.dumps(data).encode())
-                response = s.recv(4096).decode()
-                return json.loads(response), True
+                self.log(f"Connected to {host}:{port}\n")
+                send_message(s, data)
+                return recv_message(s), True
         except ConnectionRefusedError:
-            self.display_error(f"Connection refused by {host}:{port}")
+            self.worker.call_soon(self.display_error, f"Connection refused by {host}:{port}")
             return None, False
         except Exception as e:
-            self.display_error(f"Error connecting to {host}:{port}: {e}")
+            self.worker.call_soon(self.display_error, f"Error connecting to {host}:{port}: {e}")
             return None, False
 
-    from time import perf_counter
+    def build_quantum_state(self, host, port, start_time):
+        wire_format = choose_wire_format(request_wire_formats(host, port))
+        if wire_format == PACKED_FORMAT:
+            self.log(f"Using packed quantum state format with {host}:{port}\n")
+        return self.session.quantum_state(wire_format, start_time)
 
     def start_transmission(self):
         eve_ip = self.eve_entry.get().strip()
@@ -406,9 +410,6 @@ class BB84SenderGUI:
             messagebox.showerror("Error", "Please authenticate first")
             return
         try:
-            self.current_circuit = None
-            self.visualize_button.config(state='disabled')
-            
             n_bits = int(self.n_qubits.get())
             if n_bits <= 0:
                 raise ValueError("Number of qubits must be positive")
@@ -417,197 +418,172 @@ class BB84SenderGUI:
             if not receiver_ip:
                 raise ValueError("Receiver IP is required")
                 
-            eve_ip = self.eve_entry.get().strip()
             port_eve = 12346
             port_receiver = int(self.port_entry.get())
 
-            if self.mode_var.get() == "auto":
-                sender_bits = self.generate_quantum_random_bits(n_bits)
-                sender_bases = ['+' if b == 0 else 'x' 
-                                for b in self.generate_quantum_random_bits(n_bits)]
-            else:
+            manual_input = None
+            if self.mode_var.get() != "auto":
                 sender_bits, sender_bases = self.manual_input_dialog(n_bits)
                 if not sender_bits:
                     return
-            
-            self.output.delete(1.0, tk.END)
-            self.output.insert(tk.END, "Starting quantum transmission...\n\n")
-            self.output.insert(tk.END, "Alice's Bits: " + str(sender_bits) + "\n\n")
-            self.output.insert(tk.END, "Alice's Bases: " + str(sender_bases) + "\n\n")
-            
-            # Create a quantum circuit to encode Alice's qubits
-            qr = QuantumRegister(n_bits, name='qr')
-            cr = ClassicalRegister(n_bits, name='cr')
-            qc = QuantumCircuit(qr, cr)
-            
-            for i in range(n_bits):
-                if sender_bits[i] == 1:
-                    qc.x(qr[i])  # Flip |0⟩ to |1⟩ if bit is 1
-                
-                if sender_bases[i] == 'x':
-                    qc.h(qr[i])  # Apply Hadamard if using X basis
-            
-            self.current_circuit = qc
-
-            circuit_ops = []
-            for instruction in qc.data:
-                gate_name = instruction.operation.name
-                qubits = [qr.index(q) for q in instruction.qubits]
-                circuit_ops.append({
-                    'gate': gate_name,
-                    'qubits': qubits
-                })
-            
-            start_time = perf_counter()
-            quantum_state = {
-                'circuit_operations': circuit_ops,
-                'n_bits': n_bits,
-                'start_time': start_time
-            }
+                manual_input = (sender_bits, sender_bases)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
 
-            if eve_ip:
-                response_data, eve_present = self.send_data(eve_ip, port_eve, quantum_state)
-            else:
-                eve_present = False
-                response_data = None
-                
-            if not eve_present:
-                self.output.insert(tk.END, "Direct connection to receiver (Eve not present)\n")
-                response_data, success = self.send_data(receiver_ip, port_receiver, quantum_state)
-                if not success:
-                    self.display_error("Failed to connect to receiver")
-                    return
-            else:
-                self.output.insert(tk.END, "Connected through Eve (Eve present)\n")
-            
-            if response_data and 'bob_bases' in response_data:
-                elapsed = perf_counter() - start_time  
-                self.output.insert(tk.END, f"\nTime from transmission start to receiver readiness: {elapsed:.6f} seconds.\n")
+        self.current_circuit = None
+        self.visualize_button.config(state='disabled')
+        self.start_button.config(state='disabled')
+        self.classical_peer = None
+        self.output.delete(1.0, tk.END)
+        self.output.insert(tk.END, "Starting quantum transmission...\n\n")
+        self.worker.submit(self.transmit, n_bits, manual_input, receiver_ip, port_receiver, eve_ip, port_eve,
+                           on_done=self.transmission_done, on_error=self.transmission_failed)
+
+    def transmit(self, n_bits, manual_input, receiver_ip, port_receiver, eve_ip, port_eve):
+        """One BB84 exchange, run on a worker thread; returns what transmission_done displays."""
+        if manual_input is None:
+            sender_bits = self.take_random_bits(n_bits)
+            sender_bases = self.take_random_bits(n_bits)
+        else:
+            sender_bits, sender_bases = manual_input
 
-                basis_comparison = {
-                    'sender_bases': sender_bases,
-                    'phase': 'basis_comparison'
-                }
+        self.session.reset()
+        # Kept as uint8 arrays (bases 0 = '+', 1 = 'x') from here on
+        sender_bits, sender_bases = self.session.prepare(bits=sender_bits, bases=sender_bases)
+        self.log("Alice's Bits: " + preview_list(sender_bits) + "\n\n")
+        self.log("Alice's Bases: " + preview_list(np.where(sender_bases, 'x', '+')) + "\n\n")
 
-                if eve_present:
-                    basis_result, _ = self.send_data(eve_ip, port_eve, basis_comparison)
-                else:
-                    basis_result, _ = self.send_data(receiver_ip, port_receiver, basis_comparison)
-                
-                if basis_result and 'bob_measurements' in basis_result:
-                    self.display_results(sender_bits, sender_bases,
-                                        basis_result['bob_bases'],
-                                        basis_result['bob_measurements'])
-                else:
-                    self.display_error("Invalid basis comparison result")
-            else:
-                self.display_error("No valid quantum measurement response received")
-                    
-        except ValueError as e:
-            messagebox.showerror("Error", str(e))
+        # Gates are only built for the page of qubits being drawn
+        qc = PreparationCircuit(sender_bits, sender_bases)
 
-    def stop_listening(self):
-        if hasattr(self, 'server_socket'):
-            try:
-                self.server_socket.close()
-            except Exception as e:
-                self.display_error(f"Error closing socket: {e}")
-        self.listening = False
-        self.listen_button.config(text="Start Listening")
-        self.output.insert(tk.END, "Stopped listening.\n")
+        start_time = perf_counter()
 
-    def listen_for_connection(self):
+        if eve_ip:
+            quantum_state = self.build_quantum_state(eve_ip, port_eve, start_time)
+            response_data, eve_present = self.send_data(eve_ip, port_eve, quantum_state)
+        else:
+            eve_present = False
+            response_data = None
+            
+        if not eve_present:
+            self.log("Direct connection to receiver (Eve not present)\n")
+            quantum_state = self.build_quantum_state(receiver_ip, port_receiver, start_time)
+            response_data, success = self.send_data(receiver_ip, port_receiver, quantum_state)
+            if not success:
+                raise ConnectionError("Failed to connect to receiver")
+        else:
+            self.log("Connected through Eve (Eve present)\n")
+        
+        if not (response_data and message_kind(response_data) == MEASUREMENTS):
+            raise ValueError("No valid quantum measurement response received")
+        elapsed = perf_counter() - start_time  
+        self.log(f"\nTime from transmission start to receiver readiness: {elapsed:.6f} seconds.\n")
+
+        basis_comparison = self.session.receive_measurements(response_data)
+        peer = (eve_ip, port_eve) if eve_present else (receiver_ip, port_receiver)
+        basis_result, _ = self.send_data(*peer, basis_comparison)
+        if not (basis_result and message_kind(basis_result) == SIFTED):
+            raise ValueError("Invalid basis comparison result")
+        self.session.receive_basis_reply(basis_result)
+        return qc, peer, sender_bits, sender_bases
+
+    def transmission_done(self, result):
+        qc, peer, sender_bits, sender_bases = result
+        self.current_circuit = qc
+        self.visualize_button.config(state='normal')
+        self.start_button.config(state='normal')
+        self.classical_peer = peer
+        self.display_results(sender_bits, sender_bases, self.session.bob_bases)
+
+    def transmission_failed(self, e):
+        self.start_button.config(state='normal')
+        self.display_error(str(e))
+
+    def estimate_qber(self):
+        if self.session.sifted is None or self.classical_peer is None:
+            messagebox.showwarning("Warning", "Run a transmission before estimating the QBER")
+            return
+        if self.session.qber_estimate is not None:
+            messagebox.showwarning("Warning", "The QBER has already been estimated for this key")
+            return
         try:
-            while self.listening:
-                try:
-                    self.server_socket.settimeout(1)
-                    client_socket, addr = self.server_socket.accept()
-                    self.root.after(0, lambda: self.output.insert(tk.END, f"\nConnected to {addr}\n"))
-
-                    data = client_socket.recv(16384).decode()
-                    received_data = json.loads(data)
-
-                    if 'request' in received_data and received_data['request'] == 'get_key':
-                        key_hash = received_data.get('key_hash')
-                        if key_hash:
-                            self.received_key_hash = key_hash
-                            response = {'status': 'received'}
-                            self.root.after(0, lambda: self.output.insert(tk.END, f"\nReceived key subset hash: {key_hash}\n"))
-                            self.root.after(0, lambda: messagebox.showinfo("Info", "Key subset hash received! Stop Listening"))
-                        else:
-                            response = {'status': 'error'}
-                        
-                        client_socket.sendall(json.dumps(response).encode())
-                        client_socket.close()
-
-                except socket.timeout:
-                    continue
-
-                except OSError as e:
-                    if not self.listening:
-                        break
-                    else:
-                        self.root.after(0, lambda: self.display_error(f"Socket error: {e}"))
-                        break
-
-                except Exception as e:
-                    self.root.after(0, lambda e=e: self.display_error(f"Error in connection: {e}"))
-                    break
+            fraction = float(self.sample_fraction_entry.get())
+            threshold = float(self.abort_threshold_entry.get())
+            sample = self.session.qber_sample(fraction, threshold=threshold)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
 
-        except Exception as e:
-            if self.listening:
-                self.root.after(0, lambda: self.output.insert(tk.END, f"\nError in listening: {e}\n"))
-        finally:
-            self.listening = False
-            self.root.after(0, lambda: self.listen_button.config(text="Start Listening"))
-
-    def send_key(self):
-        key = self.key_entry.get().strip()
-        if not key:
-            messagebox.showwarning("Warning", "Key cannot be empty")
+        self.worker.submit(self.exchange_qber_sample, sample, on_done=self.qber_reply_received,
+                           on_error=lambda e: self.display_error(f"Invalid QBER result: {e}"))
+
+    def exchange_qber_sample(self, sample):
+        """Runs on a worker thread and reconciles unless the sample aborts; None if the peer is unreachable."""
+        response_data, success = self.send_data(*self.classical_peer, sample)
+        if not success:
+            return None
+        estimate = self.session.receive_qber_reply(response_data)
+        if not estimate.abort:
+            self.reconcile()
+        return estimate
+
+    def reconcile(self):
+        """Answer the receiver's Cascade queries until the privacy amplification parameters are sent."""
+        message = self.session.reconcile()
+        while message is not None:
+            response_data, success = self.send_data(*self.classical_peer, message)
+            if not success:
+                raise ConnectionError("Lost the receiver during reconciliation")
+            if response_data.get('status') == 'error':
+                raise ValueError(response_data.get('message', 'Reconciliation failed'))
+            if message_kind(message) == PRIVACY_AMPLIFICATION:
+                break
+            message = self.session.receive_reconciliation(response_data)
+
+    def qber_reply_received(self, estimate):
+        if estimate is not None:
+            self.display_qber_estimate(estimate)
+
+    def display_qber_estimate(self, estimate):
+        self.output.insert(tk.END, f"\nPublished {estimate.n_sample} of {estimate.n_sifted} sifted bits "
+                                   f"for QBER estimation\n")
+        self.output.insert(tk.END, f"Errors in sample: {estimate.n_errors}\n")
+        self.output.insert(tk.END, f"Sample QBER: {estimate.qber*100:.2f}% "
+                                   f"({estimate.confidence*100:.0f}% Wilson interval {estimate.lower*100:.2f}% - "
+                                   f"{estimate.upper*100:.2f}%)\n")
+        self.output.insert(tk.END, f"Remaining key bits: {estimate.n_remaining}\n")
+        if estimate.abort:
+            self.final_key = None
+            self.output.insert(tk.END, f"QBER may exceed the {estimate.threshold*100:.1f}% abort threshold; "
+                                       "key discarded\n")
             return
-        
-        receiver_ip = self.host_entry.get().strip()
-        if not receiver_ip:
-            messagebox.showwarning("Warning", "Receiver IP is required")
+        session = self.session
+        self.output.insert(tk.END, f"Cascade disclosed {session.leaked_bits} parity bits\n")
+        if not session.verified:
+            self.final_key = None
+            self.output.insert(tk.END, "Reconciled keys failed verification; key discarded\n")
             return
-        
-        try:
-            key_hash = hashlib.sha256(key.encode()).hexdigest()
-            self.sent_key_hash = key_hash
-        
-            port = int(self.port_entry.get())
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((receiver_ip, port))
-                key_data = {'request': 'get_key', 'key_hash': key_hash}
-                s.sendall(json.dumps(key_data).encode())
-        
-                response = s.recv(4096).decode()
-                response_data = json.loads(response)
-        
-                if response_data.get('status') == 'received':
-                    self.output.insert(tk.END, f"\nKey subset hash sent successfully to {receiver_ip}.\n")
-                    messagebox.showinfo("Info", "Key subset sent! Please start Listening")
-                else:
-                    self.output.insert(tk.END, f"\nError: Key hash was not acknowledged.\n")
+        # Error-corrected and privacy-amplified, so this is the key both sides keep
+        self.final_key = bits_to_string(to_bits(session.secure_key, session.secure_length))
+        self.output.insert(tk.END, f"Secure key length: {session.secure_length} bits\n")
+        self.output.insert(tk.END, f"\nFinal shared key: {preview_key(self.final_key)}\n")
 
-            self.key_entry.delete(0, tk.END)
-        
-        except Exception as e:
-            self.display_error(f"Error sending key: {e}")
-        
     def compare_keys(self):
-        if not self.sent_key_hash:
-            messagebox.showwarning("Warning", "No key hash sent.")
-            return
-        if not self.received_key_hash:
-            messagebox.showwarning("Warning", "No key hash received.")
+        estimate = self.session.qber_estimate
+        if estimate is None:
+            messagebox.showwarning("Warning", "No QBER estimate available. Estimate the QBER first.")
             return
     
-        if self.sent_key_hash == self.received_key_hash:
-            messagebox.showinfo("Key Comparison", "Keys match! No eavesdropping detected.")
+        if not estimate.abort:
+            messagebox.showinfo("QBER Estimation",
+                                f"QBER {estimate.qber*100:.2f}% (upper bound {estimate.upper*100:.2f}%) "
+                                f"is below the {estimate.threshold*100:.1f}% threshold. "
+                                "No eavesdropping detected.")
         else:
-            messagebox.showerror("Eavesdropping Alert!", "WARNING: Keys do not match! Possible eavesdropping detected!")
+            messagebox.showerror("Eavesdropping Alert!",
+                                 f"WARNING: QBER upper bound {estimate.upper*100:.2f}% exceeds the "
+                                 f"{estimate.threshold*100:.1f}% threshold! Possible eavesdropping detected!")
             self.output.insert(tk.END, "\n")
             self.output.insert(tk.END, "\n----------⚠️ WARNING: POSSIBLE EAVESDROPPING DETECTED!⚠️----------\n")
     
@@ -627,6 +603,15 @@ class BB84SenderGUI:
         circuit_tab = ttk.Frame(notebook)
         notebook.add(circuit_tab, text="Circuit Diagram")
 
+        nav_frame = ttk.Frame(circuit_tab)
+        nav_frame.pack(fill='x', padx=15, pady=(5, 0))
+        prev_button = ttk.Button(nav_frame, text="◀ Previous Qubits", width=18)
+        prev_button.pack(side='left', padx=5)
+        next_button = ttk.Button(nav_frame, text="Next Qubits ▶", width=18)
+        next_button.pack(side='left', padx=5)
+        page_label = ttk.Label(nav_frame, text="")
+        page_label.pack(side='left', padx=10)
+
         circuit_frame = ttk.Frame(circuit_tab)
         circuit_frame.pack(fill='both', expand=True, padx=15, pady=5)
 
@@ -643,95 +628,54 @@ class BB84SenderGUI:
         v_scrollbar.pack(side='right', fill='y')
         canvas.pack(side='left', fill='both', expand=True)
 
-        if isinstance(self.current_circuit, qiskit.circuit.quantumcircuit.QuantumCircuit):
-            n_qubits = self.current_circuit.num_qubits
-            n_gates = len(self.current_circuit.data)
-
-            width = 8 
-            height = max(7, n_qubits * 0.9)
-            
-            fig = plt.figure(figsize=(width, height), dpi=100)
-            ax = fig.add_subplot(111)
-
-            custom_style = {
-                'backgroundcolor': '#F5F5F5',
-                'linecolor': '#333333',
-                'textcolor': '#000000',
-                'gatefacecolor': ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#1abc9c'],
-                'gatetextcolor': 'white',
-                'subfontsize': 12,
-                'fontsize': 14,
-                'creglinestyle': 'solid',
-                'creglinecolor': '#FF6600',
-                'displaytext': {
-                    'CNOT': '⊕',
-                    'X': '✕',
-                    'H': 'H',
-                    'SWAP': '⇄',
-                    'Z': 'Z',
-                    'S': 'S',
-                    'T': 'T',
-                    'RX': 'Rx',
-                    'RY': 'Ry',
-                    'RZ': 'Rz'
-                }
-            }
-
-            self.current_circuit.draw(output='mpl', 
-                                    ax=ax,
-                                    scale=0.9,
-                                    style=custom_style,
-                                    fold=20,  
-                                    plot_barriers=True, 
-                                    initial_state=True,  
-                                    with_layout=True)   
-
-            title = f"Quantum Circuit: {self.current_circuit.name}\n"
-            title += f"{n_qubits} Qubits | {len(self.current_circuit.data)} Operations | Depth: {self.current_circuit.depth()}"
-            ax.set_title(title, fontsize=16, color='#2c3e50', pad=20)
-
-            gate_types = set(instr.operation.name for instr in self.current_circuit.data)
-            gate_desc = {
-                'h': 'Hadamard (H): Creates superposition',
-                'x': 'Pauli-X: Bit flip (NOT gate)',
-                'z': 'Pauli-Z: Phase flip',
-                'y': 'Pauli-Y: Combined X and Z',
-                'cx': 'CNOT: Controlled-NOT',
-                'measure': 'Measurement: Collapses state',
-                'rx': 'RX: Rotation around X-axis',
-                'ry': 'RY: Rotation around Y-axis',
-                'rz': 'RZ: Rotation around Z-axis'
-            }
-
-            legend_text = "Gate Legend:\n\n"
-            for gate in gate_types:
-                if gate.lower() in gate_desc:
-                    legend_text += f"• {gate_desc[gate.lower()]}\n"
-
-            props = dict(boxstyle='round', facecolor='#f8f9fa', alpha=0.7)
-            ax.text(0.98, 0.02, legend_text, transform=ax.transAxes, fontsize=10,
-                    verticalalignment='bottom', horizontalalignment='right', bbox=props)
-
-            gradient = np.linspace(0, 1, 100).reshape(-1, 1)
-            gradient = np.repeat(gradient, 10, axis=1)
-            ax.imshow(gradient, aspect='auto', extent=[-0.5, -0.3, -0.5, n_qubits+0.5], 
-                    cmap='Blues', alpha=0.2, zorder=-1)
-
-            plt.tight_layout()
-
-            figure_canvas = FigureCanvasTkAgg(fig, master=canvas)
-            figure_canvas.draw()
-            figure_widget = figure_canvas.get_tk_widget()
-
-            canvas_window = canvas.create_window(0, 0, anchor='nw', window=figure_widget)
-
-            def update_scroll_region(event):
+        if isinstance(self.current_circuit, PreparationCircuit):
+            # Pages of qubits are rendered on the worker and cached as PNGs, so only the
+            # first view of each page of a transmission pays for matplotlib
+            circuit = self.current_circuit
+            renderer = self.circuit_renderer
+            n_pages = renderer.page_count(circuit)
+            view = {'page': 0, 'digest': None, 'image': None}
+
+            def render(page):
+                if view['digest'] is None:
+                    view['digest'] = renderer.digest(circuit)
+                return renderer.render(circuit, page, view['digest'])
+
+            def draw(page, png):
+                if page != view['page'] or not canvas.winfo_exists():
+                    return
+                view['image'] = tk.PhotoImage(master=canvas, data=base64.b64encode(png).decode('ascii'))
+                canvas.delete('all')
+                canvas.create_image(0, 0, anchor='nw', image=view['image'])
                 canvas.configure(scrollregion=canvas.bbox("all"))
-                
-            figure_widget.bind("<Configure>", update_scroll_region)
-
-            canvas.update_idletasks()
-            canvas.configure(scrollregion=canvas.bbox("all"))
+                if page + 1 < n_pages:
+                    self.worker.submit(render, page + 1, on_error=lambda e: None)
+
+            def render_failed(page, e):
+                if page == view['page'] and canvas.winfo_exists():
+                    canvas.delete('all')
+                    canvas.create_text(20, 20, anchor='nw', text=f"Error rendering circuit: {e}")
+
+            def show_page(page):
+                view['page'] = page
+                first = page * renderer.page_qubits
+                last = min(first + renderer.page_qubits, circuit.num_qubits) - 1
+                page_label.config(text=f"Qubits {first}-{last} of {circuit.num_qubits} "
+                                       f"(page {page + 1} of {n_pages})")
+                prev_button.config(state='normal' if page > 0 else 'disabled')
+                next_button.config(state='normal' if page + 1 < n_pages else 'disabled')
+                png = renderer.cached(view['digest'], page) if view['digest'] else None
+                if png is not None:
+                    draw(page, png)
+                    return
+                canvas.delete('all')
+                canvas.create_text(20, 20, anchor='nw', text="Rendering circuit...")
+                self.worker.submit(render, page, on_done=lambda png: draw(page, png),
+                                   on_error=lambda e: render_failed(page, e))
+
+            prev_button.config(command=lambda: show_page(view['page'] - 1))
+            next_button.config(command=lambda: show_page(view['page'] + 1))
+            show_page(0)
             
         # Tab 2: Circuit Information
         info_tab = ttk.Frame(notebook)
@@ -750,7 +694,8 @@ class BB84SenderGUI:
         info_text.tag_configure("normal", font=("Arial", 10), foreground="#333333")
         info_text.tag_configure("highlight", font=("Arial", 10, "bold"), foreground="#e74c3c")
 
-        if isinstance(self.current_circuit, qiskit.circuit.quantumcircuit.QuantumCircuit):
+        if isinstance(self.current_circuit, PreparationCircuit):
+            gate_counts = self.current_circuit.gate_counts()
             info_text.insert(tk.END, "QUANTUM CIRCUIT DETAILS\n\n", "header")
             info_text.insert(tk.END, f"Circuit Name: ", "subheader")
             info_text.insert(tk.END, f"{self.current_circuit.name}\n\n", "normal")
@@ -760,20 +705,12 @@ class BB84SenderGUI:
             info_text.insert(tk.END, f"Number of Classical Bits: {self.current_circuit.num_clbits}\n\n", "normal")
             
             info_text.insert(tk.END, "CIRCUIT COMPLEXITY\n", "subheader")
-            info_text.insert(tk.END, f"Number of Gates/Operations: {len(self.current_circuit.data)}\n", "normal")
+            info_text.insert(tk.END, f"Number of Gates/Operations: {self.current_circuit.size()}\n", "normal")
             info_text.insert(tk.END, f"Circuit Depth: {self.current_circuit.depth()}\n", "normal")
 
             info_text.insert(tk.END, f"Circuit Width: {self.current_circuit.width()}\n\n", "normal")
 
             info_text.insert(tk.END, "GATE DISTRIBUTION\n", "subheader")
-            gate_counts = {}
-            for instruction in self.current_circuit.data:
-                gate_name = instruction.operation.name
-                if gate_name in gate_counts:
-                    gate_counts[gate_name] += 1
-                else:
-                    gate_counts[gate_name] = 1
-
             sorted_gates = sorted(gate_counts.items(), key=lambda x: x[1], reverse=True)
             for i, (gate, count) in enumerate(sorted_gates):
                 tag = "highlight" if i == 0 else "normal"
@@ -781,30 +718,19 @@ class BB84SenderGUI:
 
             info_text.insert(tk.END, "\nCIRCUIT PROPERTIES\n", "subheader")
 
-            has_measurements = any(instr.operation.name == "measure" for instr in self.current_circuit.data)
-            info_text.insert(tk.END, f"Has Measurements: {'Yes' if has_measurements else 'No'}\n", "normal")
-
-            has_conditions = any(instr.operation.condition is not None for instr in self.current_circuit.data)
-            info_text.insert(tk.END, f"Has Conditional Operations: {'Yes' if has_conditions else 'No'}\n", "normal")
-
-            has_entanglement = any(len(instr.qubits) > 1 for instr in self.current_circuit.data)
-            info_text.insert(tk.END, f"Has Entanglement Potential: {'Yes' if has_entanglement else 'No'}\n", "normal")
+            # Preparation is unconditional single-qubit X and H gates, measured by the receiver
+            info_text.insert(tk.END, "Has Measurements: No\n", "normal")
+            info_text.insert(tk.END, "Has Conditional Operations: No\n", "normal")
+            info_text.insert(tk.END, "Has Entanglement Potential: No\n", "normal")
 
         visual_frame = ttk.Frame(right_frame)
         visual_frame.pack(fill='both', expand=True, padx=5, pady=5)
 
-        if isinstance(self.current_circuit, qiskit.circuit.quantumcircuit.QuantumCircuit):
+        if isinstance(self.current_circuit, PreparationCircuit):
             fig_gate = plt.figure(figsize=(5, 4))
             ax_gate = fig_gate.add_subplot(111)
 
-            gate_counts = {}
-            for instruction in self.current_circuit.data:
-                gate_name = instruction.operation.name
-                if gate_name in gate_counts:
-                    gate_counts[gate_name] += 1
-                else:
-                    gate_counts[gate_name] = 1
-
+            gate_counts = self.current_circuit.gate_counts()
             labels = list(gate_counts.keys())
             sizes = list(gate_counts.values())
             colors = plt.cm.viridis(np.linspace(0, 1, len(labels)))
@@ -952,7 +878,7 @@ class BB84SenderGUI:
         reset_button.pack(side='right', padx=10)
         
         # Tab 4: Measurement Probabilities
-        if hasattr(self, 'sender_bits') and self.sender_bits and isinstance(self.current_circuit, QuantumCircuit):
+        if self.sender_bits is not None and isinstance(self.current_circuit, PreparationCircuit):
             prob_tab = ttk.Frame(notebook)
             notebook.add(prob_tab, text="Measurement Probabilities")
 
@@ -960,25 +886,17 @@ class BB84SenderGUI:
             ax_prob = fig_prob.add_subplot(111)
             
             try:
-                sim_circuit = self.current_circuit.copy()
-                sim_circuit.remove_final_measurements(inplace=True)
-
-                n_qubits = len(self.sender_bits)
-
-                new_circ = QuantumCircuit(n_qubits, n_qubits)
-                new_circ.compose(sim_circuit, qubits=range(n_qubits), inplace=True)
-                new_circ.measure(range(n_qubits), range(n_qubits))
-
-                backend = AerSimulator()
-                compiled = transpile(new_circ, backend)
-                result = backend.run(compiled, shots=1024).result()
-                counts = result.get_counts()
-
-                ax_prob.bar(counts.keys(), [count / 1024 for count in counts.values()])
-                ax_prob.set_xlabel('Bit String')
-                ax_prob.set_ylabel('Probability')
-                ax_prob.set_title('Measurement Probabilities (1024 shots)')
-                plt.setp(ax_prob.get_xticklabels(), rotation=45, ha='right')
+                # Sampled from the prepared product state rather than simulating the whole circuit
+                state = ProductState.from_bb84(self.session.bits, self.session.bases)
+                if state.n_qubits <= MAX_STATEVECTOR_QUBITS:
+                    counts = state.sample_counts(DEFAULT_SHOTS)
+                    ax_prob.bar(counts.keys(), [count / DEFAULT_SHOTS for count in counts.values()])
+                    ax_prob.set_xlabel('Bit String')
+                    ax_prob.set_ylabel('Probability')
+                    ax_prob.set_title(f'Measurement Probabilities ({DEFAULT_SHOTS} shots)')
+                    plt.setp(ax_prob.get_xticklabels(), rotation=45, ha='right')
+                else:
+                    self.plot_qubit_marginals(ax_prob, state)
                 plt.tight_layout()
 
                 prob_canvas = FigureCanvasTkAgg(fig_prob, master=prob_tab)
@@ -998,7 +916,7 @@ class BB84SenderGUI:
         circuit_window.minsize(circuit_window.winfo_width(), circuit_window.winfo_height())
 
     def plot_state_vector(self, ax=None, force_example=None):
-        if not hasattr(self, 'sender_bits') or not self.sender_bits:
+        if self.sender_bits is None:
             return
             
         if ax is None:
@@ -1006,43 +924,16 @@ class BB84SenderGUI:
 
         n_qubits = len(self.sender_bits)
 
-        try:
-            if force_example is None:
-                sim_circuit = self.current_circuit.copy()
-                sim_circuit.remove_final_measurements(inplace=True)
-
-                backend = AerSimulator(method='statevector')
-                job = transpile(sim_circuit, backend)
-                result = job.result()
-                statevector = result.get_statevector()
-            elif force_example == 'uniform':
-                n_states = 2**n_qubits
-                statevector = np.ones(n_states) / np.sqrt(n_states)
-                phases = np.exp(1j * np.random.uniform(0, 2*np.pi, n_states))
-                statevector = statevector * phases
-            elif force_example == 'non-uniform':
-                n_states = 2**n_qubits
-                
-                amplitudes = np.zeros(n_states)
-                for i in range(n_states):
-                    binary = format(i, f'0{n_qubits}b')
-                    num_ones = binary.count('1')
-                    amplitudes[i] = num_ones + 1
-                    
-                amplitudes += np.random.normal(0, 0.2, n_states)
-
-                amplitudes = np.abs(amplitudes)
-
-                amplitudes = amplitudes / np.sqrt(np.sum(amplitudes**2))
-
-                phases = np.exp(1j * np.random.uniform(0, 2*np.pi, n_states))
-                statevector = amplitudes * phases
-        except Exception as e:
-            print(f"Error generating statevector: {e}")
-            n_states = 2**n_qubits
-            statevector = np.ones(n_states) / np.sqrt(n_states)
-            phases = np.exp(1j * np.random.uniform(0, 2*np.pi, n_states))
-            statevector = statevector * phases
+        # BB84 states are product states: beyond a few qubits only per-qubit quantities are computed
+        if force_example == 'uniform':
+            state = uniform_example(n_qubits)
+        elif force_example == 'non-uniform':
+            state = non_uniform_example(n_qubits)
+        else:
+            state = ProductState.from_bb84(self.session.bits, self.session.bases)
+        if n_qubits > MAX_STATEVECTOR_QUBITS:
+            return self.plot_qubit_marginals(ax, state)
+        statevector = state.statevector()
 
         probabilities = np.abs(statevector)**2
         phases = np.angle(statevector)
@@ -1087,7 +978,7 @@ class BB84SenderGUI:
             ax.set_yticklabels(y_labels)
             plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
 
-            for i in range(grid_rows):
+            for i in range(grid_rows if grid_rows * grid_cols <= 256 else 0):
                 for j in range(grid_cols):
                     prob_val = prob_grid[i, j]
                     prob_text = f"{prob_val:.3f}"
@@ -1166,6 +1057,40 @@ class BB84SenderGUI:
         
         return ax
 
+    def plot_qubit_marginals(self, ax, state):
+        """Per-qubit P(1), analytic and sampled, colored by <X>; bars average neighbouring qubits for long runs."""
+        bloch = state.bloch_vectors()
+        exact = state.probabilities_one()
+        sampled = state.sample_marginals(DEFAULT_SHOTS)
+        starts, bin_size, (exact, sampled, x_component) = bin_qubits([exact, sampled, bloch[:, 0]])
+
+        norm = plt.Normalize(-1, 1)
+        ax.bar(starts, exact, width=bin_size, align='edge', color=plt.cm.coolwarm(norm(x_component)),
+               label='P(1), analytic')
+        ax.plot(starts + bin_size / 2, sampled, '.', color='#2c3e50', markersize=4,
+                label=f'P(1), sampled ({DEFAULT_SHOTS} shots)')
+        sm = plt.cm.ScalarMappable(cmap=plt.cm.coolwarm, norm=norm)
+        sm.set_array([])
+        plt.colorbar(sm, ax=ax, label='Bloch x component ⟨X⟩')
+
+        ax.set_xlim(0, state.n_qubits)
+        ax.set_ylim(0, 1.1)
+        ax.set_xlabel("Qubit" if bin_size == 1 else f"Qubit (bars average {bin_size} qubits)", fontsize=12)
+        ax.set_ylabel("Probability of measuring 1", fontsize=12)
+        ax.set_title(f"Per-qubit Marginals of a {state.n_qubits}-qubit Product State", fontsize=14, pad=20)
+        ax.legend(loc='upper right', fontsize=9)
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+        x, z = bloch[:, 0].round(), bloch[:, 2].round()
+        legend_text = f"Total qubits: {state.n_qubits}\n"
+        legend_text += (f"|0⟩: {np.count_nonzero(z == 1)}   |1⟩: {np.count_nonzero(z == -1)}   "
+                        f"|+⟩: {np.count_nonzero(x == 1)}   |−⟩: {np.count_nonzero(x == -1)}\n")
+        legend_text += f"Mean P(1): {exact.mean():.3f}"
+        props = dict(boxstyle='round', facecolor='#f0f0f0', alpha=0.8)
+        ax.text(0.02, 0.98, legend_text, transform=ax.transAxes, fontsize=9,
+                verticalalignment='top', bbox=props)
+        return ax
+
     def create_quantum_state_tab(self, notebook):
         state_tab = ttk.Frame(notebook)
 
@@ -1201,7 +1126,8 @@ class BB84SenderGUI:
                                             command=lambda: self.show_example_state('non-uniform'))
         non_uniform_example_btn.pack(side='left', padx=5)
 
-        info_text = ("This visualization shows the quantum state vector of your circuit.\n"
+        info_text = ("This visualization shows the quantum state vector of your circuit "
+                     f"(per-qubit marginals beyond {MAX_STATEVECTOR_QUBITS} qubits).\n"
                     "Uniform superposition states show all possible states with equal probability.\n"
                     "Non-uniform states show varying probabilities across different states.")
         info_label = ttk.Label(main_frame, text=info_text, background='#f0f0f0', 
@@ -1235,45 +1161,28 @@ class BB84SenderGUI:
             self.state_canvas.figure = fig_state
             self.state_canvas.draw()
     
-    def display_results(self, sender_bits, sender_bases, bob_bases, bob_measurements):
+    def display_results(self, sender_bits, sender_bases, bob_bases):
         self.sender_bits = sender_bits
         self.sender_bases = sender_bases
         self.bob_bases = bob_bases
-        self.bob_measurements = bob_measurements
-        kept_indices = [i for i in range(len(sender_bits)) if sender_bases[i] == bob_bases[i]]
-        
-        self.output.insert(tk.END, "\nBB84 Protocol Results\n")
-        self.output.insert(tk.END, "-" * 70 + "\n")
-        self.output.insert(tk.END, "Bit\tAlice's\tAlice's\tBob's\tBob's\tBit\n")
-        self.output.insert(tk.END, "No.\tBit\tBasis\tBasis\tMeasure\tKept?\n")
-        self.output.insert(tk.END, "-" * 70 + "\n")
-        
-        for i in range(len(sender_bits)):
-            kept = "Yes" if i in kept_indices else "No"
-            self.output.insert(tk.END, 
-                            f"{i}\t{sender_bits[i]}\t{sender_bases[i]}\t"
-                            f"{bob_bases[i]}\t{bob_measurements[i]}\t{kept}\n")
+        sifted = self.session.sifted
         
-        sender_key = [sender_bits[i] for i in kept_indices]
-        receiver_key = [bob_measurements[i] for i in kept_indices]
-        
-        final_key = ''.join(str(bit) for bit in sender_key)
-        self.output.insert(tk.END, "-" * 70 + "\n")
-        self.output.insert(tk.END, f"\nFinal shared key: {final_key}\n")
-        self.final_key = final_key
-
-        subset_length = max(1, len(final_key) * 20 // 100)
-        key_subset = final_key[:subset_length]
-        self.output.insert(tk.END, f"\nKey subset for verification: {key_subset}\n")
+        session = self.session
+        self.result_table.show(
+            ["Alice's Bit", "Alice's Basis", "Bob's Basis", "Kept?"],
+            [(session.bits, BIT_LABELS), (session.bases, BASIS_LABELS), (session.bob_bases, BASIS_LABELS),
+             (sifted.mask, KEPT_LABELS)])
 
-        self.key_entry.delete(0, tk.END)
-        self.key_entry.insert(0, key_subset)
+        self.output.insert(tk.END, "\nBB84 Protocol Results (per-qubit table above)\n")
         
-        matching_bases = len(kept_indices)
-        self.output.insert(tk.END, f"\nTotal qubits: {len(sender_bits)}\n")
-        self.output.insert(tk.END, f"Matching Bases: {matching_bases}\n")
+        # No key is final until the QBER sample has been published and checked
+        self.final_key = None
+        self.output.insert(tk.END, f"\nSifted key: {preview_key(sifted.key_string())}\n")
+
+        self.output.insert(tk.END, f"\nTotal qubits: {sifted.n_total}\n")
+        self.output.insert(tk.END, f"Matching Bases: {sifted.n_sifted}\n")
         self.output.insert(tk.END, 
-                        f"Key Generation Rate: {(matching_bases/len(sender_bits))*100:.2f}%\n")
+                        f"Key Generation Rate: {sifted.match_rate*100:.2f}%\n")
     
     def display_error(self, error_message):
         self.output.insert(tk.END, f"\nError: {error_message}\n")
@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.quantum_key_distribution.framing import recv_frame_async
+from quantum.quantum_key_distribution.protocol import (
+    BASIS_COMPARISON, CASCADE_PARITIES, CASCADE_START, PRIVACY_AMPLIFICATION, QBER_SAMPLE, QUANTUM_STATE,
+    REQUEST, ReceiverSession, message_kind)
+from quantum.quantum_key_distribution.wire_format import (
+    decode_message, packed_size, send_message_async, wire_formats_response)
+
+# States above this size are measured off the event loop
+INLINE_MEASURE_BITS = 1 << 16
+
+
+class _SessionEntry:
+    def __init__(self, session):
+        self.session = session
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+
+class ReceiverService:
+    """asyncio BB84 receiver serving many concurrent senders.
+
+    Each connection runs its exchanges in its own ReceiverSession, and
+    quantum states are measured as soon as they arrive. Session IDs are
+    generated here and reported back for logging only: a session belongs to
+    the connection that opened it and ends with it, and any 'session_id' a
+    client puts in a message is ignored.
+
+    A session lasts from the quantum state through sifting, the QBER
+    sample and Cascade to privacy amplification, which the service answers
+    with {'status': 'ok', 'secure_length': ...}. Only then does it count as
+    completed and reach on_complete(session_id, session) with its
+    `secure_key`; a QBER over the abort threshold or a key that fails
+    verification ends it as aborted, with no callback.
+
+    Memory is bounded by max_connections * max_frame_bytes for messages in
+    flight plus max_sessions * max_qubits for session state: further
+    connections and sessions are turned away with {'status': 'busy'}, and
+    sessions idle for longer than session_timeout seconds are dropped. A
+    malformed message of any kind gets {'status': 'error'} and closes the
+    connection.
+    """
+
+    def __init__(self, host='0.0.0.0', port=12345, backend='numpy', max_sessions=1024,
+                 max_qubits=1 << 20, session_timeout=60.0, seed=None, on_complete=None,
+                 max_connections=None, max_frame_bytes=None):
+        self.host = host
+        self.port = port
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.max_connections = max_connections or max_sessions
+        self.max_qubits = max_qubits
+        self.session_timeout = session_timeout
+        self.on_complete = on_complete
+        # JSON circuit operations are far larger per qubit than the packed format
+        self.max_frame_bytes = max_frame_bytes or max(packed_size(max_qubits), 64 * max_qubits + 4096)
+        self._seeds = np.random.SeedSequence(seed) if seed is not None else None
+
+        self.sessions = {}
+        self.stats = {'started': 0, 'completed': 0, 'aborted': 0, 'rejected': 0, 'expired': 0, 'errors': 0}
+        self._server = None
+        self._sweeper = None
+        self._connections = set()
+
+    @property
+    def address(self):
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  backlog=self.max_sessions)
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+        return self.address
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._server is not None:
+            self._server.close()
+            # Let open connections finish closing so their tasks are not cancelled mid-close
+            if self._connections:
+                await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def _new_session(self):
+        if len(self.sessions) >= self.max_sessions:
+            self._expire_idle()
+        if len(self.sessions) >= self.max_sessions:
+            self.stats['rejected'] += 1
+            return None
+        rng = self._seeds.spawn(1)[0] if self._seeds is not None else None
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = _SessionEntry(ReceiverSession(backend=self.backend, rng=rng))
+        self.stats['started'] += 1
+        return session_id
+
+    def _finish(self, session_id):
+        """Drop a session that has run its course, handing its key to on_complete if it made one."""
+        session = self.sessions.pop(session_id).session
+        if not session.secure_length or not session.verified:
+            self.stats['aborted'] += 1
+            return
+        self.stats['completed'] += 1
+        if self.on_complete is not None:
+            self.on_complete(session_id, session)
+
+    def _expire_idle(self):
+        cutoff = time.monotonic() - self.session_timeout
+        expired = [sid for sid, entry in self.sessions.items() if entry.last_seen < cutoff]
+        for session_id in expired:
+            del self.sessions[session_id]
+        self.stats['expired'] += len(expired)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.session_timeout / 4))
+            self._expire_idle()
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        if len(self._connections) >= self.max_connections:
+            self.stats['rejected'] += 1
+            await self._close_with(writer, {'status': 'busy'})
+            return
+        self._connections.add(task)
+        # The only session this connection may use, always one this service generated
+        session_id = None
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(
+                        recv_frame_async(reader, self.max_frame_bytes), self.session_timeout)
+                except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+                    break
+                try:
+                    message = decode_message(payload)
+                    del payload
+                    if not isinstance(message, dict):
+                        raise ValueError("Messages must be JSON objects")
+                    reply, session_id = await self._dispatch(message, session_id)
+                except Exception as e:
+                    # Whatever a malformed message makes the session raise is the client's
+                    # protocol error, never a reason to let the service fail
+                    self.stats['errors'] += 1
+                    reply = {'status': 'error', 'message': str(e) or type(e).__name__}
+                await send_message_async(writer, reply)
+                if isinstance(reply, dict) and reply.get('status') in ('busy', 'error'):
+                    break
+        except ValueError as e:
+            # Frame over max_frame_bytes
+            self.stats['errors'] += 1
+            await self._close_with(writer, {'status': 'error', 'message': str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            if session_id is not None:
+                self.sessions.pop(session_id, None)
+            await self._close_with(writer)
+            self._connections.discard(task)
+
+    async def _close_with(self, writer, reply=None):
+        try:
+            if reply is not None:
+                await send_message_async(writer, reply)
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _dispatch(self, message, session_id):
+        kind = message_kind(message)
+
+        if kind == REQUEST:
+            if message['request'] == 'wire_formats':
+                return wire_formats_response(), session_id
+            if message['request'] == 'open_session':
+                if session_id not in self.sessions:
+                    session_id = self._new_session()
+                    if session_id is None:
+                        return {'status': 'busy'}, None
+                return {'status': 'ok', 'session_id': session_id}, session_id
+            return {'status': 'error', 'message': 'Unknown request'}, session_id
+
+        if kind == QUANTUM_STATE:
+            n_bits = message.get('n_bits')
+            if not isinstance(n_bits, int) or isinstance(n_bits, bool) or not 0 < n_bits <= self.max_qubits:
+                return {'status': 'error',
+                        'message': f"n_bits must be an integer from 1 to {self.max_qubits}"}, session_id
+            if session_id not in self.sessions:
+                session_id = self._new_session()
+                if session_id is None:
+                    return {'status': 'busy'}, None
+            entry = self.sessions[session_id]
+            entry.touch()
+            try:
+                entry.session.accept_quantum_state(message)
+                if entry.session.n_bits > INLINE_MEASURE_BITS:
+                    reply = await asyncio.get_running_loop().run_in_executor(None, entry.session.measure)
+                else:
+                    reply = entry.session.measure()
+            except Exception:
+                # The connection is closed on errors, so its session goes with it
+                del self.sessions[session_id]
+                raise
+            # Packed replies carry only the bases; open_session reports the ID for those clients
+            if isinstance(reply, dict):
+                reply['session_id'] = session_id
+            return reply, session_id
+
+        if kind in (BASIS_COMPARISON, QBER_SAMPLE, CASCADE_START, CASCADE_PARITIES, PRIVACY_AMPLIFICATION):
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                return {'status': 'error', 'message': 'Unknown session'}, session_id
+            entry.touch()
+            session = entry.session
+            if kind == BASIS_COMPARISON:
+                reply = session.receive_basis_comparison(message)
+            elif kind == QBER_SAMPLE:
+                reply = session.receive_qber_sample(message)
+            else:
+                reply = session.receive_reconciliation(message)
+            if reply is None:
+                reply = {'status': 'ok', 'secure_length': session.secure_length}
+            reply['session_id'] = session_id
+            if session.secure_key is not None or (kind == QBER_SAMPLE and session.qber_estimate.abort):
+                self._finish(session_id)
+                return reply, None
+            return reply, session_id
+
+        return {'status': 'error', 'message': 'Unknown message'}, session_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BB84 receiver service for concurrent senders')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to bind (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=12345, help='Port number (default: 12345)')
+    parser.add_argument('--backend', choices=['numpy', 'aer'], default='numpy',
+                        help='Measurement simulator (default: numpy)')
+    parser.add_argument('--max-sessions', type=int, default=1024,
+                        help='Maximum concurrent sessions (default: 1024)')
+    parser.add_argument('--max-qubits', type=int, default=1 << 20,
+                        help='Maximum qubits per session (default: 1048576)')
+    parser.add_argument('--session-timeout', type=float, default=60.0,
+                        help='Seconds before an idle session is dropped (default: 60)')
+    parser.add_argument('--max-connections', type=int, default=None,
+                        help='Maximum open connections (default: --max-sessions)')
+    parser.add_argument('--max-frame-bytes', type=int, default=None,
+                        help='Largest message accepted, in bytes (default: enough for --max-qubits as JSON)')
+    args = parser.parse_args()
+
+    service = ReceiverService(args.host, args.port, args.backend, args.max_sessions,
+                              args.max_qubits, args.session_timeout,
+                              max_connections=args.max_connections, max_frame_bytes=args.max_frame_bytes)
+    print(f"BB84 receiver service listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main()
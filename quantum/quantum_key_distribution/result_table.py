@@ -0,0 +1,114 @@
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+BIT_LABELS = ('0', '1')
+BASIS_LABELS = ('+', 'x')
+KEPT_LABELS = ('No', 'Yes')
+DEFAULT_VISIBLE_ROWS = 12
+
+
+class VirtualTable(ttk.Frame):
+    """Per-qubit table that only materializes the rows in view.
+
+    The Treeview holds exactly one page of items whatever the run length;
+    scrolling rewrites their values from the NumPy columns, so a 10M-qubit
+    run costs the same to show and scroll as a 10-qubit one.
+
+        table.show(["Alice's Bit", "Alice's Basis"], [(bits, BIT_LABELS), (bases, BASIS_LABELS)])
+
+    Each column is a (values, labels) pair; values index into labels.
+    """
+
+    def __init__(self, parent, visible_rows=DEFAULT_VISIBLE_ROWS, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.visible_rows = visible_rows
+        self.tree = ttk.Treeview(self, show='headings', height=visible_rows, selectmode='none')
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.columns = []
+        self.n_rows = 0
+        self.first = 0
+        self._items = []
+
+        self.tree.bind('<MouseWheel>', self._on_wheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+        self.tree.bind('<Prior>', lambda event: self.scroll(-self.visible_rows))
+        self.tree.bind('<Next>', lambda event: self.scroll(self.visible_rows))
+        self.tree.bind('<Home>', lambda event: self.scroll_to(0))
+        self.tree.bind('<End>', lambda event: self.scroll_to(self.n_rows))
+
+    def show(self, headings, columns):
+        """Replace the table contents; every column must have the same length."""
+        columns = [(np.asarray(values), np.asarray(labels)) for values, labels in columns]
+        lengths = {values.size for values, _ in columns}
+        if len(lengths) > 1:
+            raise ValueError("Table columns must have the same length")
+        self.columns = columns
+        self.n_rows = lengths.pop() if lengths else 0
+
+        names = ['row'] + [f'c{i}' for i in range(len(columns))]
+        self.tree.configure(columns=names)
+        self.tree.heading('row', text='No.')
+        self.tree.column('row', width=90, anchor='e', stretch=False)
+        for name, heading in zip(names[1:], headings):
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=90, anchor='center')
+
+        self.tree.delete(*self.tree.get_children())
+        self._items = [self.tree.insert('', 'end') for _ in range(min(self.visible_rows, self.n_rows))]
+        self.first = 0
+        self._render()
+
+    def clear(self):
+        self.show([], [])
+
+    def scroll(self, n_rows):
+        self.scroll_to(self.first + n_rows)
+
+    def scroll_to(self, first):
+        first = max(0, min(int(first), self.n_rows - len(self._items)))
+        if first != self.first:
+            self.first = first
+            self._render()
+
+    def yview(self, *args):
+        """Scrollbar callback in the Tk protocol ('moveto', fraction) / ('scroll', n, units|pages)."""
+        if args[0] == 'moveto':
+            self.scroll_to(round(float(args[1]) * self.n_rows))
+        elif args[0] == 'scroll':
+            step = len(self._items) if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
+
+    def _render(self):
+        stop = self.first + len(self._items)
+        cells = [labels[values[self.first:stop].astype(np.intp)] for values, labels in self.columns]
+        for offset, item in enumerate(self._items):
+            row = [self.first + offset] + [column[offset] for column in cells]
+            self.tree.item(item, values=row)
+        if self.n_rows:
+            self.scrollbar.set(self.first / self.n_rows, stop / self.n_rows)
+        else:
+            self.scrollbar.set(0, 1)
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("VirtualTable demo")
+    n = 10_000_000
+    rng = np.random.default_rng()
+    bits = rng.integers(0, 2, n, dtype=np.uint8)
+    bases = rng.integers(0, 2, n, dtype=np.uint8)
+    table = VirtualTable(root)
+    table.pack(fill='both', expand=True)
+    table.show(["Bit", "Basis"], [(bits, BIT_LABELS), (bases, BASIS_LABELS)])
+    root.mainloop()
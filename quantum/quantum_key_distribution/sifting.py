@@ -0,0 +1,109 @@
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array
+
+PREVIEW_ROWS = 500
+PREVIEW_KEY_BITS = 4096
+
+
+class SiftResult:
+    """Outcome of BB84 basis sifting.
+
+    `mask` marks the qubits measured in the preparation basis, `key_bits` holds
+    the kept bits (one uint8 per bit) and `key` the same bits packed MSB-first.
+    `qber` is only set when both sides' bits were available to compare.
+    """
+
+    def __init__(self, mask, key_bits, n_errors=None):
+        self.mask = mask
+        self.key_bits = key_bits
+        self.key = np.packbits(key_bits).tobytes()
+        self.n_total = mask.size
+        self.n_sifted = key_bits.size
+        self.n_errors = n_errors
+        self.match_rate = self.n_sifted / self.n_total if self.n_total else 0.0
+        if n_errors is not None and self.n_sifted:
+            self.qber = n_errors / self.n_sifted
+        else:
+            self.qber = None
+
+    def key_string(self, limit=None):
+        return bits_to_string(self.key_bits if limit is None else self.key_bits[:limit])
+
+    def stats(self):
+        return {
+            'n_total': self.n_total,
+            'n_sifted': self.n_sifted,
+            'match_rate': self.match_rate,
+            'n_errors': self.n_errors,
+            'qber': self.qber,
+        }
+
+
+def basis_mask(bases_a, bases_b):
+    """Boolean mask of positions where both parties used the same basis."""
+    bases_a = bases_to_array(bases_a)
+    bases_b = bases_to_array(bases_b)
+    if bases_a.shape != bases_b.shape:
+        raise ValueError("Basis sequences must have the same length")
+    return bases_a == bases_b
+
+
+def sift(bases_a, bases_b, bits_a=None, bits_b=None, detected=None):
+    """Sift a BB84 run in O(n).
+
+    The key is taken from bits_b when given (the receiver's view), otherwise
+    from bits_a. When both are given the mismatches on the sifted positions
+    give the QBER estimate. `detected` drops qubits the receiver never saw.
+    """
+    mask = basis_mask(bases_a, bases_b)
+    if detected is not None:
+        mask &= np.asarray(detected, dtype=bool)
+    if bits_a is None and bits_b is None:
+        raise ValueError("At least one side's bits are required to build a key")
+
+    kept_a = np.asarray(bits_a, dtype=np.uint8)[mask] if bits_a is not None else None
+    kept_b = np.asarray(bits_b, dtype=np.uint8)[mask] if bits_b is not None else None
+
+    n_errors = None
+    if kept_a is not None and kept_b is not None:
+        n_errors = int(np.count_nonzero(kept_a != kept_b))
+    return SiftResult(mask, kept_b if kept_b is not None else kept_a, n_errors)
+
+
+def bits_to_string(bits):
+    """Render a 0/1 array as a '0101...' string without a per-bit Python loop."""
+    return (np.asarray(bits, dtype=np.uint8) + ord('0')).tobytes().decode('ascii')
+
+
+def preview_key(key, limit=PREVIEW_KEY_BITS):
+    if len(key) <= limit:
+        return key
+    return f"{key[:limit]}... ({len(key)} bits)"
+
+
+def preview_rows(mask, columns, limit=PREVIEW_ROWS):
+    """Tab-separated table rows for the first `limit` qubits.
+
+    `columns` is a sequence of per-qubit sequences (bits, bases, ...); a final
+    Yes/No "kept" column is appended from the sift mask. Only the preview
+    window is touched, so the cost does not grow with the run length.
+    """
+    n_rows = min(limit, len(mask))
+    kept = np.where(mask[:n_rows], 'Yes', 'No')
+    sliced = [list(column[:n_rows]) for column in columns]
+    lines = []
+    for i in range(n_rows):
+        cells = [str(i)] + [str(column[i]) for column in sliced] + [kept[i]]
+        lines.append('\t'.join(cells))
+    if len(mask) > n_rows:
+        lines.append(f"... {len(mask) - n_rows} more rows not shown")
+    return '\n'.join(lines) + '\n'
+
+
+def preview_list(values, limit=PREVIEW_ROWS):
+    """str() of a per-qubit sequence, cut to its first `limit` items for long runs."""
+    head = np.asarray(values[:limit]).tolist()
+    if len(values) <= limit:
+        return str(head)
+    return f"{head}... ({len(values)} items)"
@@ -0,0 +1,92 @@
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import bases_to_array, make_rng
+
+# Full 2^n statevectors are only built up to this many qubits
+MAX_STATEVECTOR_QUBITS = 10
+# Per-qubit plots average contiguous qubits into at most this many bars
+MAX_PLOTTED_QUBITS = 512
+DEFAULT_SHOTS = 1024
+
+
+class ProductState:
+    """n unentangled qubits, each given by its Bloch sphere angles.
+
+    BB84 only ever prepares product states, so everything the visualization
+    needs - Bloch vectors, measurement marginals, sampled shots - follows
+    from the n (theta, phi) pairs in O(n) memory. The 2^n amplitude vector
+    is only materialized on request, for small n.
+    """
+
+    def __init__(self, theta, phi):
+        self.theta = np.asarray(theta, dtype=float)
+        self.phi = np.asarray(phi, dtype=float)
+        if self.theta.shape != self.phi.shape:
+            raise ValueError("Theta and phi must have the same length")
+
+    @classmethod
+    def from_bb84(cls, bits, bases):
+        """|0>, |1> in the '+' basis and |+>, |-> in the 'x' basis, as the sender's circuit prepares them."""
+        bits = np.asarray(bits, dtype=np.uint8)
+        diagonal = bases_to_array(bases).astype(bool)
+        if bits.shape != diagonal.shape:
+            raise ValueError("Bits and bases must have the same length")
+        theta = np.where(diagonal, np.pi / 2, np.pi * bits)
+        phi = np.where(diagonal, np.pi * bits, 0.0)
+        return cls(theta, phi)
+
+    @property
+    def n_qubits(self):
+        return self.theta.size
+
+    def bloch_vectors(self):
+        """(n, 3) array of per-qubit (<X>, <Y>, <Z>)."""
+        sin_theta = np.sin(self.theta)
+        return np.column_stack((sin_theta * np.cos(self.phi), sin_theta * np.sin(self.phi), np.cos(self.theta)))
+
+    def probabilities_one(self):
+        """Probability of reading 1 from each qubit in the computational basis."""
+        return np.sin(self.theta / 2) ** 2
+
+    def sample_marginals(self, shots=DEFAULT_SHOTS, rng=None):
+        """Fraction of `shots` computational-basis measurements returning 1, per qubit."""
+        return make_rng(rng).binomial(shots, self.probabilities_one()) / shots
+
+    def statevector(self):
+        """Full amplitude vector, qubit 0 least significant as in Qiskit."""
+        if self.n_qubits > MAX_STATEVECTOR_QUBITS:
+            raise ValueError(f"Statevectors are limited to {MAX_STATEVECTOR_QUBITS} qubits")
+        amplitudes = np.column_stack((np.cos(self.theta / 2), np.exp(1j * self.phi) * np.sin(self.theta / 2)))
+        statevector = np.ones(1, dtype=complex)
+        for qubit in amplitudes:
+            statevector = np.kron(qubit, statevector)
+        return statevector
+
+    def sample_counts(self, shots=DEFAULT_SHOTS, rng=None):
+        """Bitstring -> count for `shots` joint measurements, like Qiskit's get_counts(); small n only."""
+        probabilities = np.abs(self.statevector()) ** 2
+        counts = make_rng(rng).multinomial(shots, probabilities / probabilities.sum())
+        return {format(int(i), f'0{self.n_qubits}b'): int(counts[i]) for i in np.flatnonzero(counts)}
+
+
+def uniform_example(n_qubits, rng=None):
+    """Every qubit on the equator with a random phase: all 2^n outcomes equally likely."""
+    rng = make_rng(rng)
+    return ProductState(np.full(n_qubits, np.pi / 2), rng.uniform(0, 2 * np.pi, n_qubits))
+
+
+def non_uniform_example(n_qubits, rng=None):
+    """Random tilts leaning towards |1>, so outcomes with more ones are more likely."""
+    rng = make_rng(rng)
+    theta = np.arccos(1 - 2 * rng.beta(2.0, 1.5, n_qubits))
+    return ProductState(theta, rng.uniform(0, 2 * np.pi, n_qubits))
+
+
+def bin_qubits(columns, max_bins=MAX_PLOTTED_QUBITS):
+    """Average per-qubit columns over contiguous bins; returns (bin starts, bin size, binned columns)."""
+    n = len(columns[0])
+    bin_size = max(1, -(-n // max_bins))
+    starts = np.arange(0, n, bin_size)
+    widths = np.diff(np.append(starts, n))
+    return starts, bin_size, [np.add.reduceat(np.asarray(column, dtype=float), starts) / widths
+                              for column in columns]
@@ -0,0 +1,90 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 15
+# Time the poller may spend running callbacks per tick before yielding back to Tk
+FRAME_BUDGET_S = 0.008
+
+
+class TkWorker:
+    """Background executor for a Tk GUI that hands every result back on the Tk thread.
+
+    Protocol work, sockets and other slow calls go to submit(); background
+    code never touches a widget itself but passes callbacks to call_soon(),
+    or run_on_ui() when it needs an answer such as a dialog's. All of them
+    land in one queue that a root.after poller drains on the Tk thread,
+    spending at most FRAME_BUDGET_S per tick so the event loop keeps up.
+    """
+
+    def __init__(self, root, max_workers=2):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='qkd-worker')
+        self._callbacks = queue.SimpleQueue()
+        self._ui_thread = threading.current_thread()
+        self._closed = False
+        self._after_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """Run fn(*args) on a worker thread; on_done(result) / on_error(exc) then run on the Tk thread.
+
+        Without on_error, exceptions go to Tk's report_callback_exception like
+        any other callback error.
+        """
+        if self._closed:
+            raise RuntimeError("Worker is closed")
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._callbacks.put((self._finish, (f, on_done, on_error))))
+        return future
+
+    def call_soon(self, callback, *args):
+        """Schedule callback(*args) on the Tk thread; safe to call from any thread."""
+        self._callbacks.put((callback, args))
+
+    def run_on_ui(self, fn, *args):
+        """Run fn(*args) on the Tk thread and wait for its result (e.g. a modal dialog)."""
+        if threading.current_thread() is self._ui_thread:
+            return fn(*args)
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        self.call_soon(run)
+        return future.result()
+
+    def close(self):
+        self._closed = True
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, future, on_done, on_error):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is None:
+            if on_done is not None:
+                on_done(future.result())
+        elif on_error is not None:
+            on_error(exc)
+        else:
+            self.root.report_callback_exception(type(exc), exc, exc.__traceback__)
+
+    def _poll(self):
+        deadline = time.perf_counter() + FRAME_BUDGET_S
+        while time.perf_counter() < deadline:
+            try:
+                callback, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+        if not self._closed:
+            self._after_id = self.root.after(POLL_INTERVAL_MS, self._poll)
@@ -0,0 +1,180 @@
+import base64
+import functools
+import hashlib
+import inspect
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+TRANSCRIPT_FORMAT = 'bb84-transcript-v1'
+SENDER = 'sender'
+RECEIVER = 'receiver'
+EAVESDROPPER = 'eavesdropper'
+ROLES = (SENDER, RECEIVER, EAVESDROPPER)
+
+_SCALARS = (bool, int, float, str)
+
+
+def recorded(step):
+    """Decorator for session methods: log the step's RNG state, scalar arguments and duration.
+
+    The session's `steps` list then holds everything needed to re-run each
+    step offline: restoring `rng_state` replays the random draws exactly,
+    whether the generator was seeded by the caller or shared with another
+    session. `given` names the array arguments the caller supplied, so a
+    replay passes recorded data only where the original run did.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            arguments = signature.bind(self, *args, **kwargs).arguments
+            arguments.pop('self')
+            entry = {
+                'step': step,
+                'rng_state': self.rng.bit_generator.state,
+                'args': {k: v for k, v in arguments.items() if isinstance(v, _SCALARS)},
+                'given': sorted(k for k, v in arguments.items()
+                                if v is not None and not isinstance(v, (_SCALARS, dict, bytes))),
+            }
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            entry['elapsed'] = time.perf_counter() - start
+            # Methods that start a new run reset the log first
+            self.steps.append(entry)
+            return result
+        return wrapper
+    return decorator
+
+
+def pack_bits(bits):
+    """0/1 array -> {'n', 'packed'} with the bits packed and base64-encoded."""
+    if bits is None:
+        return None
+    bits = np.asarray(bits, dtype=np.uint8)
+    return {'n': int(bits.size), 'packed': base64.b64encode(np.packbits(bits).tobytes()).decode('ascii')}
+
+
+def unpack_bits(record):
+    if record is None:
+        return None
+    packed = np.frombuffer(base64.b64decode(record['packed']), dtype=np.uint8)
+    return np.unpackbits(packed, count=record['n'])
+
+
+def pack_bytes(data):
+    return None if data is None else base64.b64encode(bytes(data)).decode('ascii')
+
+
+def unpack_bytes(record):
+    return None if record is None else base64.b64decode(record)
+
+
+def key_digest(key_bits):
+    """SHA-256 of a packed key, so transcripts can be compared without storing the key twice."""
+    if key_bits is None:
+        return None
+    return hashlib.sha256(np.packbits(np.asarray(key_bits, dtype=np.uint8)).tobytes()).hexdigest()
+
+
+def _sample_mask(estimate):
+    return None if estimate is None else ~estimate.remaining_mask()
+
+
+def _engine_params(engine):
+    return None if engine is None else {'shard_size': engine.shard_size}
+
+
+def _channel_params(models):
+    return [dict(vars(model), model=type(model).__name__) for model in models]
+
+
+def _sender_record(session):
+    return {}, {
+        'bits': pack_bits(session.bits),
+        'bases': pack_bits(session.bases),
+        'bob_bases': pack_bits(session.bob_bases),
+        'bob_detected': pack_bits(session.bob_detected),
+        'sample_mask': pack_bits(_sample_mask(session.qber_estimate)),
+        'bob_sample_bits': pack_bits(session.bob_sample_bits),
+    }
+
+
+def _receiver_record(session):
+    estimate = session.qber_estimate
+    params = {
+        'backend': session.backend,
+        'channel': _channel_params(session.channel),
+        'engine': _engine_params(session.engine),
+    }
+    return params, {
+        'state': pack_bytes(session.received_state),
+        'bases': pack_bits(session.bases),
+        'measurements': pack_bits(session.measurements),
+        'detected': pack_bits(session.detected),
+        'sender_bases': pack_bits(session.sender_bases),
+        'sample_mask': pack_bits(_sample_mask(estimate)),
+        'sender_sample_bits': pack_bits(session.sender_sample_bits),
+    }
+
+
+def _eavesdropper_record(session):
+    params = {'backend': session.backend, 'rate': session.rate}
+    return params, {
+        'state': pack_bytes(session.received_state),
+        'bases': pack_bits(session.bases),
+        'measurements': pack_bits(session.measurements),
+        'intercepted': pack_bits(session.intercepted),
+    }
+
+
+_RECORDERS = {
+    SENDER: _sender_record,
+    RECEIVER: _receiver_record,
+    EAVESDROPPER: _eavesdropper_record,
+}
+
+
+def capture(session, **params):
+    """Transcript of one party's run as a JSON-ready dict.
+
+    Holds the session parameters, every recorded step with its RNG state and
+    timing, and the bases, bits and measurements the party saw, bit-packed.
+    The bits make the sifted key recoverable, so treat a transcript as
+    secret as the key itself.
+    """
+    role_params, data = _RECORDERS[session.role](session)
+    role_params.update(params)
+    estimate = getattr(session, 'qber_estimate', None)
+    return {
+        'format': TRANSCRIPT_FORMAT,
+        'role': session.role,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'params': role_params,
+        'steps': list(session.steps),
+        'data': data,
+        'result': {
+            'state': session.state,
+            'n_bits': int(session.n_bits),
+            'qber_estimate': None if estimate is None else estimate.stats(),
+            'key_digest': key_digest(getattr(session, 'key_bits', None)),
+        },
+    }
+
+
+def save_transcript(path, transcript):
+    with Path(path).open('w') as f:
+        json.dump(transcript, f, indent=1)
+
+
+def load_transcript(path):
+    with Path(path).open() as f:
+        transcript = json.load(f)
+    if transcript.get('format') != TRANSCRIPT_FORMAT:
+        raise ValueError(f"Not a {TRANSCRIPT_FORMAT} transcript: {path}")
+    if transcript.get('role') not in ROLES:
+        raise ValueError(f"Unknown transcript role: {transcript.get('role')}")
+    return transcript
@@ -0,0 +1,188 @@
+import json
+import socket
+import struct
+import numpy as np
+
+from quantum.quantum_key_distribution.framing import (
+    DEFAULT_MAX_FRAME_SIZE, recv_frame, recv_frame_async, send_frame, send_frame_async)
+
+MAGIC = b'BB84'
+VERSION = 1
+
+PACKED_FORMAT = 'bb84-packed-v1'
+JSON_FORMAT = 'json'
+SUPPORTED_FORMATS = [PACKED_FORMAT, JSON_FORMAT]
+
+FLAG_START_TIME = 0x01
+# A measurements message carries the detection mask as a second frame
+FLAG_DETECTED = 0x02
+
+# Message types in the header; quantum states from before the field existed have 0 there
+QUANTUM_STATE_TYPE = 0
+MEASUREMENTS_TYPE = 1
+
+# magic, version, flags, message type, n_bits, start_time
+HEADER = struct.Struct('>4sBBHQd')
+FRAME_LENGTH = struct.Struct('>I')
+
+
+def is_packed(data):
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def packed_size(n_bits):
+    """Total size in bytes of a packed quantum state carrying n_bits qubits."""
+    return HEADER.size + 2 * (FRAME_LENGTH.size + (n_bits + 7) // 8)
+
+
+def encode_quantum_state(x_applied, h_applied, start_time=None):
+    """Encode the per-qubit "X applied" / "H applied" flags as a versioned binary message.
+
+    Layout: header, then two length-prefixed frames holding the bit-packed X and
+    H arrays. A 1M-qubit state encodes to about 250 KB.
+    """
+    x_applied = np.asarray(x_applied, dtype=np.uint8)
+    h_applied = np.asarray(h_applied, dtype=np.uint8)
+    if x_applied.shape != h_applied.shape:
+        raise ValueError("X and H arrays must have the same length")
+    flags = FLAG_START_TIME if start_time is not None else 0
+    return _encode(QUANTUM_STATE_TYPE, flags, start_time, (x_applied, h_applied))
+
+
+def encode_measurements(bases, detected=None):
+    """Encode the receiver's bases (0 = '+', 1 = 'x') bit-packed, like a quantum state.
+
+    `detected` goes in a second frame only when some qubits were lost, so a
+    100k-qubit reply is about 12.5 KB instead of a JSON list of labels.
+    """
+    bases = np.asarray(bases, dtype=np.uint8)
+    if detected is None or np.all(detected):
+        return _encode(MEASUREMENTS_TYPE, 0, None, (bases,))
+    detected = np.asarray(detected, dtype=np.uint8)
+    if detected.shape != bases.shape:
+        raise ValueError("Bases and detection mask must have the same length")
+    return _encode(MEASUREMENTS_TYPE, FLAG_DETECTED, None, (bases, detected))
+
+
+def _encode(message_type, flags, start_time, arrays):
+    parts = [HEADER.pack(MAGIC, VERSION, flags, message_type, arrays[0].size, start_time or 0.0)]
+    for bits in arrays:
+        frame = np.packbits(bits).tobytes()
+        parts.append(FRAME_LENGTH.pack(len(frame)))
+        parts.append(frame)
+    return b''.join(parts)
+
+
+def _decode(data):
+    """(message type, flags, n_bits, start_time, view, offset of the first frame) of a packed message."""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ValueError("Truncated quantum state header")
+    magic, version, flags, message_type, n_bits, start_time = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a packed BB84 quantum state")
+    if version != VERSION:
+        raise ValueError(f"Unsupported quantum state version: {version}")
+    return message_type, flags, n_bits, start_time, view, HEADER.size
+
+
+def _decode_frames(view, offset, n_bits, count):
+    frames = []
+    for _ in range(count):
+        if len(view) < offset + FRAME_LENGTH.size:
+            raise ValueError("Truncated quantum state frame")
+        (length,) = FRAME_LENGTH.unpack_from(view, offset)
+        offset += FRAME_LENGTH.size
+        if length != (n_bits + 7) // 8 or len(view) < offset + length:
+            raise ValueError("Invalid quantum state frame length")
+        packed = np.frombuffer(view[offset:offset + length], dtype=np.uint8)
+        frames.append(np.unpackbits(packed, count=n_bits))
+        offset += length
+    return frames
+
+
+def decode_quantum_state(data):
+    """Decode a packed quantum state into the dict shape used by the QKD peers."""
+    message_type, flags, n_bits, start_time, view, offset = _decode(data)
+    if message_type != QUANTUM_STATE_TYPE:
+        raise ValueError("Not a packed BB84 quantum state")
+    frames = _decode_frames(view, offset, n_bits, 2)
+    state = {
+        'wire_format': PACKED_FORMAT,
+        'n_bits': n_bits,
+        'x_applied': frames[0],
+        'h_applied': frames[1],
+    }
+    if flags & FLAG_START_TIME:
+        state['start_time'] = start_time
+    return state
+
+
+def encode_message(message):
+    """Serialize a message for the wire: packed quantum states pass through, dicts become JSON."""
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return message
+    return json.dumps(message).encode()
+
+
+def decode_measurements(data):
+    """Decode packed receiver bases into the dict shape of a JSON measurements reply, as arrays."""
+    message_type, flags, n_bits, _, view, offset = _decode(data)
+    if message_type != MEASUREMENTS_TYPE:
+        raise ValueError("Not a packed BB84 measurements message")
+    frames = _decode_frames(view, offset, n_bits, 2 if flags & FLAG_DETECTED else 1)
+    message = {'wire_format': PACKED_FORMAT, 'n_bits': n_bits, 'bob_bases': frames[0]}
+    if len(frames) > 1:
+        message['bob_detected'] = frames[1].astype(bool)
+    return message
+
+
+def decode_message(payload):
+    if is_packed(payload):
+        if _decode(payload)[0] == MEASUREMENTS_TYPE:
+            return decode_measurements(payload)
+        return decode_quantum_state(payload)
+    return json.loads(bytes(payload).decode())
+
+
+def send_message(sock, message):
+    send_frame(sock, encode_message(message))
+
+
+def recv_message(sock, max_size=DEFAULT_MAX_FRAME_SIZE):
+    return decode_message(recv_frame(sock, max_size))
+
+
+async def send_message_async(writer, message):
+    await send_frame_async(writer, encode_message(message))
+
+
+async def recv_message_async(reader, max_size=DEFAULT_MAX_FRAME_SIZE):
+    return decode_message(await recv_frame_async(reader, max_size))
+
+
+def request_wire_formats(host, port, timeout=5):
+    """Ask a peer which quantum state formats it accepts.
+
+    Peers that do not understand the request close the connection, in which
+    case only JSON is assumed.
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as s:
+            send_message(s, {'request': 'wire_formats'})
+            response = recv_message(s)
+        return response.get('formats', [JSON_FORMAT])
+    except (OSError, ValueError):
+        return [JSON_FORMAT]
+
+
+def choose_wire_format(offered):
+    for wire_format in SUPPORTED_FORMATS:
+        if wire_format in offered:
+            return wire_format
+    return JSON_FORMAT
+
+
+def wire_formats_response():
+    return {'formats': SUPPORTED_FORMATS}
+
@@ -20,7 +20,15 @@ from datetime import datetime
 import csv
 import os.path
 from argon2.low_level import hash_secret_raw, Type #type:ignore
-from kyber_wrapper512 import generate_keypair, decapsulate
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+from quantum.pqc.keypool import KeypairPool
+
+KEM = Kyber(512)
+
 
 class QuantumSecureReceiver:
     def __init__(self):
@@ -35,6 +43,8 @@ class QuantumSecureReceiver:
 
         self.server_socket = None
         self.client_socket = None
+        # Ephemeral keypairs are generated in the background, one per handshake
+        self.keypair_pool = KeypairPool(KEM)
         self.symmetric_key = None
         self.quantum_key = None
         self.quantum_key_hash = None
@@ -377,20 +387,20 @@ class QuantumSecureReceiver:
     def perform_ephemeral_key_exchange(self):
         try:
             self.display_message("performing ephemeral key exchange and updating the session key please wait")
-            public_key, secret_key = generate_keypair()
-            public_key_b64 = base64.b64encode(public_key).decode('utf-8')
-            msg = "KYBER_EPHEMERAL:" + public_key_b64 + "\n"
-            self.client_socket.sendall(msg.encode('utf-8'))
+            with self.keypair_pool.acquire() as (public_key, secret_key):
+                public_key_b64 = base64.b64encode(public_key).decode('utf-8')
+                msg = "KYBER_EPHEMERAL:" + public_key_b64 + "\n"
+                self.client_socket.sendall(msg.encode('utf-8'))
             
-            ciphertext_msg = self.client_socket.recv(4096).decode('utf-8').strip()
-            if not ciphertext_msg.startswith("KYBER_CIPHERTEXT:"):
-                messagebox.showerror("Ephemeral Key Exchange Error", "Invalid Kyber ciphertext message")
-                self.client_socket.close()
-                return False
+                ciphertext_msg = self.client_socket.recv(4096).decode('utf-8').strip()
+                if not ciphertext_msg.startswith("KYBER_CIPHERTEXT:"):
+                    messagebox.showerror("Ephemeral Key Exchange Error", "Invalid Kyber ciphertext message")
+                    self.client_socket.close()
+                    return False
             
-            ciphertext_b64 = ciphertext_msg[len("KYBER_CIPHERTEXT:"):]
-            ciphertext = base64.b64decode(ciphertext_b64)
-            shared_secret = decapsulate(ciphertext, secret_key)
+                ciphertext_b64 = ciphertext_msg[len("KYBER_CIPHERTEXT:"):]
+                ciphertext = base64.b64decode(ciphertext_b64)
+                shared_secret = KEM.decaps(ciphertext, secret_key)
 
             self.symmetric_key = hash_secret_raw(
                 secret=shared_secret,                 
@@ -646,6 +656,7 @@ class QuantumSecureReceiver:
 
     def run(self):
         self.window.mainloop()
+        self.keypair_pool.close()
 
 if __name__ == "__main__":
     receiver = QuantumSecureReceiver()
@@ -21,7 +21,14 @@ from datetime import datetime
 import csv
 import os.path
 from argon2.low_level import hash_secret_raw, Type #type:ignore
-from kyber_wrapper512 import encapsulate
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from quantum.pqc.kem import Kyber
+
+KEM = Kyber(512)
+
 
 class QuantumSecureSender:
     def __init__(self):
@@ -439,7 +446,7 @@ class QuantumSecureSender:
                 return False
             public_key_b64 = msg[len("KYBER_EPHEMERAL:"):]
             public_key = base64.b64decode(public_key_b64)
-            ciphertext, shared_secret = encapsulate(public_key)
+            ciphertext, shared_secret = KEM.encaps(public_key)
             ciphertext_b64 = base64.b64encode(ciphertext).decode('utf-8')
             response_msg = "KYBER_CIPHERTEXT:" + ciphertext_b64 + "\n"
             self.socket.sendall(response_msg.encode('utf-8'))
@@ -0,0 +1,52 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from quantum.quantum_key_distribution.bb84_simulation import (
+    compare_backends, measure, random_bases, random_bits)
+
+HAS_AER = importlib.util.find_spec('qiskit_aer') is not None
+
+
+class NumpyEngineTests(unittest.TestCase):
+    def test_matching_bases_reproduce_bits(self):
+        rng = np.random.default_rng(1)
+        bits, bases = random_bits(10_000, rng), random_bases(10_000, rng)
+        np.testing.assert_array_equal(measure(bits, bases, bases, rng=rng), bits)
+
+    def test_mismatched_bases_are_fair_coins(self):
+        rng = np.random.default_rng(2)
+        bits, bases = random_bits(100_000, rng), random_bases(100_000, rng)
+        outcome = measure(bits, bases, 1 - bases, rng=rng)
+        self.assertAlmostEqual(outcome.mean(), 0.5, delta=0.01)
+
+
+@unittest.skipUnless(HAS_AER, "qiskit-aer is not installed")
+class BackendEquivalenceTests(unittest.TestCase):
+    def test_numpy_and_aer_outcomes_are_equivalent(self):
+        for seed in (2024, 7):
+            report = compare_backends(n_qubits=4096, seed=seed)
+            self.assertEqual(report['numpy_matched_errors'], 0, report)
+            self.assertEqual(report['aer_matched_errors'], 0, report)
+            self.assertTrue(report['equivalent'], report)
+
+    def test_detects_diverging_distributions(self):
+        # A NumPy engine whose mismatched-basis outcomes are biased must be flagged
+        from quantum.quantum_key_distribution import bb84_simulation
+
+        original = bb84_simulation._measure_numpy
+
+        def biased(bits, bases, measure_bases, rng):
+            return np.where(bases == measure_bases, bits, (rng.random(bits.size) < 0.6).astype(np.uint8))
+
+        bb84_simulation._measure_numpy = biased
+        try:
+            report = compare_backends(n_qubits=4096, seed=2024)
+        finally:
+            bb84_simulation._measure_numpy = original
+        self.assertFalse(report['equivalent'], report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import ctypes
+import unittest
+
+import numpy as np
+
+from quantum.pqc.buffers import batch_input, batch_part, input_buffer, output_buffer, split, take
+
+
+class InputBufferTests(unittest.TestCase):
+    def test_bytes_are_passed_as_they_are(self):
+        data = bytes(range(16))
+        self.assertIs(input_buffer(data, 16, 'key'), data)
+
+    def test_writable_buffers_are_wrapped_without_copying(self):
+        data = bytearray(16)
+        argument = input_buffer(data, 16, 'key')
+        data[3] = 7
+        self.assertEqual(argument[3], 7)
+
+        array = np.zeros(4, dtype=np.uint32)
+        argument = input_buffer(array, 16, 'key')
+        array[0] = 0xffffffff
+        self.assertEqual(argument[0], 0xff)
+
+    def test_read_only_views_are_copied(self):
+        argument = input_buffer(memoryview(bytes(16)), 16, 'key')
+        self.assertIsInstance(argument, bytes)
+
+    def test_wrong_size_is_rejected(self):
+        for data in (bytes(15), bytearray(17), np.zeros(3, dtype=np.uint32)):
+            with self.assertRaisesRegex(ValueError, 'key must be 16 bytes'):
+                input_buffer(data, 16, 'key')
+
+
+class OutputBufferTests(unittest.TestCase):
+    def test_c_writes_land_in_the_callers_buffer(self):
+        data = bytearray(8)
+        ctypes.memset(output_buffer(data, 4, 'secret'), 0xab, 4)
+        self.assertEqual(data, b'\xab' * 4 + bytes(4))
+
+    def test_read_only_and_short_buffers_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'writable'):
+            output_buffer(bytes(8), 8, 'secret')
+        with self.assertRaisesRegex(ValueError, 'must hold 8 bytes'):
+            output_buffer(bytearray(4), 8, 'secret')
+
+
+class BatchTests(unittest.TestCase):
+    def test_sequences_and_contiguous_buffers(self):
+        argument, count = batch_input([b'ab', b'cd', b'ef'], 2, 'keys')
+        self.assertEqual((bytes(argument), count), (b'abcdef', 3))
+
+        data = bytearray(b'abcdef')
+        argument, count = batch_input(data, 2, 'keys')
+        self.assertEqual(count, 3)
+        part = batch_part(argument, 2, 1, 3)
+        data[2] = ord('X')
+        self.assertEqual(bytes(part), b'Xdef')
+
+    def test_bad_batch_sizes_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, r'keys\[1\] must be 2 bytes'):
+            batch_input([b'ab', b'c'], 2, 'keys')
+        with self.assertRaisesRegex(ValueError, 'multiple of 2 bytes'):
+            batch_input(bytearray(5), 2, 'keys')
+
+
+class TakeTests(unittest.TestCase):
+    def test_secrets_are_wiped_after_copying(self):
+        buffer = ctypes.create_string_buffer(b'abcd', 4)
+        self.assertEqual(take(buffer), b'abcd')
+        self.assertEqual(buffer.raw, b'abcd')
+        self.assertEqual(take(buffer, secret=True), b'abcd')
+        self.assertEqual(buffer.raw, bytes(4))
+
+        buffer = ctypes.create_string_buffer(b'abcd', 4)
+        self.assertEqual(split(buffer, 2, secret=True), [b'ab', b'cd'])
+        self.assertEqual(buffer.raw, bytes(4))
+
+
+if __name__ == "__main__":
+    unittest.main()
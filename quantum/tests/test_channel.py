@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from quantum.quantum_key_distribution.channel import (
+    BeamSplittingAttack, DepolarizingChannel, InterceptResend, LossChannel, simulate, transmit)
+
+N_QUBITS = 400_000
+
+
+class ChannelQberTests(unittest.TestCase):
+    def assertQber(self, models, expected, seed):
+        report = simulate(N_QUBITS, models, np.random.default_rng(seed))
+        # The sifted key holds about N_QUBITS / 2 bits, so the standard error is below 0.1%
+        self.assertAlmostEqual(report['qber'], expected, delta=0.004)
+        return report
+
+    def test_ideal_channel_has_no_errors(self):
+        report = self.assertQber([], 0.0, 1)
+        self.assertEqual(report['n_errors'], 0)
+
+    def test_depolarizing_adds_half_of_p(self):
+        for p in (0.04, 0.2):
+            self.assertQber([DepolarizingChannel(p)], p / 2, 2)
+
+    def test_intercept_resend_adds_a_quarter_of_the_rate(self):
+        for rate in (0.2, 1.0):
+            report = self.assertQber([InterceptResend(rate)], rate / 4, 3)
+            self.assertAlmostEqual(report['n_intercepted'] / N_QUBITS, rate, delta=0.01)
+
+    def test_loss_and_beam_splitting_add_no_errors(self):
+        report = self.assertQber([LossChannel.from_db(3), BeamSplittingAttack(0.5)], 0.0, 4)
+        self.assertAlmostEqual(report['detection_rate'], 10 ** -0.3 * 0.5, delta=0.01)
+        # A single photon Eve caught never reaches Bob, so she learns nothing of his key
+        self.assertEqual(report['eve_information'], 0.0)
+
+    def test_bad_parameters_are_rejected(self):
+        for make in (lambda: DepolarizingChannel(1.5), lambda: InterceptResend(-0.1),
+                     lambda: transmit([0, 1], [0], [])):
+            with self.assertRaises(ValueError):
+                make()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from quantum.quantum_key_distribution.entropy_pool import QuantumEntropyPool
+
+
+class EntropyPoolTests(unittest.TestCase):
+    def make_pool(self):
+        pool = QuantumEntropyPool(capacity_bits=1024, qubits_per_shot=8, shots_per_job=128, seed=1, start=False)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_bits_come_out_as_zeros_and_ones(self):
+        pool = self.make_pool()
+        pool.start()
+        bits = pool.take_bits(3000)
+        self.assertEqual(bits.size, 3000)
+        self.assertTrue(set(bits.tolist()) <= {0, 1})
+
+    def test_restart_clears_a_refill_failure(self):
+        pool = self.make_pool()
+        run_job = pool._run_job
+
+        def failing_job():
+            raise OSError("simulator unavailable")
+
+        pool._run_job = failing_job
+        pool.start()
+        with self.assertRaisesRegex(RuntimeError, 'simulator unavailable'):
+            pool.take_bytes(16)
+
+        pool.close()
+        pool._run_job = run_job
+        pool.start()
+        self.assertEqual(len(pool.take_bytes(16)), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import socket
+import threading
+import unittest
+
+from quantum.quantum_key_distribution.framing import (
+    COALESCE_LIMIT, LENGTH, RECV_CHUNK_SIZE, recv_frame, recv_frame_async, send_frame)
+
+
+class FramingTests(unittest.TestCase):
+    def socket_pair(self):
+        left, right = socket.socketpair()
+        self.addCleanup(left.close)
+        self.addCleanup(right.close)
+        return left, right
+
+    def test_small_and_large_frames_round_trip(self):
+        left, right = self.socket_pair()
+        for payload in (b'', b'hello', bytes(range(256)) * (COALESCE_LIMIT // 128),
+                        memoryview(b'x' * (RECV_CHUNK_SIZE + 3))):
+            sender = threading.Thread(target=send_frame, args=(left, payload))
+            sender.start()
+            self.assertEqual(recv_frame(right), payload)
+            sender.join()
+
+    def test_frames_over_the_limit_are_rejected_before_reading_them(self):
+        left, right = self.socket_pair()
+        left.sendall(LENGTH.pack(1 << 40))
+        with self.assertRaisesRegex(ValueError, 'exceeds the 1024 byte limit'):
+            recv_frame(right, max_size=1024)
+
+    def test_truncated_frames_raise_connection_error(self):
+        for data in (LENGTH.pack(10)[:5], LENGTH.pack(10) + b'abc'):
+            left, right = self.socket_pair()
+            left.sendall(data)
+            left.shutdown(socket.SHUT_WR)
+            with self.assertRaisesRegex(ConnectionError, 'Connection closed'):
+                recv_frame(right)
+
+    def test_async_reader_checks_the_limit_and_truncation(self):
+        async def receive(data, max_size):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await recv_frame_async(reader, max_size)
+
+        def read(data, max_size):
+            return asyncio.run(receive(data, max_size))
+
+        self.assertEqual(read(LENGTH.pack(3) + b'abc', 1024), b'abc')
+        with self.assertRaisesRegex(ValueError, 'exceeds'):
+            read(LENGTH.pack(2048), 1024)
+        with self.assertRaises(asyncio.IncompleteReadError):
+            read(LENGTH.pack(10) + b'abc', 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
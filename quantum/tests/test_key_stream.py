@@ -0,0 +1,48 @@
+import unittest
+
+from quantum.quantum_key_distribution.channel import DepolarizingChannel, InterceptResend
+from quantum.quantum_key_distribution.key_stream import KeyRingBuffer, KeyStream
+
+
+class KeyStreamTests(unittest.TestCase):
+    def test_both_ends_take_the_same_key(self):
+        with KeyStream(round_qubits=20_000, capacity_bytes=4096, channel=[DepolarizingChannel(0.04)],
+                       seed=5) as stream:
+            for _ in range(4):
+                sender_key = stream.take(512, timeout=30)
+                self.assertEqual(stream.take_receiver(512, timeout=30), sender_key)
+            self.assertGreater(stream.stats['secure_bytes'], 0)
+            self.assertEqual(stream.stats['unverified'], 0)
+
+    def test_rounds_over_the_threshold_give_no_key(self):
+        stream = KeyStream(round_qubits=20_000, channel=[InterceptResend(1.0)], seed=6, start=False)
+        self.assertEqual(stream.run_round(), (b'', b''))
+        self.assertEqual(stream.stats['aborted'], 1)
+        self.assertGreater(stream.stats['last_qber'], 0.2)
+
+
+class KeyRingBufferTests(unittest.TestCase):
+    def test_key_is_handed_out_once_in_order_across_the_wrap(self):
+        buffer = KeyRingBuffer(8)
+        self.assertEqual(buffer.put(b'abcdef'), 6)
+        self.assertEqual(buffer.take(4), b'abcd')
+        self.assertEqual(buffer.put(b'ghijkl'), 6)
+        self.assertEqual(buffer.put(b'm', timeout=0.01), 0)
+        self.assertEqual(buffer.take(8), b'efghijkl')
+        self.assertEqual(buffer._data, bytearray(8))
+
+    def test_take_times_out_or_fails_once_closed(self):
+        buffer = KeyRingBuffer(8)
+        buffer.put(b'ab')
+        with self.assertRaises(TimeoutError):
+            buffer.take(4, timeout=0.01)
+        buffer.close()
+        with self.assertRaisesRegex(RuntimeError, 'closed'):
+            buffer.take(4)
+        self.assertEqual(buffer.take(2), b'ab')
+        with self.assertRaisesRegex(ValueError, 'capacity'):
+            buffer.take(9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import threading
+import unittest
+
+from quantum.pqc.keypool import KeypairPool
+
+
+class FakeKem:
+    """Stands in for Kyber: fills keys with 0xff, or raises once `fail` is set."""
+
+    name = 'FakeKyber'
+    public_key_bytes = 4
+    secret_key_bytes = 8
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.generated = threading.Semaphore(0)
+
+    def keypair_into(self, public_key, secret_key):
+        if self.fail is not None:
+            raise self.fail
+        public_key[:] = b'\xff' * len(public_key)
+        secret_key[:] = b'\xff' * len(secret_key)
+        self.generated.release()
+
+
+class KeypairPoolTests(unittest.TestCase):
+    def test_secret_keys_are_wiped_after_use_and_on_close(self):
+        kem = FakeKem()
+        pool = KeypairPool(kem, size=2)
+        for _ in range(2):
+            self.assertTrue(kem.generated.acquire(timeout=5))
+        keypair = pool.acquire()
+        with keypair as (public_key, secret_key):
+            self.assertEqual(secret_key, b'\xff' * 8)
+        self.assertEqual(keypair.secret_key, bytes(8))
+
+        self.assertTrue(kem.generated.acquire(timeout=5))
+        pooled = list(pool._keypairs)
+        pool.close()
+        self.assertTrue(pooled)
+        for keypair in pooled:
+            self.assertEqual(keypair.secret_key, bytes(8))
+        with self.assertRaisesRegex(RuntimeError, 'closed'):
+            pool.acquire()
+
+    def test_refill_failure_is_raised_by_acquire(self):
+        pool = KeypairPool(FakeKem(fail=OSError("libkyber512.so not found")))
+        pool._thread.join(timeout=5)
+        with self.assertRaisesRegex(RuntimeError, 'refill failed: libkyber512.so not found'):
+            pool.acquire()
+
+
+if __name__ == "__main__":
+    unittest.main()
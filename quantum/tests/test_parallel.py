@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from quantum.quantum_key_distribution.parallel import ShardedEngine, shard_bounds
+
+
+class ShardedEngineTests(unittest.TestCase):
+    def run_engine(self, workers, n_bits=10_000, shard_size=1024):
+        with ShardedEngine(workers=workers, shard_size=shard_size) as engine:
+            bits = engine.random_bits(n_bits, seed=42)
+            bases = engine.random_bits(n_bits, seed=43)
+            measure_bases = engine.random_bits(n_bits, seed=44)
+            return bits, bases, measure_bases, engine.measure(bits, bases, measure_bases, seed=45)
+
+    def test_output_does_not_depend_on_the_worker_count(self):
+        expected = self.run_engine(1)
+        for workers in (2, 3):
+            for ours, theirs in zip(expected, self.run_engine(workers)):
+                np.testing.assert_array_equal(ours, theirs)
+
+    def test_measurements_follow_bb84(self):
+        bits, bases, measure_bases, measured = self.run_engine(2)
+        same = bases == measure_bases
+        np.testing.assert_array_equal(measured[same], bits[same])
+        self.assertAlmostEqual(np.mean(measured[~same] == bits[~same]), 0.5, delta=0.05)
+
+    def test_shard_size_is_part_of_the_seed(self):
+        self.assertFalse(np.array_equal(self.run_engine(1)[0], self.run_engine(1, shard_size=4096)[0]))
+
+    def test_shard_bounds_cover_every_qubit(self):
+        self.assertEqual(shard_bounds(10, 4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(shard_bounds(0, 4), [])
+        with self.assertRaisesRegex(ValueError, 'positive'):
+            ShardedEngine(shard_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
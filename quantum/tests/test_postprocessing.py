@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from quantum.quantum_key_distribution.postprocessing import (
+    CascadeResponder, cascade, privacy_amplification, toeplitz_hash, toeplitz_seed)
+
+
+class CascadeTests(unittest.TestCase):
+    def test_injected_errors_are_corrected(self):
+        rng = np.random.default_rng(7)
+        for n_bits, qber in ((1000, 0.05), (100_003, 0.02)):
+            alice = rng.integers(0, 2, n_bits, dtype=np.uint8)
+            errors = rng.choice(n_bits, int(n_bits * qber), replace=False)
+            bob = alice.copy()
+            bob[errors] ^= 1
+            result = cascade(alice, bob, qber, seed=1)
+            np.testing.assert_array_equal(result.bits, alice)
+            self.assertEqual(result.corrected, errors.size)
+            self.assertGreater(result.leaked_bits, 0)
+
+    def test_range_parities_match_bitwise_sums(self):
+        rng = np.random.default_rng(3)
+        bits = rng.integers(0, 2, 1000, dtype=np.uint8)
+        starts = rng.integers(0, 1001, 200)
+        stops = np.maximum(starts, rng.integers(0, 1001, 200))
+        starts, stops = np.append(starts, [0, 0, 64]), np.append(stops, [1000, 0, 128])
+        expected = [bits[start:stop].sum() & 1 for start, stop in zip(starts, stops)]
+        # The first pass keeps the key order
+        responder = CascadeResponder(bits, block=10, passes=1)
+        np.testing.assert_array_equal(responder.parities(0, starts, stops), expected)
+        self.assertEqual(responder.leaked_bits, starts.size)
+
+
+class ToeplitzTests(unittest.TestCase):
+    def test_hash_matches_the_matrix_product(self):
+        rng = np.random.default_rng(5)
+        n_bits, out_bits = 50, 20
+        bits = rng.integers(0, 2, n_bits, dtype=np.uint8)
+        seed = toeplitz_seed(n_bits, out_bits, 9)
+        rows, cols = np.indices((out_bits, n_bits))
+        matrix = seed[rows - cols + n_bits - 1].astype(np.int64)
+        np.testing.assert_array_equal(toeplitz_hash(bits, out_bits, seed), matrix @ bits & 1)
+
+    def test_output_length_and_determinism(self):
+        bits = np.random.default_rng(1).integers(0, 2, 10_000, dtype=np.uint8)
+        key = privacy_amplification(bits, 4001, seed=12)
+        self.assertEqual(len(key), 501)
+        self.assertEqual(key, privacy_amplification(bits, 4001, seed=12))
+        self.assertNotEqual(key, privacy_amplification(bits, 4001, seed=13))
+        self.assertEqual(privacy_amplification(bits, 0, seed=12), b'')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from quantum.quantum_key_distribution.qber import (
+    discard_sample, estimate_qber, sample_positions, wilson_interval)
+
+
+class WilsonIntervalTests(unittest.TestCase):
+    def test_known_interval(self):
+        lower, upper = wilson_interval(10, 100, confidence=0.95)
+        self.assertAlmostEqual(lower, 0.0552, places=4)
+        self.assertAlmostEqual(upper, 0.1744, places=4)
+
+    def test_no_errors_still_bounds_the_rate(self):
+        lower, upper = wilson_interval(0, 1000, confidence=0.99)
+        z2 = 2.5758293035489 ** 2
+        self.assertEqual(lower, 0.0)
+        self.assertAlmostEqual(upper, z2 / (1000 + z2))
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_bounds_stay_in_range_and_contain_the_rate(self):
+        for n_errors, n_sample in ((0, 5), (5, 5), (3, 40), (499, 1000)):
+            lower, upper = wilson_interval(n_errors, n_sample)
+            self.assertTrue(0.0 <= lower <= n_errors / n_sample <= upper <= 1.0)
+
+
+class AbortTests(unittest.TestCase):
+    def estimate(self, n_errors, n_sample=1000):
+        """A 5000-bit key with a sample of n_sample positions, n_errors of them wrong."""
+        rng = np.random.default_rng(8)
+        key = rng.integers(0, 2, 5000, dtype=np.uint8)
+        positions = sample_positions(key.size, n_sample / key.size, rng)
+        sample = key[positions].copy()
+        sample[:n_errors] ^= 1
+        return estimate_qber(key, positions, sample, confidence=0.99, threshold=0.11)
+
+    def test_abort_follows_the_upper_bound(self):
+        self.assertFalse(self.estimate(2).abort)
+        self.assertTrue(self.estimate(250).abort)
+        # 8% stays clear of the 11% threshold at 99% confidence; 9% does not
+        below = self.estimate(80)
+        self.assertAlmostEqual(below.upper, 0.10497, places=5)
+        self.assertFalse(below.abort)
+        borderline = self.estimate(90)
+        self.assertAlmostEqual(borderline.qber, 0.09)
+        self.assertTrue(borderline.abort)
+        # The same 8% from a smaller sample is too uncertain to keep
+        self.assertTrue(self.estimate(8, n_sample=100).abort)
+
+    def test_sample_is_removed_from_the_key(self):
+        key = np.arange(10, dtype=np.uint8) % 2
+        estimate = estimate_qber(key, [1, 4], key[[1, 4]])
+        self.assertEqual((estimate.n_errors, estimate.n_remaining), (0, 8))
+        np.testing.assert_array_equal(discard_sample(key, estimate), np.delete(key, [1, 4]))
+
+    def test_bad_samples_are_rejected(self):
+        key = np.zeros(10, dtype=np.uint8)
+        for positions, bits, error in (([1, 2], [0], 'differ in length'), ([10], [0], 'outside'),
+                                       ([3, 3], [0, 0], 'distinct')):
+            with self.assertRaisesRegex(ValueError, error):
+                estimate_qber(key, positions, bits)
+
+
+if __name__ == "__main__":
+    unittest.main()
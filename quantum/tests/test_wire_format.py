@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from quantum.quantum_key_distribution.protocol.messages import parse_quantum_state, quantum_state_message
+from quantum.quantum_key_distribution.wire_format import (
+    HEADER, JSON_FORMAT, PACKED_FORMAT, choose_wire_format, decode_message, decode_quantum_state,
+    encode_measurements, encode_message, encode_quantum_state, packed_size)
+
+
+class QuantumStateTests(unittest.TestCase):
+    def test_round_trip_for_odd_lengths(self):
+        rng = np.random.default_rng(2)
+        for n_bits in (1, 7, 8, 9, 1001):
+            x, h = rng.integers(0, 2, (2, n_bits), dtype=np.uint8)
+            data = encode_quantum_state(x, h, start_time=1.5)
+            self.assertEqual(len(data), packed_size(n_bits))
+            state = decode_message(data)
+            self.assertEqual((state['wire_format'], state['n_bits'], state['start_time']),
+                             (PACKED_FORMAT, n_bits, 1.5))
+            np.testing.assert_array_equal(state['x_applied'], x)
+            np.testing.assert_array_equal(state['h_applied'], h)
+            self.assertNotIn('start_time', decode_quantum_state(encode_quantum_state(x, h)))
+
+    def test_packed_and_json_states_parse_the_same(self):
+        rng = np.random.default_rng(4)
+        bits, bases = rng.integers(0, 2, (2, 300), dtype=np.uint8)
+        packed = parse_quantum_state(decode_message(quantum_state_message(bits, bases, PACKED_FORMAT)))
+        from_json = parse_quantum_state(decode_message(encode_message(quantum_state_message(bits, bases))))
+        self.assertEqual(packed[0], from_json[0])
+        for packed_bits, json_bits in zip(packed[1:], from_json[1:]):
+            np.testing.assert_array_equal(packed_bits, json_bits)
+
+    def test_malformed_states_are_rejected(self):
+        data = encode_quantum_state(np.ones(20, dtype=np.uint8), np.zeros(20, dtype=np.uint8))
+        for bad, error in ((data[:HEADER.size - 1], 'Truncated quantum state header'),
+                           (data[:-1], 'Invalid quantum state frame length'),
+                           (data[:HEADER.size + 2], 'Truncated quantum state frame'),
+                           (data[:4] + b'\x09' + data[5:], 'Unsupported quantum state version')):
+            with self.assertRaisesRegex(ValueError, error):
+                decode_quantum_state(bad)
+        with self.assertRaisesRegex(ValueError, 'same length'):
+            encode_quantum_state(np.ones(3), np.ones(4))
+
+    def test_format_negotiation_prefers_packed(self):
+        self.assertEqual(choose_wire_format([JSON_FORMAT, PACKED_FORMAT]), PACKED_FORMAT)
+        self.assertEqual(choose_wire_format(['bb84-packed-v9']), JSON_FORMAT)
+
+
+class MeasurementsTests(unittest.TestCase):
+    def test_bases_round_trip_without_a_detection_frame(self):
+        bases = np.random.default_rng(1).integers(0, 2, 1001, dtype=np.uint8)
+        data = encode_measurements(bases, np.ones(bases.size, dtype=bool))
+        message = decode_message(data)
+        self.assertEqual(message['wire_format'], PACKED_FORMAT)
+        np.testing.assert_array_equal(message['bob_bases'], bases)
+        self.assertNotIn('bob_detected', message)
+        self.assertEqual(len(data), len(encode_measurements(bases)))
+
+    def test_detection_mask_round_trips(self):
+        bases = np.array([1, 0, 1, 1], dtype=np.uint8)
+        detected = np.array([True, False, True, False])
+        message = decode_message(encode_measurements(bases, detected))
+        np.testing.assert_array_equal(message['bob_bases'], bases)
+        np.testing.assert_array_equal(message['bob_detected'], detected)
+
+    def test_mismatched_mask_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'same length'):
+            encode_measurements(np.zeros(4, dtype=np.uint8), np.zeros(3, dtype=bool))
+
+
+if __name__ == "__main__":
+    unittest.main()